@@ -0,0 +1,65 @@
+"""application status counters
+
+Adds application_status_count and the append-only application_status_delta
+used by app.backend.services.stats, and fills the counters from the
+application table.
+
+Revision ID: 08d22973bd36
+Revises: 8c33410a32c1
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '08d22973bd36'
+down_revision: Union[str, Sequence[str], None] = '8c33410a32c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'application_status_count',
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('applicant_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['location_id'], ['location.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['applicant_id'], ['user.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['company_id'], ['company.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('location_id', 'applicant_id', 'status'),
+    )
+    op.create_index(op.f('ix_application_status_count_company_id'), 'application_status_count', ['company_id'], unique=False)
+    op.create_table(
+        'application_status_delta',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('company_id', sa.Integer(), nullable=False),
+        sa.Column('location_id', sa.Integer(), nullable=False),
+        sa.Column('applicant_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('delta', sa.SmallInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_application_status_delta_company_id'), 'application_status_delta', ['company_id'], unique=False)
+    op.execute("""
+        INSERT INTO application_status_count (location_id, applicant_id, status, company_id, count)
+        SELECT a.location_id, a.applicant_id, coalesce(a.status, 'NONE'), l.company_id, count(*)
+          FROM application a
+          JOIN location l ON l.id = a.location_id
+         GROUP BY a.location_id, a.applicant_id, coalesce(a.status, 'NONE'), l.company_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_application_status_delta_company_id'), table_name='application_status_delta')
+    op.drop_table('application_status_delta')
+    op.drop_index(op.f('ix_application_status_count_company_id'), table_name='application_status_count')
+    op.drop_table('application_status_count')
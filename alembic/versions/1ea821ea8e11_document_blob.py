@@ -0,0 +1,45 @@
+"""document blob
+
+Adds document_blob (content-addressed, reference-counted files) and
+document.sha256. Existing documents keep sha256 NULL and own their file.
+
+Revision ID: 1ea821ea8e11
+Revises: 74a70fc3600a
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1ea821ea8e11'
+down_revision: Union[str, Sequence[str], None] = '74a70fc3600a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'document_blob',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.Text(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    op.add_column('document', sa.Column('sha256', sa.String(length=64), nullable=True))
+    op.create_foreign_key('document_sha256_fkey', 'document', 'document_blob', ['sha256'], ['sha256'])
+    op.create_index(op.f('ix_document_sha256'), 'document', ['sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_document_sha256'), table_name='document')
+    op.drop_constraint('document_sha256_fkey', 'document', type_='foreignkey')
+    op.drop_column('document', 'sha256')
+    op.drop_table('document_blob')
@@ -0,0 +1,37 @@
+"""notification sync indexes
+
+Indexes for incremental notification sync (user_id, id) and the unread
+badge count (partial index on unread rows).
+
+Revision ID: 235a8f8fbb51
+Revises: 08d22973bd36
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '235a8f8fbb51'
+down_revision: Union[str, Sequence[str], None] = '08d22973bd36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_notification_user_id_id', 'notification', ['user_id', 'id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_notification_user_unread', 'notification', ['user_id'],
+                        unique=False, postgresql_where=sa.text('is_read = false'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_notification_user_unread', table_name='notification', postgresql_concurrently=True)
+        op.drop_index('ix_notification_user_id_id', table_name='notification', postgresql_concurrently=True)
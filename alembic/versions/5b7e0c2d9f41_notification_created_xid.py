@@ -0,0 +1,34 @@
+"""notification created_xid
+
+Inserting transaction id of each notification, so incremental sync only
+hands out ids once every lower id has committed (xid8, Postgres 13+).
+
+Revision ID: 5b7e0c2d9f41
+Revises: 235a8f8fbb51
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e0c2d9f41'
+down_revision: Union[str, Sequence[str], None] = '235a8f8fbb51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Add without a default first: a volatile default would rewrite the table.
+    # Existing rows stay NULL and count as settled.
+    op.execute("ALTER TABLE notification ADD COLUMN created_xid xid8")
+    op.alter_column('notification', 'created_xid', server_default=sa.text('pg_current_xact_id()'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('notification', 'created_xid')
@@ -0,0 +1,51 @@
+"""application search vector
+
+Adds application.search_vector (tsvector) with a GIN index and backfills it.
+Kept up to date by app.backend.services.application_search.
+
+Revision ID: 74a70fc3600a
+Revises: a27a8024ac13
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '74a70fc3600a'
+down_revision: Union[str, Sequence[str], None] = 'a27a8024ac13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('application', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.execute("""
+        UPDATE application AS a SET search_vector =
+            setweight(to_tsvector('simple', coalesce(a.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(
+                (SELECT l.name FROM location l WHERE l.id = a.location_id), '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(
+                (SELECT pt.name FROM permit_type pt WHERE pt.id = a.permit_type_id), '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(
+                (SELECT u.name FROM "user" u WHERE u.id = a.applicant_id), '')), 'C') ||
+            setweight(to_tsvector('simple', coalesce(
+                (SELECT string_agg(w.name, ' ') FROM application_worker aw
+                   JOIN worker w ON w.id = aw.worker_id
+                  WHERE aw.application_id = a.id), '')), 'C')
+    """)
+    with op.get_context().autocommit_block():
+        op.create_index('ix_application_search_vector', 'application', ['search_vector'],
+                        unique=False, postgresql_using='gin', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_application_search_vector', table_name='application', postgresql_concurrently=True)
+    op.drop_column('application', 'search_vector')
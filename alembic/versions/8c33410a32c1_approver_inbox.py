@@ -0,0 +1,59 @@
+"""approver inbox
+
+Adds approver_inbox (one row per approver per PENDING approval_data step of
+an open application) and backfills it. Kept up to date by
+app.backend.services.approver_inbox.
+
+Revision ID: 8c33410a32c1
+Revises: 1ea821ea8e11
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c33410a32c1'
+down_revision: Union[str, Sequence[str], None] = '1ea821ea8e11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'approver_inbox',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('approval_data_id', sa.Integer(), nullable=False),
+        sa.Column('application_id', sa.Integer(), nullable=False),
+        sa.Column('workflow_data_id', sa.Integer(), nullable=False),
+        sa.Column('level', sa.Integer(), nullable=True),
+        sa.Column('pending_since', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['approval_data_id'], ['approval_data.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['application_id'], ['application.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'approval_data_id'),
+    )
+    op.create_index(op.f('ix_approver_inbox_workflow_data_id'), 'approver_inbox', ['workflow_data_id'], unique=False)
+    op.create_index('ix_approver_inbox_user_level', 'approver_inbox', ['user_id', 'level'], unique=False)
+    op.execute("""
+        INSERT INTO approver_inbox (user_id, approval_data_id, application_id, workflow_data_id, level, pending_since)
+        SELECT ap.user_id, ad.id, a.id, ad.workflow_data_id, ad.level, coalesce(ad.time, timezone('utc', now()))
+          FROM approval_data ad
+          JOIN approval ap ON ap.id = ad.approval_id
+          JOIN application a ON a.workflow_data_id = ad.workflow_data_id
+         WHERE ad.status = 'PENDING'
+           AND ap.user_id IS NOT NULL
+           AND coalesce(a.status, '') NOT IN ('DRAFT', 'REJECTED', 'COMPLETED')
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_approver_inbox_user_level', table_name='approver_inbox')
+    op.drop_index(op.f('ix_approver_inbox_workflow_data_id'), table_name='approver_inbox')
+    op.drop_table('approver_inbox')
@@ -0,0 +1,59 @@
+"""hot path indexes
+
+Composite and partial indexes for the application/approval/notification
+query paths, plus a trigram index for name ILIKE search.
+Indexes are built CONCURRENTLY so existing tables stay writable.
+
+Revision ID: a27a8024ac13
+Revises: a4e82d1c14b9
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a27a8024ac13'
+down_revision: Union[str, Sequence[str], None] = 'a4e82d1c14b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, extra create_index kwargs)
+INDEXES = [
+    ('ix_application_applicant_created', 'application', ['applicant_id', 'created_time', 'id'], {}),
+    ('ix_application_created', 'application', ['created_time', 'id'], {}),
+    ('ix_application_workflow_data_id', 'application', ['workflow_data_id'], {}),
+    ('ix_application_status', 'application', ['status'], {}),
+    ('ix_application_active_workflow_data', 'application', ['workflow_data_id'],
+     {'postgresql_where': sa.text("status = 'ACTIVE'")}),
+    ('ix_application_name_trgm', 'application', ['name'],
+     {'postgresql_using': 'gin', 'postgresql_ops': {'name': 'gin_trgm_ops'}}),
+    ('ix_approval_data_workflow_data_level', 'approval_data', ['workflow_data_id', 'level'], {}),
+    ('ix_notification_user_created', 'notification', ['user_id', 'created_at', 'id'], {}),
+    ('ix_approval_user_id', 'approval', ['user_id'], {}),
+    ('ix_approval_workflow_id', 'approval', ['workflow_id'], {}),
+    ('ix_workflow_data_end_time', 'workflow_data', ['end_time'], {}),
+    ('ix_application_worker_application_id', 'application_worker', ['application_id'], {}),
+    ('ix_application_safety_equipment_application_id', 'application_safety_equipment', ['application_id'], {}),
+    ('ix_user_group_user_id', 'user_group', ['user_id'], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True, **kwargs)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,31 @@
+"""email outbox claim token
+
+Token of the dispatcher holding a SENDING row, so a dispatcher whose claim
+was taken over cannot record results for it.
+
+Revision ID: c3d8e1f4a7b2
+Revises: 5b7e0c2d9f41
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8e1f4a7b2'
+down_revision: Union[str, Sequence[str], None] = '5b7e0c2d9f41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_outbox', sa.Column('claim_token', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('email_outbox', 'claim_token')
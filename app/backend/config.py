@@ -7,6 +7,15 @@ class Settings(BaseSettings):
     APP_ENV: str = "dev"
 
     DATABASE_URL: str = "postgresql+psycopg://postgres:postgres@db:5432/ptw"
+    # Optional streaming replica for list/filter reads; unset = everything on the primary
+    READ_REPLICA_URL: Union[str, None] = None
+
+    # Connection pool, per engine (sync and async each have their own; so does the replica)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30     # wait for a free connection before failing
+    DB_POOL_RECYCLE_SECONDS: int = 1800     # replace connections older than this (-1: never)
+    DB_POOL_PRE_PING: bool = True
 
     # Complex types must come as JSON in env; your .env already does that
     CORS_ORIGINS: List[str] = []
@@ -23,10 +32,53 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440 # 24 hours
 
+    # Authenticated user snapshot cache (per process)
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+
+    # Background jobs
+    SCHEDULER_ENABLED: bool = True
+    EXPIRY_SWEEP_INTERVAL_SECONDS: int = 60
+    EXPIRY_SWEEP_CHUNK_SIZE: int = 500
+    STATS_FOLD_INTERVAL_SECONDS: int = 30  # how often status counter deltas are folded
+
+    # Server-push events: "local" (single process) or "postgres" (LISTEN/NOTIFY across replicas)
+    EVENTS_BACKEND: str = "local"
+    EVENTS_QUEUE_SIZE: int = 100          # per connection; oldest events are dropped for slow clients
+    EVENTS_HEARTBEAT_SECONDS: int = 25
+
+    # Development / test SQL inspection: N+1 detection and per-route query budgets
+    SQL_INSPECTION_ENABLED: bool = False
+    SQL_REPEAT_THRESHOLD: int = 5        # same statement shape this often in one request = suspected N+1
+    SQL_DEFAULT_BUDGET: int = 0          # budget for routes without @query_budget (0 = none)
+    SQL_BUDGET_STRICT: bool = False      # fail the request (and the test) when a budget is exceeded
+
+    # Reference data cache (permit types, groups, locations, ...) per company
+    REFERENCE_CACHE_MAX_COMPANIES: int = 1000
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+
+    # Upload size limits
+    UPLOAD_MAX_DOCUMENT_MB: int = 50
+    UPLOAD_MAX_IMAGE_MB: int = 15
+
+    # Worker picture derivatives (longest edge in px)
+    PICTURE_THUMB_PX: int = 128
+    PICTURE_MEDIUM_PX: int = 512
+
+    # Password hashing pool (bcrypt runs off the request threads)
+    HASH_POOL_WORKERS: int = 4
+    HASH_POOL_MAX_PENDING: int = 16          # queued beyond the workers before rejecting with 503
+    HASH_POOL_USE_PROCESSES: bool = False    # process pool for true multi-core hashing
+
     # Push (optional)
     FCM_PROJECT_ID: Union[str, None] = None
     FCM_SA_EMAIL: Union[str, None] = None
     FCM_SA_PRIVATE_KEY: Union[str, None] = None
+    FCM_TOKEN_URL: str = "https://oauth2.googleapis.com/token"
+    FCM_API_BASE: str = "https://fcm.googleapis.com"  # point at a stand-in server for tests
+    FCM_MAX_CONCURRENCY: int = 8             # parallel sends (and pooled connections)
+    FCM_TIMEOUT_SECONDS: float = 10
+    FCM_TOKEN_REFRESH_MARGIN_SECONDS: int = 300  # renew the access token this long before it expires
 
     # Email
     MAIL_USERNAME: str
@@ -39,6 +91,15 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = False
     MAIL_TIMEOUT: int = 120
 
+    # Email outbox dispatcher
+    OUTBOX_DISPATCHER_ENABLED: bool = True   # run inside the API process; disable when using the CLI worker
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 5
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: int = 30
+    OUTBOX_RETRY_MAX_SECONDS: int = 3600
+    OUTBOX_CLAIM_LEASE_SECONDS: Union[int, None] = None  # SENDING rows without a heartbeat for this long are retried; never below 3 * MAIL_TIMEOUT
+
     # (Optional) allow comma-separated CORS in dev
     @field_validator("CORS_ORIGINS", mode="before")
     @classmethod
@@ -1,14 +1,29 @@
 # app/database.py
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from .config import settings
+from .utils.db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, pool_status
+
+
+def _pool_options(name: str) -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_logging_name": name,   # key of the pool's checkout stats
+    }
+
 
 # Engine (psycopg3). If you use psycopg2, change "+psycopg" -> "+psycopg2"
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
+    poolclass=InstrumentedQueuePool,
     future=True,
+    **_pool_options("primary"),
 )
 
 SessionLocal = sessionmaker(
@@ -18,6 +33,59 @@ SessionLocal = sessionmaker(
     future=True,
 )
 
+# Async engine for the /api/v2 endpoints. The "+psycopg" URL works for both:
+# SQLAlchemy picks psycopg's async connection for create_async_engine.
+async_engine = create_async_engine(
+    settings.DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    **_pool_options("primary_async"),
+)
+
+# AsyncSession runs the ORM on a sync Session internally; using SessionLocal's
+# class for it means the session hooks registered on SessionLocal (approver
+# inbox, status counters, events, pushes) fire for async writes too.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=SessionLocal.class_,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Read replica for list/filter endpoints. Replicas lag slightly behind the
+# primary, so only reads that tolerate that go here; without READ_REPLICA_URL
+# these are the primary engines.
+if settings.READ_REPLICA_URL:
+    read_engine = create_engine(
+        settings.READ_REPLICA_URL,
+        poolclass=InstrumentedQueuePool,
+        future=True,
+        **_pool_options("replica"),
+    )
+    async_read_engine = create_async_engine(
+        settings.READ_REPLICA_URL,
+        poolclass=InstrumentedAsyncQueuePool,
+        **_pool_options("replica_async"),
+    )
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+# No session hooks here: these sessions never write
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    autocommit=False,
+    autoflush=False,
+    future=True,
+)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 # Dependency used by routers/services
@@ -27,3 +95,37 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """get_db for read-only list/filter endpoints; uses the replica when configured."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """Async counterpart of get_db, for `async def` endpoints."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """Async counterpart of get_read_db."""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+
+def named_engines() -> dict:
+    """Sync Engine of every connection pool by name (async engines via .sync_engine)."""
+    engines = {"primary": engine, "primary_async": async_engine.sync_engine}
+    if settings.READ_REPLICA_URL:
+        engines.update(replica=read_engine, replica_async=async_read_engine.sync_engine)
+    return engines
+
+
+def pool_stats() -> dict:
+    """Occupancy and checkout wait stats of every connection pool, by name."""
+    return {name: pool_status(e.pool) for name, e in named_engines().items()}
@@ -1,28 +1,22 @@
 # app/deps.py
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 
-from .database import get_db
+from .database import get_async_db, get_async_read_db, get_db, get_read_db
 from .security import token as _token
-from . import models
+from .security.principals import Principal, load_principal
 from .config import settings
 
 # Use real OAuth2 token scheme (instead of bypass)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> models.User:
-    """Extract user from JWT token and fetch from DB"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
+def principal_from_token(db: Session, token: str) -> Optional[Principal]:
+    """Resolve a bearer token to a Principal, or None when it is invalid."""
     try:
         # Decode JWT token
         payload = jwt.decode(
@@ -30,26 +24,53 @@ def get_current_user(
             settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM],
         )
+    except JWTError:
+        return None
 
-        # Get user id from token
-        user_id: int = payload.get("uid")
-        if user_id is None:
-            raise credentials_exception
+    # Get user id from token
+    user_id: int = payload.get("uid")
+    if user_id is None:
+        return None
+
+    # Cached snapshot; only hits the DB on a miss
+    return load_principal(db, user_id)
 
-    except JWTError:
-        raise credentials_exception
 
-    # Fetch user from DB
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Principal:
+    """Extract user from JWT token and resolve it through the principal cache"""
+    user = principal_from_token(db, token)
     if not user:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return user
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """get_current_user for async endpoints; a principal cache hit does no I/O"""
+    user = await db.run_sync(principal_from_token, token)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     return user
 
 
 def require_role(roles):
     """Role-based access guard"""
-    def _guard(user: models.User = Depends(get_current_user)):
+    def _guard(user: Principal = Depends(get_current_user)):
         # Implement real role logic later
         if roles and getattr(user, "role", None) not in roles:
             raise HTTPException(
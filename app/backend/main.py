@@ -1,36 +1,80 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from .config import settings
+from . import metrics, sql_inspection
+from .database import async_engine, async_read_engine, named_engines, pool_stats
+from .security.hashing import hash_pool, HashingPoolBusy
+from .services import approver_inbox  # noqa: F401  registers the inbox sync session hook
+from .services import application_search  # noqa: F401  registers the search vector session hook
+from .services import email_outbox, events
+from .services import stats  # noqa: F401  registers the status counter session hook
+from .services import notifications as push_notifications  # noqa: F401  registers the push-on-commit session hook
+from .utils.pagination import NEXT_CURSOR_HEADER
+from .utils.uploads import MaxBodySizeMiddleware, MB
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-# from apscheduler.schedulers.background import BackgroundScheduler
 
 # Import routers once
-# from .scheduler import check_and_complete_expired_permits
+from . import scheduler
 from .routers import (
     authentication,               # /auth/*
     companies, permit_types, users, locations, documents,
     workflows, approvals, groups, user_groups, workflow_data, approval_data,
     applications, location_managers, permit_officers, workers, safety_equipments,
     application_workers, application_safety_equipments,
-    push_tokens, feedbacks, notifications, departments, reports, department_heads
+    push_tokens, feedbacks, notifications, departments, reports, department_heads,
+    bootstrap, approver_inbox as approver_inbox_router, stats as stats_router,
+    events as events_router, v2,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Handles application startup and shutdown events.
+    """
+    # Expired permit sweep (advisory-locked, so safe with several replicas)
+    job_scheduler = scheduler.start_scheduler()
+
+    # Server-push events (WebSocket / SSE)
+    await events.bus.start()
+
+    # Deliver queued emails in the background
+    outbox_stop = asyncio.Event()
+    outbox_task = None
+    if settings.OUTBOX_DISPATCHER_ENABLED:
+        outbox_task = asyncio.create_task(email_outbox.run_dispatcher(outbox_stop))
+    yield
+    if outbox_task:
+        outbox_stop.set()
+        await outbox_task
+    if job_scheduler:
+        job_scheduler.shutdown(wait=False)
+    await events.bus.stop()
+    # Stop the password hashing workers on shutdown
+    hash_pool.shutdown()
+    # Close the /api/v2 connection pools
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+
+@app.exception_handler(HashingPoolBusy)
+async def hashing_pool_busy_handler(request: Request, exc: HashingPoolBusy):
+    # Fast-reject instead of queueing more bcrypt work behind a full pool
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+# Refuse oversized upload bodies before they are parsed (per-file limits are checked while streaming)
+app.add_middleware(
+    MaxBodySizeMiddleware,
+    max_bytes=(max(settings.UPLOAD_MAX_DOCUMENT_MB, settings.UPLOAD_MAX_IMAGE_MB) + 1) * MB,
+    path_prefixes=("/api/documents/upload", "/api/workers"),
 )
-# scheduler = BackgroundScheduler()
-
-# @asynccontextmanager
-# async def lifespan(app: FastAPI):
-#     """
-#     Handles application startup and shutdown events.
-#     """
-#     # On startup, add the job and start the scheduler
-#     # This job will run every minute. You can adjust the interval.
-#     scheduler.add_job(check_and_complete_expired_permits, 'interval', minutes=1, id="complete_expired_permits")
-#     scheduler.start()
-#     yield
-#     # On shutdown, stop the scheduler
-#     scheduler.shutdown()
-
-# app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
-app = FastAPI(title=settings.APP_NAME)
 
 app.add_middleware(
     CORSMiddleware,
@@ -45,8 +89,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Content-Range", "Accept-Ranges", sql_inspection.QUERY_COUNT_HEADER],
 )
 
+# Prometheus: outermost, so the timing covers the other middleware too
+app.add_middleware(metrics.MetricsMiddleware)
+for _pool_name, _engine in named_engines().items():
+    metrics.instrument_engine(_engine, _pool_name)
+metrics.REGISTRY.register(metrics.RuntimeCollector(
+    pool_stats=pool_stats,
+    hash_pool_stats=hash_pool.stats,
+    event_connections=events.bus.connection_count,
+))
+
+# Dev/test: statements per request, N+1 warnings and query budgets
+if settings.SQL_INSPECTION_ENABLED:
+    app.add_middleware(sql_inspection.SqlInspectionMiddleware)
+    sql_inspection.install(named_engines())
+
 # Auth routes (keep outside /api so paths are /auth/login, /auth/me, etc)
 app.include_router(authentication.router)
 
@@ -56,11 +116,14 @@ app.include_router(applications.router, prefix="/api")
 app.include_router(application_safety_equipments.crud_router, prefix="/api")
 app.include_router(application_workers.crud_router, prefix="/api")
 app.include_router(approval_data.router, prefix="/api")
+app.include_router(approver_inbox_router.router, prefix="/api")
 app.include_router(approvals.router, prefix="/api")
+app.include_router(bootstrap.router, prefix="/api")
 app.include_router(companies.crud_router, prefix="/api")
 app.include_router(departments.router, prefix="/api")
 app.include_router(department_heads.router, prefix="/api")
 app.include_router(documents.router, prefix="/api")
+app.include_router(events_router.router, prefix="/api")
 app.include_router(feedbacks.router, prefix="/api")
 app.include_router(groups.router, prefix="/api")
 app.include_router(location_managers.router, prefix="/api")
@@ -71,16 +134,29 @@ app.include_router(permit_types.router, prefix="/api")
 app.include_router(reports.router, prefix="/api")
 app.include_router(push_tokens.router, prefix="/api")
 app.include_router(safety_equipments.crud_router, prefix="/api")
+app.include_router(stats_router.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(user_groups.crud_router, prefix="/api")
 app.include_router(workers.router, prefix="/api")
 app.include_router(workflow_data.router, prefix="/api")
 app.include_router(workflows.crud_router, prefix="/api")
+app.include_router(v2.router, prefix="/api")
 
 @app.get("/")
 def root():
     return {"ok": True, "docs": "/docs"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return metrics.metrics_endpoint()
+
 @app.get("/healthz")
 def health():
-    return {"ok": True, "env": settings.APP_ENV}
+    return {
+        "ok": True,
+        "env": settings.APP_ENV,
+        "hash_pool": hash_pool.stats(),
+        "expiry_sweep": dict(scheduler.last_run),
+        "event_connections": events.bus.connection_count(),
+        "db_pools": pool_stats(),
+    }
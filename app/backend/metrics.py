@@ -0,0 +1,230 @@
+"""
+Prometheus metrics, served at /metrics.
+
+- HTTP: latency histogram and request count per route template
+  ("/api/applications/{item_id}", not the concrete path), in-flight requests.
+- SQL: statements and time per request, attributed through a contextvar that
+  the cursor-execute hooks on every engine update.
+- Email outbox / FCM push: send latency and outcomes.
+- Scheduler jobs: run duration and outcome.
+- Pools (database, hashing) and event connections are read at scrape time.
+
+Metrics live in this process's registry; with several uvicorn workers each
+worker reports its own numbers.
+"""
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+from sqlalchemy import event
+from starlette.responses import Response
+
+# Paths not worth timing: the scrape itself and long-lived event streams
+EXCLUDED_PREFIXES = ("/metrics", "/api/events/")
+UNMATCHED_ROUTE = "<unmatched>"  # 404s etc.; keeps label cardinality bounded
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HTTP_REQUESTS = Counter(
+    "ptw_http_requests_total", "HTTP requests", ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "ptw_http_request_duration_seconds", "HTTP request latency", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "ptw_http_requests_in_flight", "HTTP requests being handled",
+)
+REQUEST_SQL_STATEMENTS = Histogram(
+    "ptw_http_request_sql_statements", "SQL statements executed per request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REQUEST_SQL_SECONDS = Histogram(
+    "ptw_http_request_sql_seconds", "Time spent in SQL per request", ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+SQL_STATEMENTS = Counter(
+    "ptw_sql_statements_total", "SQL statements executed", ["pool"],
+)
+SQL_SECONDS = Counter(
+    "ptw_sql_seconds_total", "Time spent executing SQL", ["pool"],
+)
+EMAIL_BATCH_SECONDS = Histogram(
+    "ptw_email_batch_send_seconds", "SMTP send time per outbox batch",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+EMAILS = Counter(
+    "ptw_emails_total", "Outbox emails by send outcome", ["outcome"],  # sent | error | skipped (claim lost)
+)
+PUSH_SEND_SECONDS = Histogram(
+    "ptw_push_send_seconds", "FCM send latency per device", buckets=LATENCY_BUCKETS,
+)
+PUSHES = Counter(
+    "ptw_pushes_total", "FCM sends by outcome", ["outcome"],  # sent | failed | invalid_token
+)
+FCM_TOKEN_FETCHES = Counter(
+    "ptw_fcm_token_fetches_total", "OAuth access tokens fetched for FCM",
+)
+JOB_SECONDS = Histogram(
+    "ptw_scheduler_job_duration_seconds", "Scheduler job run time", ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+JOB_RUNS = Counter(
+    "ptw_scheduler_job_runs_total", "Scheduler job runs by outcome", ["job", "outcome"],  # ok | error
+)
+EXPIRED_PERMITS = Counter(
+    "ptw_expired_permits_completed_total", "Permits completed by the expiry sweep",
+)
+
+
+# ---------- SQL per request ----------
+
+@dataclass
+class RequestSql:
+    statements: int = 0
+    seconds: float = 0.0
+
+
+# Set by the middleware; the threadpool copies the context into sync endpoints
+# and SQLAlchemy's greenlets carry it into async ones, so the object is shared.
+current_request_sql: ContextVar[Optional[RequestSql]] = ContextVar("current_request_sql", default=None)
+
+
+def instrument_engine(engine, pool_name: str) -> None:
+    """Count and time every statement run on a (sync) Engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        SQL_STATEMENTS.labels(pool_name).inc()
+        SQL_SECONDS.labels(pool_name).inc(elapsed)
+        stats = current_request_sql.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # after_cursor_execute is skipped for failed statements
+        started = exception_context.connection.info.get("metrics_started") if exception_context.connection else None
+        if started:
+            started.pop()
+
+
+# ---------- HTTP ----------
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each HTTP request by its route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        sql = RequestSql()
+        token = current_request_sql.set(sql)
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            current_request_sql.reset(token)
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, template, str(status)).inc()
+            HTTP_LATENCY.labels(method, template).observe(elapsed)
+            REQUEST_SQL_STATEMENTS.labels(template).observe(sql.statements)
+            REQUEST_SQL_SECONDS.labels(template).observe(sql.seconds)
+
+
+def metrics_endpoint() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+# ---------- background work ----------
+
+def track_job(job: str, fn: Callable) -> Callable:
+    """Wrap a scheduler job to record its duration and outcome."""
+
+    @wraps(fn)
+    def run(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            JOB_RUNS.labels(job, "error").inc()
+            raise
+        finally:
+            JOB_SECONDS.labels(job).observe(time.perf_counter() - started)
+        JOB_RUNS.labels(job, "ok").inc()
+        return result
+
+    return run
+
+
+# ---------- scrape-time state ----------
+
+class RuntimeCollector:
+    """
+    Reads pool and connection state when /metrics is scraped. Takes the
+    readers as callables so this module doesn't import the services.
+    """
+
+    def __init__(self, pool_stats: Callable[[], dict], hash_pool_stats: Callable[[], dict], event_connections: Callable[[], int]):
+        self.pool_stats = pool_stats
+        self.hash_pool_stats = hash_pool_stats
+        self.event_connections = event_connections
+
+    def describe(self):
+        # Skip the registry's collect() at registration time (import of main)
+        return []
+
+    def collect(self):
+        size = GaugeMetricFamily("ptw_db_pool_size", "Configured pool size", labels=["pool"])
+        in_use = GaugeMetricFamily("ptw_db_pool_in_use", "Connections checked out", labels=["pool"])
+        idle = GaugeMetricFamily("ptw_db_pool_idle", "Idle connections in the pool", labels=["pool"])
+        overflow = GaugeMetricFamily("ptw_db_pool_overflow", "Connections open beyond pool_size", labels=["pool"])
+        timeouts = CounterMetricFamily("ptw_db_pool_checkout_timeouts", "Checkouts that hit pool_timeout", labels=["pool"])
+        wait = HistogramMetricFamily("ptw_db_pool_checkout_wait_seconds", "Time waiting for a connection", labels=["pool"])
+        for name, s in self.pool_stats().items():
+            size.add_metric([name], s["size"])
+            in_use.add_metric([name], s["in_use"])
+            idle.add_metric([name], s["idle"])
+            overflow.add_metric([name], s["overflow"])
+            if "checkouts" in s:
+                timeouts.add_metric([name], s["timeouts"])
+                cumulative, buckets = 0, []
+                for bound, n in s["wait_buckets"]:
+                    cumulative += n
+                    buckets.append((str(bound), cumulative))
+                wait.add_metric([name], buckets, sum_value=s["wait_seconds_total"])
+        yield from (size, in_use, idle, overflow, timeouts, wait)
+
+        h = self.hash_pool_stats()
+        yield GaugeMetricFamily("ptw_hash_pool_in_flight", "Password hashes running or queued", value=h["in_flight"])
+        yield GaugeMetricFamily("ptw_hash_pool_queued", "Password hashes waiting for a worker", value=h["queued"])
+        yield CounterMetricFamily("ptw_hash_pool_rejected", "Password hashes rejected as busy", value=h["rejected"])
+        yield GaugeMetricFamily("ptw_event_connections", "Connected WebSocket/SSE clients", value=self.event_connections())
@@ -1,7 +1,20 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, func, UniqueConstraint, Boolean
-from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from sqlalchemy import Column, BigInteger, Integer, SmallInteger, String, ForeignKey, DateTime, Text, func, UniqueConstraint, Boolean, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.types import UserDefinedType
 from .database import Base
 
+
+class XID8(UserDefinedType):
+    """Postgres 64-bit transaction id (13+)."""
+    cache_ok = True
+
+    def get_col_spec(self, **kw):
+        return "xid8"
+
+
 class Company(Base):
     __tablename__ = "company"
     id = Column(Integer, primary_key=True, index=True)
@@ -56,6 +69,10 @@ class UserGroup(Base):
     user = relationship("User", back_populates="user_groups")
     group = relationship("Group")
 
+    __table_args__ = (
+        Index("ix_user_group_user_id", "user_id"),
+    )
+
 class Approval(Base):
     __tablename__ = "approval"
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)  # auto
@@ -73,6 +90,11 @@ class Approval(Base):
         back_populates="approval"
     )
 
+    __table_args__ = (
+        Index("ix_approval_user_id", "user_id"),
+        Index("ix_approval_workflow_id", "workflow_id"),
+    )
+
 class WorkflowData(Base):
     __tablename__ = "workflow_data"
     id = Column(Integer, primary_key=True, index=True)
@@ -84,6 +106,10 @@ class WorkflowData(Base):
     approval_data = relationship("ApprovalData", backref="workflow_data")
     workflow = relationship("Workflow")
 
+    __table_args__ = (
+        Index("ix_workflow_data_end_time", "end_time"),
+    )
+
 class Document(Base):
     __tablename__ = "document"
     id = Column(Integer, primary_key=True, index=True)
@@ -91,6 +117,17 @@ class Document(Base):
     name = Column(String, nullable=False)
     path = Column(Text, nullable=False)
     time = Column(DateTime, nullable=True)
+    sha256 = Column(String(64), ForeignKey("document_blob.sha256"), nullable=True, index=True)  # null for files stored before dedup
+
+class DocumentBlob(Base):
+    """One stored file, shared by every Document with the same content.
+    Managed by services.document_store."""
+    __tablename__ = "document_blob"
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(Text, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now())
 
 class Location(Base):
     __tablename__ = "location"
@@ -120,6 +157,8 @@ class Application(Base):
         DateTime(timezone=True),
         nullable=True
     )
+    # Full-text search document, maintained by services.application_search
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
     permit_type = relationship("PermitType", lazy="joined")
     workflow_data = relationship("WorkflowData", lazy="joined")
     location = relationship("Location", lazy="joined")
@@ -138,6 +177,18 @@ class Application(Base):
         back_populates="applications"
     )
 
+    __table_args__ = (
+        Index("ix_application_applicant_created", "applicant_id", "created_time", "id"),
+        Index("ix_application_created", "created_time", "id"),
+        Index("ix_application_workflow_data_id", "workflow_data_id"),
+        Index("ix_application_status", "status"),
+        # Expiry sweep only ever looks at ACTIVE permits
+        Index("ix_application_active_workflow_data", "workflow_data_id", postgresql_where=text("status = 'ACTIVE'")),
+        # name ILIKE '%q%' (needs the pg_trgm extension)
+        Index("ix_application_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_application_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
     @property
     def approval_data(self):
         return self.workflow_data.approval_data if self.workflow_data else []
@@ -163,6 +214,10 @@ class ApprovalData(Base):
 
     approval = relationship("Approval")
 
+    __table_args__ = (
+        Index("ix_approval_data_workflow_data_level", "workflow_data_id", "level"),
+    )
+
 class LocationManager(Base):
     __tablename__ = "location_manager"
 
@@ -211,6 +266,10 @@ class ApplicationWorker(Base):
     application_id = Column(Integer, ForeignKey("application.id", ondelete="CASCADE"), nullable=False)
     worker_id = Column(Integer, ForeignKey("worker.id", ondelete="CASCADE"), nullable=False)
 
+    __table_args__ = (
+        Index("ix_application_worker_application_id", "application_id"),
+    )
+
 class SafetyEquipment(Base):
     __tablename__ = "safety_equipment"
 
@@ -231,6 +290,10 @@ class ApplicationSafetyEquipment(Base):
     application_id = Column(Integer, ForeignKey("application.id", ondelete="CASCADE"), nullable=False)
     safety_equipment_id = Column(Integer, ForeignKey("safety_equipment.id", ondelete="CASCADE"), nullable=False)
 
+    __table_args__ = (
+        Index("ix_application_safety_equipment_application_id", "application_id"),
+    )
+
 class PushToken(Base):
     __tablename__ = "push_token"
 
@@ -252,9 +315,19 @@ class Notification(Base):
     message = Column(String, nullable=False)
     is_read = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, server_default=func.now())
+    # Inserting transaction, so sync can tell when every lower id has committed
+    created_xid = deferred(Column(XID8, nullable=True, server_default=text("pg_current_xact_id()")))
 
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_notification_user_created", "user_id", "created_at", "id"),
+        # Incremental sync: rows of a user after a given id
+        Index("ix_notification_user_id_id", "user_id", "id"),
+        # Unread badge: count(*) over a user's unread rows only
+        Index("ix_notification_user_unread", "user_id", postgresql_where=text("is_read = false")),
+    )
+
 
 class Feedback(Base):
     __tablename__ = "feedback"
@@ -302,4 +375,61 @@ class DepartmentHead(Base):
     user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
 
     user = relationship("User", back_populates="department_heads")
-    department = relationship("Department", back_populates="department_heads")
\ No newline at end of file
+    department = relationship("Department", back_populates="department_heads")
+
+class EmailOutbox(Base):
+    """Emails written in the same transaction as the change that triggers them,
+    delivered later by services.email_outbox."""
+    __tablename__ = "email_outbox"
+    id = Column(Integer, primary_key=True, index=True)
+    subject = Column(String, nullable=False)
+    recipients = Column(Text, nullable=False)  # comma-separated addresses
+    body = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="PENDING")  # PENDING | SENDING | SENT | FAILED
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = Column(DateTime, nullable=True)   # refreshed as each message of the batch starts sending
+    claim_token = Column(String(32), nullable=True)   # which dispatcher's claim this is
+    sent_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+class ApproverInbox(Base):
+    """One row per approver per PENDING approval_data step of an open application.
+    Derived data, kept in sync by services.approver_inbox."""
+    __tablename__ = "approver_inbox"
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    approval_data_id = Column(Integer, ForeignKey("approval_data.id", ondelete="CASCADE"), primary_key=True)
+    application_id = Column(Integer, ForeignKey("application.id", ondelete="CASCADE"), nullable=False)
+    workflow_data_id = Column(Integer, nullable=False, index=True)
+    level = Column(Integer, nullable=True)
+    pending_since = Column(DateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_approver_inbox_user_level", "user_id", "level"),
+    )
+
+class ApplicationStatusCount(Base):
+    """Number of applications per (location, applicant, status), for dashboards.
+    Maintained by services.stats: writers append ApplicationStatusDelta rows,
+    which a scheduled job folds in here."""
+    __tablename__ = "application_status_count"
+    location_id = Column(Integer, ForeignKey("location.id", ondelete="CASCADE"), primary_key=True)
+    applicant_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(String, primary_key=True)
+    company_id = Column(Integer, ForeignKey("company.id", ondelete="CASCADE"), nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class ApplicationStatusDelta(Base):
+    """Append-only counter changes not yet folded into application_status_count."""
+    __tablename__ = "application_status_delta"
+    id = Column(BigInteger, primary_key=True)
+    company_id = Column(Integer, nullable=False, index=True)
+    location_id = Column(Integer, nullable=False)
+    applicant_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)
+    delta = Column(SmallInteger, nullable=False)
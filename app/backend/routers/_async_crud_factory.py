@@ -0,0 +1,151 @@
+# app/routers/_async_crud_factory.py
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Type, Optional, Callable, Any
+
+from ..database import get_async_db, get_async_read_db
+from ..services import reference_cache
+from ..utils.pagination import keyset_query, keyset_page, NEXT_CURSOR_HEADER
+
+def make_async_crud_router(
+    *,
+    Model: Type[Any],
+    InSchema: Type[Any],             # default schema for PUT
+    OutSchema: Type[Any],
+    prefix: str,
+    tag: str,
+    CreateSchema: Optional[Type[Any]] = None,   # schema for POST
+    UpdateSchema: Optional[Type[Any]] = None,   # schema for PUT (partial)
+    create_mutator: Optional[Callable[[dict, Session], dict]] = None,
+    update_mutator: Optional[Callable[[Any, dict, Session], dict]] = None,
+    after_commit: Optional[Callable[[Any], None]] = None,   # called with the object after create/update/delete commits
+    reference_key: Optional[str] = None,   # section in services.reference_cache: cached company lists + invalidation on writes
+    enable_list: bool = True,
+    enable_get: bool = True,
+    enable_create: bool = True,
+    enable_update: bool = True,
+    enable_delete: bool = True,
+) -> APIRouter:
+    """
+    `async def` twin of make_crud_router on an AsyncSession, same routes and
+    semantics. Mutators are the existing sync functions: they run through
+    AsyncSession.run_sync, which hands them the underlying sync Session.
+    OutSchema must only read columns: lazy relationship loads are not
+    possible on an AsyncSession.
+    """
+    router = APIRouter(prefix=prefix, tags=[tag])
+
+    if reference_key:
+        def company_filter(company_id: Optional[int] = Query(None, description="Only this company's rows (served from the reference cache)")):
+            return company_id
+    else:
+        def company_filter():
+            return None
+
+    # --- LIST ---
+    if enable_list:
+        @router.get("/", response_model=list[OutSchema])
+        async def list_items(
+            response: Response,
+            db: AsyncSession = Depends(get_async_db),
+            read_db: AsyncSession = Depends(get_async_read_db),
+            page: int = 1,
+            page_size: int = 20,
+            cursor: Optional[str] = Query(None, description="Keyset pagination: pass an empty value for the first page, then the X-Next-Cursor header value"),
+            company_id: Optional[int] = Depends(company_filter),
+        ):
+            if company_id is not None and cursor is None:
+                snapshot = reference_cache.reference_cache.get(company_id)
+                if snapshot is None:
+                    snapshot = await db.run_sync(reference_cache.get_reference_data, company_id)
+                rows = snapshot.sections[reference_key]
+                return rows[(page - 1) * page_size: page * page_size]
+            stmt = select(Model)
+            if company_id is not None:
+                stmt = stmt.where(Model.company_id == company_id)
+            if cursor is not None:
+                # Cursor mode: seek past the last id instead of OFFSET, page is ignored
+                stmt = keyset_query(stmt, [Model.id], cursor, page_size)
+                items, next_cursor = keyset_page((await read_db.scalars(stmt)).all(), [Model.id], page_size)
+                if next_cursor:
+                    response.headers[NEXT_CURSOR_HEADER] = next_cursor
+            else:
+                items = (await read_db.scalars(stmt.offset((page - 1) * page_size).limit(page_size))).all()
+            return [OutSchema.model_validate(x, from_attributes=True) for x in items]
+
+    # --- GET ---
+    if enable_get:
+        @router.get("/{item_id:int}", response_model=OutSchema)
+        async def get_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+            obj = await db.get(Model, item_id)
+            if not obj:
+                raise HTTPException(404, f"{Model.__name__} not found")
+            return OutSchema.model_validate(obj, from_attributes=True)
+
+    # --- CREATE ---
+    if enable_create:
+        _CreateSchema = CreateSchema or InSchema
+
+        @router.post("/", response_model=OutSchema)
+        async def create_item(payload: _CreateSchema, db: AsyncSession = Depends(get_async_db)):
+            data = payload.model_dump()
+
+            if create_mutator:
+                result = await db.run_sync(lambda session: create_mutator(data, session))
+
+                # Allow returning existing model instance
+                if isinstance(result, Model):
+                    return OutSchema.model_validate(result, from_attributes=True)
+
+                data = result
+
+            obj = Model(**data)
+            db.add(obj)
+            await db.commit()
+            await db.refresh(obj)
+            if reference_key:
+                reference_cache.invalidate_for(obj)
+            if after_commit:
+                after_commit(obj)
+            return OutSchema.model_validate(obj, from_attributes=True)
+
+    # --- UPDATE ---
+    if enable_update:
+        _UpdateSchema = UpdateSchema or InSchema
+        @router.put("/{item_id:int}", response_model=OutSchema)
+        async def update_item(item_id: int, payload: _UpdateSchema, db: AsyncSession = Depends(get_async_db)):
+            obj = await db.get(Model, item_id)
+            if not obj:
+                raise HTTPException(404, f"{Model.__name__} not found")
+            data = payload.model_dump(exclude_unset=True)  # only update provided fields
+            if update_mutator:
+                data = await db.run_sync(lambda session: update_mutator(obj, data, session))
+            previous_company_id = getattr(obj, "company_id", None)
+            for k, v in data.items():
+                setattr(obj, k, v)
+            await db.commit(); await db.refresh(obj)
+            if reference_key:
+                reference_cache.invalidate_for(obj)
+                if previous_company_id != obj.company_id:
+                    reference_cache.reference_cache.invalidate(previous_company_id)
+            if after_commit:
+                after_commit(obj)
+            return OutSchema.model_validate(obj, from_attributes=True)
+
+    # --- DELETE ---
+    if enable_delete:
+        @router.delete("/{item_id:int}", status_code=204)
+        async def delete_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+            obj = await db.get(Model, item_id)
+            if not obj:
+                raise HTTPException(404, f"{Model.__name__} not found")
+            await db.delete(obj); await db.commit()
+            if reference_key:
+                reference_cache.invalidate_for(obj)
+            if after_commit:
+                after_commit(obj)
+            return
+
+    return router
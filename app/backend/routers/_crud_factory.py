@@ -1,9 +1,11 @@
 # app/routers/_crud_factory.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, DeclarativeMeta
 from typing import Type, Optional, Callable, Any
 
-from ..deps import get_db, require_role
+from ..deps import get_db, get_read_db, require_role
+from ..services import reference_cache
+from ..utils.pagination import keyset_paginate, NEXT_CURSOR_HEADER
 
 def make_crud_router(
     *,
@@ -16,6 +18,8 @@ def make_crud_router(
     UpdateSchema: Optional[Type[Any]] = None,   # schema for PUT (partial)
     create_mutator: Optional[Callable[[dict, Session], dict]] = None,
     update_mutator: Optional[Callable[[Any, dict, Session], dict]] = None,
+    after_commit: Optional[Callable[[Any], None]] = None,   # called with the object after create/update/delete commits
+    reference_key: Optional[str] = None,   # section in services.reference_cache: cached company lists + invalidation on writes
     list_roles: Optional[list[str]] = None,
     read_roles: Optional[list[str]] = None,
     write_roles: Optional[list[str]] = None,
@@ -27,12 +31,41 @@ def make_crud_router(
 ) -> APIRouter:
     router = APIRouter(prefix=prefix, tags=[tag])
 
+    if reference_key:
+        def company_filter(company_id: Optional[int] = Query(None, description="Only this company's rows (served from the reference cache)")):
+            return company_id
+    else:
+        def company_filter():
+            return None
+
     # --- LIST ---
     if enable_list:
         @router.get("/", response_model=list[OutSchema])
-        def list_items(db: Session = Depends(get_db), page: int = 1, page_size: int = 20):
-            q = db.query(Model).offset((page - 1) * page_size).limit(page_size)
-            return [OutSchema.model_validate(x, from_attributes=True) for x in q.all()]
+        def list_items(
+            response: Response,
+            db: Session = Depends(get_db),
+            read_db: Session = Depends(get_read_db),
+            page: int = 1,
+            page_size: int = 20,
+            cursor: Optional[str] = Query(None, description="Keyset pagination: pass an empty value for the first page, then the X-Next-Cursor header value"),
+            company_id: Optional[int] = Depends(company_filter),
+        ):
+            if company_id is not None and cursor is None:
+                # Reference data: page through the cached snapshot, ordered by id like the DB path
+                rows = reference_cache.get_reference_data(db, company_id).sections[reference_key]
+                return rows[(page - 1) * page_size: page * page_size]
+            # Plain listing can lag slightly on a replica; the cache above always loads from the primary
+            query = read_db.query(Model)
+            if company_id is not None:
+                query = query.filter(Model.company_id == company_id)
+            if cursor is not None:
+                # Cursor mode: seek past the last id instead of OFFSET, page is ignored
+                items, next_cursor = keyset_paginate(query, [Model.id], cursor, page_size)
+                if next_cursor:
+                    response.headers[NEXT_CURSOR_HEADER] = next_cursor
+            else:
+                items = query.offset((page - 1) * page_size).limit(page_size).all()
+            return [OutSchema.model_validate(x, from_attributes=True) for x in items]
 
     # --- GET ---
     if enable_get:
@@ -64,6 +97,10 @@ def make_crud_router(
             db.add(obj)
             db.commit()
             db.refresh(obj)
+            if reference_key:
+                reference_cache.invalidate_for(obj)
+            if after_commit:
+                after_commit(obj)
             return obj
 
     # --- UPDATE ---
@@ -77,9 +114,16 @@ def make_crud_router(
             data = payload.model_dump(exclude_unset=True)  # only update provided fields
             if update_mutator:
                 data = update_mutator(obj, data, db)
+            previous_company_id = getattr(obj, "company_id", None)
             for k, v in data.items():
                 setattr(obj, k, v)
             db.commit(); db.refresh(obj)
+            if reference_key:
+                reference_cache.invalidate_for(obj)
+                if previous_company_id != obj.company_id:
+                    reference_cache.reference_cache.invalidate(previous_company_id)
+            if after_commit:
+                after_commit(obj)
             return obj
 
     # --- DELETE ---
@@ -90,6 +134,10 @@ def make_crud_router(
             if not obj:
                 raise HTTPException(404, f"{Model.__name__} not found")
             db.delete(obj); db.commit()
+            if reference_key:
+                reference_cache.invalidate_for(obj)
+            if after_commit:
+                after_commit(obj)
             return
 
     return router
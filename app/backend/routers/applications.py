@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, desc
+from sqlalchemy import or_, desc, select, func
 from typing import Optional, List
 from datetime import datetime
 from datetime import timedelta
 from ._crud_factory import make_crud_router
 from .. import models, schemas
-from ..deps import get_db, get_current_user, require_role
+from ..services import application_projection, application_search
+from ..deps import get_db, get_read_db, get_current_user, require_role
+from ..security.principals import Principal
+from ..utils.pagination import keyset_paginate, NEXT_CURSOR_HEADER
+from ..sql_inspection import query_budget
 
 # For now hardcode security id to 14
 SECURITY_USER_ID = 14
@@ -45,6 +49,7 @@ def create_application(
         obj.safety_equipment = equipment
 
     db.add(obj)
+    db.flush()
     db.commit()
     db.refresh(obj)
 
@@ -59,7 +64,7 @@ def update_application(
     item_id: int,
     payload: schemas.ApplicationUpdate,
     db: Session = Depends(get_db),
-    me: models.User = Depends(get_current_user),
+    me: Principal = Depends(get_current_user),
 ):
     """
     Specialised update an existing application.
@@ -93,6 +98,7 @@ def update_application(
 
     obj.updated_time = datetime.utcnow()
     obj.updated_by = payload.applicant_id
+    db.flush()
     db.commit()
     db.refresh(obj)
 
@@ -102,22 +108,28 @@ def update_application(
 
 
 # Filter Endpoint for Optimized Fetching
-@router.get("/filter", response_model=List[schemas.ApplicationOut])
+@router.get("/filter", response_model=List[schemas.ApplicationOut], response_model_exclude_unset=True)
+@query_budget(11)  # ids + applications + one batch per relationship
 def filter_applications(
+    response: Response,
     applicant_id: Optional[int] = Query(None, description="Filter by applicant_id"),
     company_id: Optional[int] = Query(None, description="Filter by company_id"),
     workflow_data_id: Optional[int] = Query(None, description="Filter by workflow_data_id"),
     q: Optional[str] = Query(None, description="Search by name"),
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Keyset pagination: pass an empty value for the first page, then the X-Next-Cursor header value"),
+    fields: Optional[str] = Query(None, description="'summary' or comma-separated relationships to include; full graph when omitted"),
+    db: Session = Depends(get_read_db),
 ):
     """
     Optimized backend-side filtering for application list.
     This lets the frontend load only relevant permits instead of fetching everything.
     """
+    relations = application_projection.parse_fields(fields)
 
-    query = db.query(models.Application)
+    # Only select the sort key here; the payload is built by the projection layer
+    query = db.query(models.Application.id, models.Application.created_time)
 
     # Simple filters
     if applicant_id:
@@ -130,29 +142,31 @@ def filter_applications(
     if q:
         query = query.filter(models.Application.name.ilike(f"%{q}%"))
 
-    # Sort by created_time descending
-    query = query.order_by(desc(models.Application.created_time))
-
-    # Eager-load related models to avoid N+1 queries (optional but faster)
-    query = query.options(
-        joinedload(models.Application.document),
-        joinedload(models.Application.location),
-        joinedload(models.Application.permit_type),
-        joinedload(models.Application.workflow_data).joinedload(models.WorkflowData.approval_data),
-        joinedload(models.Application.workflow_data).joinedload(models.WorkflowData.workflow).joinedload(models.Workflow.approvals),
-        joinedload(models.Application.workers),
-        joinedload(models.Application.safety_equipment),
-    )
+    if cursor is not None:
+        # Cursor mode: seek on (created_time, id) instead of OFFSET, skip is ignored
+        rows, next_cursor = keyset_paginate(
+            query, [models.Application.created_time, models.Application.id], cursor, limit, descending=True
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    else:
+        # Sort by created_time descending
+        query = query.order_by(desc(models.Application.created_time), desc(models.Application.id))
+        rows = query.offset(skip).limit(limit).all()
 
-    return query.offset(skip).limit(limit).all()
+    return application_projection.project_applications(db, [r.id for r in rows], relations)
 
-@router.get("/for-approver", response_model=List[schemas.ApplicationOut])
+@router.get("/for-approver", response_model=List[schemas.ApplicationOut], response_model_exclude_unset=True)
+@query_budget(12)  # filter's budget + the user check
 def get_applications_for_approver(
+    response: Response,
     user_id: int = Query(..., description="Filter applications for a specific approver by their user ID."),
     q: Optional[str] = Query(None, description="Search by name"),
     skip: int = 0,
     limit: int = 20,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Keyset pagination: pass an empty value for the first page, then the X-Next-Cursor header value"),
+    fields: Optional[str] = Query(None, description="'summary' or comma-separated relationships to include; full graph when omitted"),
+    db: Session = Depends(get_read_db),
 ):
     """
     Fetches applications where a specific user is a designated approver
@@ -161,38 +175,75 @@ def get_applications_for_approver(
     This is more efficient than fetching all applications and filtering on the client,
     as it performs a targeted query on the database.
     """
+    relations = application_projection.parse_fields(fields)
+
     # Check if user exists
     user = db.get(models.User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail=f"User with ID {user_id} not found")
 
-    # Build the query to find applications where the user is an approver.
-    query = db.query(models.Application).join(
-        models.Application.workflow_data
-    ).join(
-        models.WorkflowData.workflow
-    ).join(
-        models.Workflow.approvals
-    ).filter(
-        models.Approval.user_id == user_id
+    # Workflow data whose workflow has this user as an approver. A semi-join
+    # keeps one row per application, so no DISTINCT is needed.
+    approver_workflow_data = (
+        select(models.WorkflowData.id)
+        .join(models.Approval, models.Approval.workflow_id == models.WorkflowData.workflow_id)
+        .where(models.Approval.user_id == user_id)
+    )
+    query = db.query(models.Application.id, models.Application.created_time).filter(
+        models.Application.workflow_data_id.in_(approver_workflow_data)
     )
 
     if q:
         query = query.filter(models.Application.name.ilike(f"%{q}%"))
 
-    query = query.options(
-        # Eager-load all necessary relationships for the response schema to avoid N+1 queries.
-        joinedload(models.Application.document),
-        joinedload(models.Application.location),
-        joinedload(models.Application.permit_type),
-        joinedload(models.Application.applicant),
-        joinedload(models.Application.workers),
-        joinedload(models.Application.safety_equipment),
-        joinedload(models.Application.workflow_data).joinedload(models.WorkflowData.approval_data),
-        joinedload(models.Application.workflow_data).joinedload(models.WorkflowData.workflow).joinedload(models.Workflow.approvals),
-    ).distinct().order_by(desc(models.Application.created_time))
-
-    return query.offset(skip).limit(limit).all()
+    if cursor is not None:
+        rows, next_cursor = keyset_paginate(
+            query, [models.Application.created_time, models.Application.id], cursor, limit, descending=True
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    else:
+        query = query.order_by(desc(models.Application.created_time), desc(models.Application.id))
+        rows = query.offset(skip).limit(limit).all()
+
+    return application_projection.project_applications(db, [r.id for r in rows], relations)
+
+
+@router.get("/search", response_model=List[schemas.ApplicationOut], response_model_exclude_unset=True)
+@query_budget(11)
+def search_applications(
+    q: str = Query(..., min_length=1, description="Words to search; each word matches as a prefix"),
+    applicant_id: Optional[int] = Query(None, description="Restrict to one applicant"),
+    status: Optional[str] = Query(None, description="Restrict to one status"),
+    skip: int = 0,
+    limit: int = 20,
+    fields: Optional[str] = Query(None, description="'summary' or comma-separated relationships to include; full graph when omitted"),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Ranked full-text search over application name, location, permit type,
+    applicant and worker names, backed by the search_vector GIN index.
+    """
+    relations = application_projection.parse_fields(fields)
+
+    ts_query = application_search.tsquery(q)
+    if ts_query is None:
+        return []
+
+    query = db.query(models.Application.id).filter(models.Application.search_vector.op("@@")(ts_query))
+    if applicant_id:
+        query = query.filter(models.Application.applicant_id == applicant_id)
+    if status:
+        query = query.filter(models.Application.status == status)
+
+    rank = func.ts_rank_cd(models.Application.search_vector, ts_query)
+    rows = (
+        query.order_by(rank.desc(), desc(models.Application.created_time), desc(models.Application.id))
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return application_projection.project_applications(db, [r.id for r in rows], relations)
 
 
 @router.post("/{app_id}/security-confirm-entry")
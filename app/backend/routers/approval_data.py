@@ -1,15 +1,14 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
-import asyncio
 from typing import Optional, List
 from datetime import datetime
 
 from ._crud_factory import make_crud_router
-from ..deps import get_db, get_current_user
+from ..deps import get_db, get_read_db, get_current_user
 from .. import models, schemas
-from ..utils.email import send_notification_email
+from ..services.approval_flow import apply_approval_decision
 
-from ..config import settings
+from ..sql_inspection import query_budget
 
 # Create the base router
 router = APIRouter(
@@ -32,11 +31,12 @@ def create_approval_data(payload: schemas.ApprovalDataIn, db: Session = Depends(
     return obj
 
 @router.get("/filter", response_model=List[schemas.ApprovalDataOut])
+@query_budget(1)
 def filter_approval_data(
     workflow_data_id: Optional[int] = Query(None, description="Filter by workflow_data_id"),
     approval_id: Optional[int] = Query(None, description="Filter by approval_id"),
     status: Optional[str] = Query(None, description="Filter by status"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Filter approval data records by workflow_data_id, approval_id, or status.
@@ -94,165 +94,16 @@ def create_completion_flow(
     return [job_done_data]
 
 
-def _send_notification(db: Session, user_id: int, title: str, message: str):
-    """
-    Helper to create a notification record and send an email synchronously.
-    """
-    # Create Notification in DB
-    db_notification = models.Notification(
-        user_id=user_id,
-        title=title,
-        message=message
-    )
-    db.add(db_notification)
-    db.commit()
-    db.refresh(db_notification)
-
-    # Fetch User Email
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-
-    # Send Email
-    if user and user.email:
-        try:
-            asyncio.run(send_notification_email(
-                subject=title,
-                recipients=[user.email],
-                body=message
-            ))
-        except Exception as e:
-            print(f"Failed to send email to {user.email}: {e}")
-
 def approval_data_update_mutator(obj: models.ApprovalData, data: dict, db: Session):
     """
     Runs before saving during PUT update.
-    Handles approval workflow logic:
+    Handles approval workflow logic through the approval state machine:
     - Promotes next level if current level approved
     - Updates Application status to APPROVED if all approvers approved
     - Updates Application status to REJECTED if any approver rejects
+    Nothing is committed here; update_item persists it all in one commit.
     """
-    new_status = data.get("status")
-    new_remarks = data.get("remarks")
-    approver_name = data.get("approver_name", "System")
-
-    # Update the ApprovalData object itself
-    if new_status in {"APPROVED", "REJECTED"} and obj.status != new_status:
-        obj.status = new_status
-        obj.time = datetime.utcnow()
-        if new_remarks is not None:
-            obj.remarks = new_remarks
-        db.flush()
-
-    # Eagerly load the application to get its details for notifications
-    application = db.query(models.Application).filter(
-        models.Application.workflow_data_id == obj.workflow_data_id
-    ).first()
-
-    # Fetch all approval data for this workflow
-    all_approval_data = db.query(models.ApprovalData).filter(
-        models.ApprovalData.workflow_data_id == obj.workflow_data_id
-    ).all()
-
-    # If any approver rejected, set application status to REJECTED
-    if any(a.status == "REJECTED" for a in all_approval_data):
-        if application and application.status != "REJECTED":
-            application.status = "REJECTED"
-            application.updated_time = datetime.utcnow()
-            db.commit()
-            print(f"Application {application.id} rejected due to an approver rejection!")
-
-            # Notify Applicant of Rejection
-            if application.applicant_id:
-                title = f"Permit Application Rejected: {application.name}"
-                message = f"""
-                    <p>DO NOT REPLY TO THIS EMAIL.</p>
-                    <p>Your permit application <strong>{application.name}</strong> has been <strong>REJECTED</strong>.</p>
-                    <p>
-                        <strong>Approver:</strong> {approver_name}<br/>
-                        <strong>Remarks:</strong> {new_remarks or "N/A"}
-                    </p>
-                    <p>Please check the app for more details.</p>
-                """
-                _send_notification(db, user_id=application.applicant_id, title=title, message=message)
-        return data
-
-    # Only run next-level promotion if current approval is APPROVED
-    if new_status == "APPROVED":
-        # Promote next level if exists
-        next_level = db.query(models.ApprovalData).filter(
-            models.ApprovalData.workflow_data_id == obj.workflow_data_id,
-            models.ApprovalData.level == obj.level + 1
-        ).first()
-
-        if next_level and next_level.status == "WAITING":
-            next_level.status = "PENDING"
-            db.flush()
-
-            # Notify Next Approver
-            next_approver_user_id = next_level.approval.user_id
-            if next_approver_user_id:
-                title = f"Permit Pending Approval: {application.name}"
-                message = f"""
-                    <p>DO NOT REPLY TO THIS EMAIL.</p>
-                    <p>A permit application, <strong>{application.name}</strong>, requires your approval.</p>
-                    <p>Please log in to the application to review and take action.</p>
-                """
-                _send_notification(db, user_id=next_approver_user_id, title=title, message=message)
-
-        # If all approvals are approved, update the application status
-        permit_approved_approvals = [a for a in all_approval_data if a.level < settings.SECURITY_ENTER_LEVEL]
-
-        if all(a.status == "APPROVED" for a in permit_approved_approvals):
-            if application and application.status != "APPROVED":
-                application.status = "APPROVED"
-                application.updated_time = datetime.utcnow()
-                db.commit()
-
-                # Notify Applicant of Final Approval
-                if application.applicant_id:
-                    title = f"Permit Application Approved: {application.name}"
-                    message = f"""
-                        <p>DO NOT REPLY TO THIS EMAIL.</p>
-                        <p>Congratulations! Your permit application <strong>{application.name}</strong> has been fully <strong>APPROVED</strong>.</p>
-                        <p>Please check the app for more details.</p>
-                    """
-                    _send_notification(db, user_id=application.applicant_id, title=title, message=message)
-    
-            # Promote security level 50 from WAITING -> PENDING
-            security_approval = db.query(models.ApprovalData).filter(
-                models.ApprovalData.workflow_data_id == obj.workflow_data_id,
-                models.ApprovalData.level == settings.SECURITY_ENTER_LEVEL
-            ).first()
-            if security_approval and security_approval.status == "WAITING":
-                security_approval.status = "PENDING"
-                db.flush()
-        
-        # Level 50 -> Security confirms entry -> set permit status to ACTIVE
-        if obj.level == settings.SECURITY_ENTER_LEVEL and application:
-            application.status = "ACTIVE"
-            application.updated_time = datetime.utcnow()
-            db.commit()
-
-        # Level 98 -> Supervisor Confirm Job Done -> Custom logic for completion flow
-        if obj.level == settings.CLOSING_FLOW_LEVEL and application:
-            application.status = "EXIT_PENDING"
-            application.updated_time = datetime.utcnow()
-            db.commit()
-
-            # Promote level 99 -> Security Confirm Exit
-            security_exit = db.query(models.ApprovalData).filter(
-                models.ApprovalData.workflow_data_id == obj.workflow_data_id,
-                models.ApprovalData.level == settings.SECURITY_EXIT_LEVEL
-            ).first()
-            if security_exit and security_exit.status == "WAITING":
-                security_exit.status = "PENDING"
-                db.flush()
-
-        # Level 99 -> Security confirms exit -> COMPLETED
-        if obj.level == settings.SECURITY_EXIT_LEVEL and application:
-            application.status = "COMPLETED"
-            application.updated_time = datetime.utcnow()
-            db.commit()
-
+    apply_approval_decision(db, obj, data)
     return data
 
 
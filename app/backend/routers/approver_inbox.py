@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from .. import schemas
+from ..deps import get_db, get_current_user
+from ..security.principals import Principal
+from ..services.approver_inbox import inbox_for_user
+from ..sql_inspection import query_budget
+
+router = APIRouter(prefix="/approver-inbox", tags=["Approver Inbox"])
+
+@router.get("", response_model=schemas.ApproverInboxOut)
+@query_budget(4)  # 2 for a principal cache miss + counts + items
+def get_approver_inbox(
+    user_id: Optional[int] = Query(None, description="Approver; defaults to the current user"),
+    stage: Optional[str] = Query(None, description="Only items of this stage (APPROVAL, SECURITY_ENTRY, JOB_DONE, SECURITY_EXIT)"),
+    limit: int = Query(50, le=500),
+    db: Session = Depends(get_db),
+    me: Principal = Depends(get_current_user),
+):
+    """
+    Approval steps waiting on an approver, newest first, with counts per stage.
+    """
+    return inbox_for_user(db, user_id or me.id, stage, limit)
@@ -1,13 +1,15 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
 
 from .. import models, schemas
-from ..deps import get_db, get_current_user
+from ..deps import get_async_db, get_db, get_current_user
 from ..security import hashing, token
+from ..security.principals import Principal, invalidate_user
 from ..config import settings
 
 from ..utils import roles  # import helper
@@ -17,16 +19,20 @@ CONTRACTOR_GROUP_ID = 4 # Assuming 4 is the ID for 'Contractor' group
 # Create the base router
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# The password endpoints are async: bcrypt runs on the hashing pool and is
+# awaited, so a login burst holds no request threads.
 @router.post("/login", response_model=schemas.TokenOut)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # print (form_data)
     # OAuth2PasswordRequestForm has .username and .password
-    user = db.query(models.User).filter(
-        func.lower(models.User.email) == form_data.username.lower()
-    ).first()
+    user = await db.scalar(
+        select(models.User)
+        .where(func.lower(models.User.email) == form_data.username.lower())
+        .limit(1)
+    )
 
     if not user:
         raise HTTPException(
@@ -34,7 +40,7 @@ def login(
             detail="Invalid credentials",
         )
 
-    if not user.password_hash or not hashing.Hash.verify(user.password_hash, form_data.password):
+    if not user.password_hash or not await hashing.hash_pool.verify_async(user.password_hash, form_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
@@ -48,34 +54,35 @@ def login(
     return schemas.TokenOut(access_token=access_token, token_type="bearer")
 
 @router.post("/register")
-def create(request: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create(request: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     try:
         new_user = models.User(company_id=request.company_id,
                                name=request.name,
                                email=request.email,
                                user_type=request.user_type,
-                               password_hash=hashing.Hash.make(request.password))
+                               password_hash=await hashing.hash_pool.make_async(request.password))
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
+        invalidate_user(new_user.id)
         return new_user
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered or invalid Company ID.")
 
 @router.post("/register-applicant")
-def register_applicant(request: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_applicant(request: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     try:
         new_user = models.User(
             company_id=request.company_id,
             name=request.name,
             email=request.email,
             user_type=request.user_type,
-            password_hash=hashing.Hash.make(request.password),
+            password_hash=await hashing.hash_pool.make_async(request.password),
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
 
         # Assign default group (Contractor)
         user_group = models.UserGroup(
@@ -83,8 +90,9 @@ def register_applicant(request: schemas.UserCreate, db: Session = Depends(get_db
             group_id=CONTRACTOR_GROUP_ID,
         )
         db.add(user_group)
-        db.commit()
-        db.refresh(user_group)
+        await db.commit()
+        await db.refresh(user_group)
+        invalidate_user(new_user.id)
 
         return {
             "user": new_user,
@@ -92,7 +100,7 @@ def register_applicant(request: schemas.UserCreate, db: Session = Depends(get_db
             "message": "User registered successfully as Contractor.",
         }
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Registration failed. Email already exists, or invalid Group/Company ID."
@@ -101,7 +109,7 @@ def register_applicant(request: schemas.UserCreate, db: Session = Depends(get_db
 
 @router.get("/me")
 def get_me(
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     # Query user’s groups with join
@@ -125,7 +133,7 @@ def get_me(
         "email": current_user.email,
         "name": current_user.name,
         "company_id": current_user.company_id,
-        "company_name": current_user.company.name if current_user.company else None,
+        "company_name": current_user.company_name,
         "user_type": current_user.user_type,
         "groups": [{"id": gid, "name": gname} for gid, gname in zip(group_ids, group_names)],
         "is_approver": is_approver,
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from .. import schemas
+from ..deps import get_db, get_current_user
+from ..security.principals import Principal
+from ..services.reference_cache import get_reference_data
+from ..sql_inspection import query_budget
+
+router = APIRouter(prefix="/bootstrap", tags=["Bootstrap"])
+
+@router.get("", response_model=schemas.BootstrapOut)
+@query_budget(7)  # principal miss + one query per reference section
+def bootstrap(
+    request: Request,
+    company_id: Optional[int] = Query(None, description="Defaults to the current user's company"),
+    db: Session = Depends(get_db),
+    me: Principal = Depends(get_current_user),
+):
+    """
+    Permit types, groups, locations, safety equipment and departments of a
+    company in one payload, served from the reference cache. Send the ETag
+    back in If-None-Match to get a 304 when nothing changed.
+    """
+    snapshot = get_reference_data(db, company_id or me.company_id)
+    headers = {"ETag": snapshot.etag, "Cache-Control": "private, no-cache"}
+    if snapshot.etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    # Pre-serialized when the snapshot was loaded
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
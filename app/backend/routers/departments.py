@@ -10,7 +10,8 @@ crud_router = make_crud_router(
     OutSchema=schemas.DepartmentOut,
     UpdateSchema=schemas.DepartmentUpdate,
     prefix="",
-    tag="Departments"
+    tag="Departments",
+    reference_key="departments",
 )
 
 router.include_router(crud_router)
\ No newline at end of file
@@ -1,138 +1,131 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form, Request
 from sqlalchemy.orm import Session
-import os, shutil, mimetypes, uuid
-from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+import os, mimetypes, uuid
 
 from ._crud_factory import make_crud_router
 from .. import models, schemas
 from ..deps import get_db
-
-UPLOAD_DIR = "/app/ptw-uploads"
+from ..services import document_store
+from ..utils.file_responses import conditional_file_response, CACHE_IMMUTABLE, CACHE_REVALIDATE
+from ..utils.uploads import stream_upload, max_bytes_for
 
 # Create the base router
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
+ALLOWED_CONTENT_TYPES = {
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  # .docx
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",        # .xlsx
+    "application/vnd.ms-excel",                                                # .xls
+    "text/csv",                                                                # .csv
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",# .pptx
+    "image/jpeg",
+    "image/png",
+}
+
+def _save_document_record(db: Session, company_id: int, name: str, stored, ext: str) -> models.Document:
+    path = document_store.acquire_blob(db, stored.sha256, stored.size, stored.path, ext)
+    return document_store.create_document(db, company_id, name, path, stored.sha256)
+
 @router.post("/upload", response_model=schemas.DocumentOut)
-def upload_document(
+async def upload_document(
     company_id: int = Form(...),
     name: str = Form(...),
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
 ):
     """
-    Upload a document and store it in /uploads/<year>/<month>/.
+    Upload a document. The file is streamed to disk in chunks, size-limited per
+    content type, and stored once per distinct content (SHA-256).
     """
-
-    allowed = {
-        "application/pdf",
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",  # .docx
-        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",        # .xlsx
-        "application/vnd.ms-excel",                                                # .xls
-        "text/csv",                                                                # .csv
-        "application/vnd.openxmlformats-officedocument.presentationml.presentation",# .pptx
-        "image/jpeg",
-        "image/png",
-    }
-
-    if file.content_type not in allowed:
+    if file.content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(400, detail=f"Unsupported file type: {file.content_type}")
 
-    # Build year/month path
-    now = datetime.utcnow()
-    year = now.strftime("%Y")
-    month = now.strftime("%m")
-
-    base_upload_dir = UPLOAD_DIR
-    target_dir = os.path.join(base_upload_dir, year, month)
-
-    os.makedirs(target_dir, exist_ok=True)
+    _, ext = os.path.splitext(file.filename or "")
+    ext = "".join(c for c in ext if c.isalnum() or c == ".")
 
-    # Create safe + unique filename
-    base, ext = os.path.splitext(file.filename)
-    safe_base = "".join(c for c in base if c.isalnum() or c in (" ", "_", "-")).rstrip()
-
-    unique_id = uuid.uuid4().hex[:8]
-    timestamp = now.strftime("%Y%m%d%H%M%S")
-    unique_filename = f"{timestamp}_{unique_id}_{safe_base}{ext}"
-
-    full_path = os.path.join(target_dir, unique_filename)
-
-    # Write the file
-    with open(full_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    # Save DB record
-    doc = models.Document(
-        company_id=company_id,
-        name=name,
-        path=full_path,
-        time=now,
+    # Write the file (chunked, hashed, atomically renamed into place)
+    stored = await stream_upload(
+        file, document_store.INCOMING_DIR, f"{uuid.uuid4().hex}.part", max_bytes_for(file.content_type)
     )
 
-    db.add(doc)
-    db.commit()
-    db.refresh(doc)
-
-    return doc
+    # Save DB record, sharing the stored file if this content is already known
+    try:
+        return await run_in_threadpool(_save_document_record, db, company_id, name, stored, ext)
+    finally:
+        if os.path.exists(stored.path):
+            os.remove(stored.path)
 
-@router.get("/{doc_id}/download")
-def download_document(doc_id: int, db: Session = Depends(get_db)):
+@router.post("/from-hash", response_model=schemas.DocumentOut, status_code=201)
+def create_document_from_hash(payload: schemas.DocumentFromHashIn, db: Session = Depends(get_db)):
     """
-    Download a document from the server by its ID.
+    Create a document from content the company has already uploaded, without
+    sending the file again. Returns 404 when the hash is unknown; upload instead.
     """
-    doc = db.get(models.Document, doc_id)
-    if not doc:
-        raise HTTPException(404, "Document not found")
-    if not os.path.exists(doc.path):
-        raise HTTPException(410, "File missing on server")
-    ctype = mimetypes.guess_type(doc.path)[0] or "application/octet-stream"
-
-    # Ensure the filename for download has the correct extension
-    download_name = doc.name
+    blob = document_store.reference_existing_blob(db, payload.sha256, payload.company_id)
+    if not blob:
+        raise HTTPException(404, "No stored file with this hash")
+    return document_store.create_document(db, payload.company_id, payload.name, blob.path, blob.sha256)
+
+def _display_name(doc: models.Document) -> str:
+    # Ensure the filename has the correct extension
+    name = doc.name
     _, stored_ext = os.path.splitext(doc.path)
     # If the display name doesn't have an extension, append the one from the stored file
-    if stored_ext and not download_name.lower().endswith(stored_ext.lower()):
-        download_name += stored_ext
-
-    return FileResponse(path=doc.path, media_type=ctype, filename=download_name)
-
-@router.get("/{doc_id}/view")
-def view_document(doc_id: int, db: Session = Depends(get_db)):
-    doc = db.get(models.Document, doc_id)
+    if stored_ext and not name.lower().endswith(stored_ext.lower()):
+        name += stored_ext
+    return name
+
+def _load_file_info(db: Session, doc_id: int):
+    # Only the columns needed to serve the file
+    doc = (
+        db.query(models.Document.name, models.Document.path, models.Document.sha256)
+        .filter(models.Document.id == doc_id)
+        .first()
+    )
     if not doc:
         raise HTTPException(404, "Document not found")
+    return doc
 
-    if not os.path.exists(doc.path):
-        raise HTTPException(410, "File missing")
-
+def _serve_document(request: Request, doc, inline: bool):
     ctype = mimetypes.guess_type(doc.path)[0] or "application/octet-stream"
-    filename = os.path.basename(doc.path)
-
-    return FileResponse(
-        path=doc.path,
-        media_type=ctype,
-        filename=filename,
-        headers={
-            # CRITICAL for Android intents
-            "Content-Disposition": f'inline; filename="{filename}"'
-        }
-    )
+    try:
+        return conditional_file_response(
+            request,
+            doc.path,
+            media_type=ctype,
+            filename=_display_name(doc),
+            inline=inline,
+            content_hash=doc.sha256,
+            # Hashed files never change; legacy files are revalidated by mtime+size
+            cache_control=CACHE_IMMUTABLE if doc.sha256 else CACHE_REVALIDATE,
+        )
+    except FileNotFoundError:
+        raise HTTPException(410, "File missing on server")
+
+@router.get("/{doc_id}/download")
+def download_document(doc_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Download a document from the server by its ID.
+    Supports ETag / If-Modified-Since revalidation and byte ranges.
+    """
+    return _serve_document(request, _load_file_info(db, doc_id), inline=False)
+
+@router.get("/{doc_id}/view")
+def view_document(doc_id: int, request: Request, db: Session = Depends(get_db)):
+    # Content-Disposition inline is CRITICAL for Android intents
+    return _serve_document(request, _load_file_info(db, doc_id), inline=True)
 
 @router.delete("/{doc_id}", status_code=204)
 def delete_document(doc_id: int, db: Session = Depends(get_db)):
     """
-    Delete a document record and its file from the server.
+    Delete a document record; its file is removed once no other document shares it.
     """
     doc = db.get(models.Document, doc_id)
     if not doc:
         raise HTTPException(404, "Document not found")
-    try:
-        if doc.path and os.path.exists(doc.path):
-            os.remove(doc.path)
-    except Exception:
-        pass
-    db.delete(doc); db.commit()
+    document_store.delete_document(db, doc)
     return
 
 # Attach the CRUD routes, GET/POST/PUT/DELETE
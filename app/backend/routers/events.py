@@ -0,0 +1,98 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+from ..database import SessionLocal
+from ..deps import principal_from_token
+from ..security.principals import Principal
+from ..services.events import bus
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+
+def _authenticate(token: Optional[str]) -> Optional[Principal]:
+    if not token:
+        return None
+    db = SessionLocal()
+    try:
+        return principal_from_token(db, token)
+    finally:
+        db.close()
+
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """
+    Push channel for the current user: approval steps waiting on them,
+    status changes of their applications and new notifications.
+    Browsers can't set headers on WebSockets, so the JWT comes as ?token=.
+    """
+    user = await run_in_threadpool(_authenticate, token)
+    if not user:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    queue = bus.subscribe(user.id)
+
+    async def pump():
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                message = {"type": "ping"}
+            await websocket.send_json(message)
+
+    async def drain():
+        # Client messages are ignored; this only notices the disconnect
+        while True:
+            await websocket.receive_text()
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(drain())]
+    try:
+        # Ends when the client disconnects (drain) or a send fails (pump)
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        bus.unsubscribe(user.id, queue)
+
+
+@router.get("/stream")
+async def events_stream(request: Request, token: Optional[str] = Query(None, description="JWT, for EventSource clients that can't send headers")):
+    """
+    Server-Sent Events fallback for the same events as /events/ws.
+    Accepts the JWT in the Authorization header or as ?token=.
+    """
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        token = auth[7:]
+    user = await run_in_threadpool(_authenticate, token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+
+    queue = bus.subscribe(user.id)
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message, separators=(',', ':'))}\n\n"
+        finally:
+            bus.unsubscribe(user.id, queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
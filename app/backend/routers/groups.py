@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from ..deps import get_db
+from ..services.reference_cache import get_reference_data
 
 from ._crud_factory import make_crud_router
 from .. import models, schemas
@@ -16,9 +17,15 @@ def group_options(
     page_size: int = 50,
     db: Session = Depends(get_db),
 ):
-    query = db.query(models.Group)
     if company_id:
-        query = query.filter(models.Group.company_id == company_id)
+        # Filter and page the cached list in memory
+        options = get_reference_data(db, company_id).options("groups")
+        if q and q.strip():
+            needle = q.strip().lower()
+            options = [o for o in options if needle in o["label"].lower()]
+        return options[(page - 1) * page_size: page * page_size]
+
+    query = db.query(models.Group)
     if q:
         like = f"%{q.strip()}%"
         query = query.filter(models.Group.name.ilike(like))
@@ -37,6 +44,7 @@ crud_router = make_crud_router(
     prefix="",
     tag="Groups",
     write_roles=["admin"],
+    reference_key="groups",
 )
 
 router.include_router(crud_router)
\ No newline at end of file
@@ -8,4 +8,5 @@ crud_router = make_crud_router(
     prefix="/locations",
     tag="Locations",
     write_roles=["admin"],
+    reference_key="locations",
 )
@@ -1,27 +1,127 @@
-from fastapi import APIRouter, Depends, Query, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, Query, BackgroundTasks, HTTPException, Response
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from ._crud_factory import make_crud_router
-from ..deps import get_db
+from ..deps import get_db, get_read_db
 from .. import models, schemas
+from ..services import events
 from ..utils.email import send_notification_email
 from ..config import settings
+from ..utils.pagination import keyset_paginate, NEXT_CURSOR_HEADER
+from ..sql_inspection import query_budget
 
 # Create the base router
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
 @router.get("/filter", response_model=List[schemas.NotificationOut])
+@query_budget(1)
 def filter_notifications(
+    response: Response,
     user_id: int = Query(..., description="Filter notifications by user_id"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Keyset pagination: pass an empty value for the first page, then the X-Next-Cursor header value"),
+    limit: int = Query(50, description="Page size, only applied in cursor mode"),
+    db: Session = Depends(get_read_db),
 ):
     """
     Fetch notifications by user_id.
     """
     query = db.query(models.Notification).filter(models.Notification.user_id == user_id)
-    
+
+    if cursor is not None:
+        items, next_cursor = keyset_paginate(
+            query, [models.Notification.created_at, models.Notification.id], cursor, limit, descending=True
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return items
+
     return query.order_by(models.Notification.created_at.desc()).all()
 
+def _unread_count(db: Session, user_id: int) -> int:
+    # Answered from the partial index on unread rows
+    return db.query(func.count(models.Notification.id)).filter(
+        models.Notification.user_id == user_id,
+        models.Notification.is_read.is_(False),
+    ).scalar()
+
+def settled_for_sync():
+    """
+    Rows whose inserting transaction ended before the oldest one still running.
+
+    Ids are taken at insert but become visible at commit, so two concurrent
+    writers (an approval fan-out and the expiry sweep, say) can commit out of
+    id order. Handing out an in-flight id's successor would move the client's
+    since_id past it for good; holding back rows newer than the snapshot xmin
+    means every id below next_since_id is final. A long-open transaction
+    delays new notifications by its duration. Rows from before the column
+    existed have no xid and count as settled.
+    """
+    xid = models.Notification.created_xid
+    return or_(xid.is_(None), xid < func.pg_snapshot_xmin(func.pg_current_snapshot()))
+
+@router.get("/sync", response_model=schemas.NotificationSyncOut)
+@query_budget(2)
+def sync_notifications(
+    user_id: int = Query(..., description="Sync notifications of this user"),
+    since_id: int = Query(0, description="Highest notification id the client already has (0 for a first sync)"),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """
+    Incremental sync: only notifications newer than since_id, oldest first,
+    plus the current unread count for the badge. Rows still racing other
+    commits are left for the next sync (see settled_for_sync).
+    """
+    rows = (
+        db.query(models.Notification)
+        .filter(models.Notification.user_id == user_id, models.Notification.id > since_id)
+        .filter(settled_for_sync())
+        .order_by(models.Notification.id)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return schemas.NotificationSyncOut(
+        items=[schemas.NotificationOut.model_validate(n) for n in rows],
+        next_since_id=rows[-1].id if rows else since_id,
+        has_more=has_more,
+        unread_count=_unread_count(db, user_id),
+    )
+
+@router.get("/unread-count", response_model=schemas.NotificationUnreadCountOut)
+@query_budget(1)
+def unread_count(
+    user_id: int = Query(..., description="Count unread notifications of this user"),
+    db: Session = Depends(get_db),
+):
+    """Number of unread notifications, for the badge."""
+    return schemas.NotificationUnreadCountOut(user_id=user_id, unread_count=_unread_count(db, user_id))
+
+@router.post("/mark-read", response_model=schemas.NotificationMarkReadOut)
+def mark_notifications_read(payload: schemas.NotificationMarkReadIn, db: Session = Depends(get_db)):
+    """
+    Mark several notifications as read in one statement: the given ids,
+    everything up to up_to_id, or all of the user's notifications.
+    """
+    query = db.query(models.Notification).filter(
+        models.Notification.user_id == payload.user_id,
+        models.Notification.is_read.is_(False),
+    )
+    if payload.ids is not None:
+        query = query.filter(models.Notification.id.in_(payload.ids))
+    elif payload.up_to_id is not None:
+        query = query.filter(models.Notification.id <= payload.up_to_id)
+
+    updated = query.update({models.Notification.is_read: True}, synchronize_session=False)
+    remaining = _unread_count(db, payload.user_id)
+    if updated:
+        # Keep the badge of the user's other devices in step
+        events.stage(db, [events.make_event("notifications.read", [payload.user_id], unread_count=remaining)])
+    db.commit()
+    return schemas.NotificationMarkReadOut(updated=updated, unread_count=remaining)
+
 @router.post("/send-to-user/{user_id}", response_model=schemas.NotificationOut)
 def send_notification(
     user_id: int,
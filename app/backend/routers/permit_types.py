@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from ._crud_factory import make_crud_router
 from .. import models, schemas
 from ..deps import get_db
+from ..services.reference_cache import get_reference_data
 
 # Create the base router
 router = APIRouter(prefix="/permit-types", tags=["Permit Types"])
@@ -15,7 +16,10 @@ def permit_type_options(
 ):
     """
     Get permit types as options for select inputs.
+    Served from the reference cache when company_id is given.
     """
+    if company_id:
+        return get_reference_data(db, company_id).options("permit_types")
     q = db.query(models.PermitType)
     if company_id:
         q = q.filter(models.PermitType.company_id == company_id)
@@ -32,6 +36,7 @@ crud_router = make_crud_router(
     list_roles=None,
     read_roles=None,
     write_roles=None,
+    reference_key="permit_types",
 )
 
 router.include_router(crud_router)
\ No newline at end of file
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 
 from .. import models, schemas
 from ..deps import get_db, get_current_user
+from ..security.principals import Principal
 from ._crud_factory import make_crud_router
 
 router = APIRouter(prefix="/push-tokens", tags=["Push Tokens"])
@@ -24,7 +25,7 @@ crud_router = make_crud_router(
 def create_push_token(
     data: schemas.PushTokenIn,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Register a push token for the current user.
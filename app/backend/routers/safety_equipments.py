@@ -8,4 +8,5 @@ crud_router = make_crud_router(
     prefix="/safety-equipments",
     tag="Safety Equipment",
     write_roles=["admin"],
+    reference_key="safety_equipments",
 )
\ No newline at end of file
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import Literal, Optional
+
+from .. import schemas
+from ..deps import get_db, get_current_user
+from ..security.principals import Principal
+from ..services import stats
+from ..sql_inspection import query_budget
+
+router = APIRouter(prefix="/stats", tags=["Stats"])
+
+@router.get("/applications", response_model=schemas.ApplicationStatsOut)
+@query_budget(3)
+def application_stats(
+    company_id: Optional[int] = Query(None, description="Defaults to the current user's company"),
+    location_id: Optional[int] = Query(None),
+    applicant_id: Optional[int] = Query(None),
+    group_by: Optional[Literal["location", "applicant"]] = Query(None, description="Also break the counts down per location or applicant"),
+    db: Session = Depends(get_db),
+    me: Principal = Depends(get_current_user),
+):
+    """
+    Number of applications per status, read from the maintained counters
+    instead of counting the application table.
+    """
+    company_id = company_id or me.company_id
+    rows = stats.application_counts(db, company_id, location_id, applicant_id, group_by)
+
+    by_status: dict = {}
+    groups: dict = {}
+    for key, status, n in rows:
+        by_status[status] = by_status.get(status, 0) + n
+        if group_by:
+            group = groups.setdefault(key, {})
+            group[status] = group.get(status, 0) + n
+
+    return schemas.ApplicationStatsOut(
+        company_id=company_id,
+        total=sum(by_status.values()),
+        by_status=by_status,
+        groups=[
+            schemas.StatusCountGroup(key=key, total=sum(counts.values()), by_status=counts)
+            for key, counts in sorted(groups.items())
+        ],
+    )
@@ -1,5 +1,6 @@
 from ._crud_factory import make_crud_router
 from .. import models, schemas
+from ..security.principals import principal_cache
 
 crud_router = make_crud_router(
     Model=models.UserGroup,
@@ -8,4 +9,6 @@ crud_router = make_crud_router(
     prefix="/user-groups",
     tag="User Groups",
     write_roles=["admin"],
+    # membership moves can affect two users (old and new user_id), so drop every cached snapshot
+    after_commit=lambda _: principal_cache.clear(),
 )
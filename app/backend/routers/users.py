@@ -4,7 +4,8 @@ from sqlalchemy.orm import Session
 from ._crud_factory import make_crud_router
 from .. import models, schemas
 from ..deps import get_db
-from ..security.hashing import Hash
+from ..security.hashing import hash_pool
+from ..security.principals import invalidate_user
 
 # Create the base router
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -55,7 +56,7 @@ def _user_create_mutator(data: dict, db: Session) -> dict:
     # hash password if provided
     pwd = data.pop("password", None)
     if pwd:
-        data["password_hash"] = Hash.make(pwd)
+        data["password_hash"] = hash_pool.make(pwd)
     return data
 
 def _user_update_mutator(obj: models.User, data: dict, db: Session) -> dict:
@@ -68,7 +69,7 @@ def _user_update_mutator(obj: models.User, data: dict, db: Session) -> dict:
     # hash password if provided
     pwd = data.pop("password", None)
     if pwd:
-        data["password_hash"] = Hash.make(pwd)
+        data["password_hash"] = hash_pool.make(pwd)
     return data
 
 # Attach the CRUD routes, GET/POST/PUT/DELETE
@@ -84,6 +85,7 @@ crud_router = make_crud_router(
     write_roles=None,   # allow all authenticated users (PUT/PATCH/DELETE)
     create_mutator=_user_create_mutator,
     update_mutator=_user_update_mutator,
+    after_commit=lambda user: invalidate_user(user.id),
 )
 
 router.include_router(crud_router)
\ No newline at end of file
@@ -0,0 +1,13 @@
+"""
+/api/v2: `async def` versions of the hot endpoints on an AsyncSession, so
+concurrency is bounded by the database pool instead of the request threadpool.
+Paths, parameters and responses match their /api counterparts.
+"""
+from fastapi import APIRouter
+
+from . import applications, approvals, notifications
+
+router = APIRouter(prefix="/v2")
+router.include_router(applications.router)
+router.include_router(approvals.router)
+router.include_router(notifications.router)
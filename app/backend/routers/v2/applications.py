@@ -0,0 +1,91 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
+
+from ... import models, schemas
+from ...database import get_async_read_db
+from ...services import application_projection
+from ...utils.pagination import keyset_query, keyset_page, NEXT_CURSOR_HEADER
+from ...sql_inspection import query_budget
+
+router = APIRouter(prefix="/applications", tags=["Applications (async)"])
+
+_SORT_KEY = [models.Application.created_time, models.Application.id]
+
+
+async def _page_and_project(db: AsyncSession, response: Response, stmt, skip: int, limit: int, cursor: Optional[str], relations: tuple) -> list:
+    """Page the (id, created_time) select newest first, then build the payload like the sync routes."""
+    if cursor is not None:
+        rows, next_cursor = keyset_page(
+            (await db.execute(keyset_query(stmt, _SORT_KEY, cursor, limit, descending=True))).all(), _SORT_KEY, limit
+        )
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    else:
+        stmt = stmt.order_by(desc(models.Application.created_time), desc(models.Application.id))
+        rows = (await db.execute(stmt.offset(skip).limit(limit))).all()
+
+    return await db.run_sync(application_projection.project_applications, [r.id for r in rows], relations)
+
+
+@router.get("/filter", response_model=List[schemas.ApplicationOut], response_model_exclude_unset=True)
+@query_budget(11)
+async def filter_applications(
+    response: Response,
+    applicant_id: Optional[int] = Query(None, description="Filter by applicant_id"),
+    company_id: Optional[int] = Query(None, description="Filter by company_id"),
+    workflow_data_id: Optional[int] = Query(None, description="Filter by workflow_data_id"),
+    q: Optional[str] = Query(None, description="Search by name"),
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = Query(None, description="Keyset pagination: pass an empty value for the first page, then the X-Next-Cursor header value"),
+    fields: Optional[str] = Query(None, description="'summary' or comma-separated relationships to include; full graph when omitted"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Same as GET /api/applications/filter."""
+    relations = application_projection.parse_fields(fields)
+
+    stmt = select(models.Application.id, models.Application.created_time)
+    if applicant_id:
+        stmt = stmt.where(models.Application.applicant_id == applicant_id)
+    if company_id:
+        stmt = stmt.where(models.Application.company_id == company_id)
+    if workflow_data_id:
+        stmt = stmt.where(models.Application.workflow_data_id == workflow_data_id)
+    if q:
+        stmt = stmt.where(models.Application.name.ilike(f"%{q}%"))
+
+    return await _page_and_project(db, response, stmt, skip, limit, cursor, relations)
+
+
+@router.get("/for-approver", response_model=List[schemas.ApplicationOut], response_model_exclude_unset=True)
+@query_budget(12)
+async def get_applications_for_approver(
+    response: Response,
+    user_id: int = Query(..., description="Filter applications for a specific approver by their user ID."),
+    q: Optional[str] = Query(None, description="Search by name"),
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = Query(None, description="Keyset pagination: pass an empty value for the first page, then the X-Next-Cursor header value"),
+    fields: Optional[str] = Query(None, description="'summary' or comma-separated relationships to include; full graph when omitted"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Same as GET /api/applications/for-approver."""
+    relations = application_projection.parse_fields(fields)
+
+    if await db.scalar(select(models.User.id).where(models.User.id == user_id)) is None:
+        raise HTTPException(status_code=404, detail=f"User with ID {user_id} not found")
+
+    approver_workflow_data = (
+        select(models.WorkflowData.id)
+        .join(models.Approval, models.Approval.workflow_id == models.WorkflowData.workflow_id)
+        .where(models.Approval.user_id == user_id)
+    )
+    stmt = select(models.Application.id, models.Application.created_time).where(
+        models.Application.workflow_data_id.in_(approver_workflow_data)
+    )
+    if q:
+        stmt = stmt.where(models.Application.name.ilike(f"%{q}%"))
+
+    return await _page_and_project(db, response, stmt, skip, limit, cursor, relations)
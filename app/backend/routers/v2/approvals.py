@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
+
+from .. import _async_crud_factory
+from ..approval_data import approval_data_update_mutator
+from ... import models, schemas
+from ...database import get_async_db, get_async_read_db
+from ...deps import get_current_user_async
+from ...security.principals import Principal
+from ...services.approver_inbox import inbox_for_user
+from ...sql_inspection import query_budget
+
+router = APIRouter(tags=["Approvals (async)"])
+
+@router.get("/approval-data/filter", response_model=List[schemas.ApprovalDataOut])
+@query_budget(1)
+async def filter_approval_data(
+    workflow_data_id: Optional[int] = Query(None, description="Filter by workflow_data_id"),
+    approval_id: Optional[int] = Query(None, description="Filter by approval_id"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Same as GET /api/approval-data/filter."""
+    stmt = select(models.ApprovalData)
+    if workflow_data_id is not None:
+        stmt = stmt.where(models.ApprovalData.workflow_data_id == workflow_data_id)
+    if approval_id is not None:
+        stmt = stmt.where(models.ApprovalData.approval_id == approval_id)
+    if status is not None:
+        stmt = stmt.where(models.ApprovalData.status == status)
+
+    results = (await db.scalars(stmt)).all()
+    if not results:
+        raise HTTPException(status_code=404, detail="No approval data found for given filter")
+
+    return results
+
+@router.get("/approver-inbox", response_model=schemas.ApproverInboxOut)
+@query_budget(4)
+async def get_approver_inbox(
+    user_id: Optional[int] = Query(None, description="Approver; defaults to the current user"),
+    stage: Optional[str] = Query(None, description="Only items of this stage (APPROVAL, SECURITY_ENTRY, JOB_DONE, SECURITY_EXIT)"),
+    limit: int = Query(50, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    me: Principal = Depends(get_current_user_async),
+):
+    """Same as GET /api/approver-inbox."""
+    return await db.run_sync(inbox_for_user, user_id or me.id, stage, limit)
+
+# Approval decisions (PUT /approval-data/{id}) run the same state machine as
+# the sync route, on the AsyncSession's sync side
+approval_data_router = _async_crud_factory.make_async_crud_router(
+    Model=models.ApprovalData,
+    InSchema=schemas.ApprovalDataIn,
+    OutSchema=schemas.ApprovalDataOut,
+    prefix="/approval-data",
+    tag="Approvals (async)",
+    update_mutator=approval_data_update_mutator,
+    enable_create=False,   # creation stamps the server time; use /api/approval-data
+)
+
+router.include_router(approval_data_router)
@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from .. import _async_crud_factory
+from ..notifications import settled_for_sync
+from ... import models, schemas
+from ...database import get_async_db, get_async_read_db
+from ...services import events
+from ...utils.pagination import keyset_query, keyset_page, NEXT_CURSOR_HEADER
+from ...sql_inspection import query_budget
+
+router = APIRouter(prefix="/notifications", tags=["Notifications (async)"])
+
+@router.get("/filter", response_model=List[schemas.NotificationOut])
+@query_budget(1)
+async def filter_notifications(
+    response: Response,
+    user_id: int = Query(..., description="Filter notifications by user_id"),
+    cursor: Optional[str] = Query(None, description="Keyset pagination: pass an empty value for the first page, then the X-Next-Cursor header value"),
+    limit: int = Query(50, description="Page size, only applied in cursor mode"),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """Same as GET /api/notifications/filter."""
+    stmt = select(models.Notification).where(models.Notification.user_id == user_id)
+
+    if cursor is not None:
+        columns = [models.Notification.created_at, models.Notification.id]
+        stmt = keyset_query(stmt, columns, cursor, limit, descending=True)
+        items, next_cursor = keyset_page((await db.scalars(stmt)).all(), columns, limit)
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        return items
+
+    return (await db.scalars(stmt.order_by(models.Notification.created_at.desc()))).all()
+
+async def _unread_count(db: AsyncSession, user_id: int) -> int:
+    return await db.scalar(
+        select(func.count(models.Notification.id)).where(
+            models.Notification.user_id == user_id,
+            models.Notification.is_read.is_(False),
+        )
+    )
+
+@router.get("/sync", response_model=schemas.NotificationSyncOut)
+@query_budget(2)
+async def sync_notifications(
+    user_id: int = Query(..., description="Sync notifications of this user"),
+    since_id: int = Query(0, description="Highest notification id the client already has (0 for a first sync)"),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Same as GET /api/notifications/sync."""
+    rows = (await db.scalars(
+        select(models.Notification)
+        .where(models.Notification.user_id == user_id, models.Notification.id > since_id)
+        .where(settled_for_sync())
+        .order_by(models.Notification.id)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return schemas.NotificationSyncOut(
+        items=[schemas.NotificationOut.model_validate(n) for n in rows],
+        next_since_id=rows[-1].id if rows else since_id,
+        has_more=has_more,
+        unread_count=await _unread_count(db, user_id),
+    )
+
+@router.get("/unread-count", response_model=schemas.NotificationUnreadCountOut)
+@query_budget(1)
+async def unread_count(
+    user_id: int = Query(..., description="Count unread notifications of this user"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Same as GET /api/notifications/unread-count."""
+    return schemas.NotificationUnreadCountOut(user_id=user_id, unread_count=await _unread_count(db, user_id))
+
+@router.post("/mark-read", response_model=schemas.NotificationMarkReadOut)
+async def mark_notifications_read(payload: schemas.NotificationMarkReadIn, db: AsyncSession = Depends(get_async_db)):
+    """Same as POST /api/notifications/mark-read."""
+    stmt = update(models.Notification).where(
+        models.Notification.user_id == payload.user_id,
+        models.Notification.is_read.is_(False),
+    )
+    if payload.ids is not None:
+        stmt = stmt.where(models.Notification.id.in_(payload.ids))
+    elif payload.up_to_id is not None:
+        stmt = stmt.where(models.Notification.id <= payload.up_to_id)
+
+    updated = (await db.execute(stmt.values(is_read=True).execution_options(synchronize_session=False))).rowcount
+    remaining = await _unread_count(db, payload.user_id)
+    if updated:
+        # stage() may emit pg_notify on the session's connection, so run it on the sync side
+        await db.run_sync(events.stage, [events.make_event("notifications.read", [payload.user_id], unread_count=remaining)])
+    await db.commit()
+    return schemas.NotificationMarkReadOut(updated=updated, unread_count=remaining)
+
+# Attach the CRUD routes, GET/POST/PUT/DELETE
+crud_router = _async_crud_factory.make_async_crud_router(
+    Model=models.Notification,
+    InSchema=schemas.NotificationIn,
+    OutSchema=schemas.NotificationOut,
+    UpdateSchema=schemas.NotificationUpdate,
+    prefix="",
+    tag="Notifications (async)",
+)
+
+router.include_router(crud_router)
@@ -1,43 +1,82 @@
-from fastapi import APIRouter, Depends, Query, Form, File, UploadFile, HTTPException, status
+from fastapi import APIRouter, Depends, Query, Form, File, UploadFile, HTTPException, Request, status
 from sqlalchemy.orm import Session
-from fastapi.responses import FileResponse
-from typing import Optional, List
+from typing import Literal, Optional, List
+from openpyxl.utils.exceptions import InvalidFileException
+from starlette.concurrency import run_in_threadpool
+import csv
 import os
 import shutil
+import tempfile
 import uuid
+import zipfile
 import re
 import mimetypes
 from ._crud_factory import make_crud_router
 from .. import models, schemas
 from ..deps import get_db
+from ..services import worker_import
+from ..utils import images
+from ..utils.file_responses import conditional_file_response
+from ..utils.uploads import stream_upload, max_bytes_for
 
 router = APIRouter(prefix="/workers", tags=["Workers"])
 
 UPLOADS_DIR = "/app/ptw-uploads"
 
 
-def _save_worker_picture(company_id: int, picture: UploadFile) -> str:
+async def _save_worker_picture(company_id: int, picture: UploadFile) -> str:
     """
-    Saves a worker's picture to the correct directory and returns the relative path.
+    Streams a worker's picture to the correct directory and returns the relative path.
     """
     # Sanitize the filename to remove potentially unsafe characters
     safe_filename = re.sub(r'[^a-zA-Z0-9_.-]', '', picture.filename)
     
     # Define the path: workers/{company_id}/picture/{uuid}_{filename}
     file_dir = os.path.join(UPLOADS_DIR, "workers", str(company_id), "picture")
-    os.makedirs(file_dir, exist_ok=True)
 
     # Create a unique filename to prevent overwrites
     filename = f"{uuid.uuid4()}_{safe_filename}"
-    full_path = os.path.join(file_dir, filename)
 
-    with open(full_path, "wb") as buffer:
-        shutil.copyfileobj(picture.file, buffer)
+    stored = await stream_upload(picture, file_dir, filename, max_bytes_for(picture.content_type))
+
+    # Thumbnails for list screens; missing ones are regenerated on request
+    await run_in_threadpool(images.generate_derivatives, stored.path)
     
     return os.path.join("workers", str(company_id), "picture", filename)
 
+def _create_worker(db: Session, **fields) -> models.Worker:
+    db_worker = models.Worker(**fields)
+    db.add(db_worker)
+    db.commit()
+    db.refresh(db_worker)
+    return db_worker
+
+def _update_worker(db: Session, worker_id: int, picture_path: Optional[str], **fields) -> models.Worker:
+    db_worker = db.get(models.Worker, worker_id)
+    if not db_worker:
+        raise HTTPException(status_code=404, detail="Worker not found")
+
+    # Update text fields
+    for k, v in fields.items():
+        setattr(db_worker, k, v)
+
+    if picture_path:
+        # If a new picture is uploaded, remove the old one first
+        if db_worker.picture:
+            old_picture_path = os.path.join(UPLOADS_DIR, db_worker.picture)
+            if os.path.isfile(old_picture_path):
+                os.remove(old_picture_path)
+            images.remove_derivatives(old_picture_path)
+
+        db_worker.picture = picture_path
+
+    db.add(db_worker)
+    db.commit()
+    db.refresh(db_worker)
+    return db_worker
+
 @router.post("/", response_model=schemas.WorkerOut, status_code=status.HTTP_201_CREATED)
-def create_worker_with_picture(
+async def create_worker_with_picture(
     *,
     db: Session = Depends(get_db),
     company_id: int = Form(...),
@@ -54,16 +93,17 @@ def create_worker_with_picture(
     """
     picture_path = None
     if picture:
-        picture_path = _save_worker_picture(company_id, picture)
+        picture_path = await _save_worker_picture(company_id, picture)
 
-    db_worker = models.Worker(company_id=company_id, name=name, ic_passport=ic_passport, contact=contact, employment_status=employment_status, employment_type=employment_type, position=position, picture=picture_path)
-    db.add(db_worker)
-    db.commit()
-    db.refresh(db_worker)
-    return db_worker
+    return await run_in_threadpool(
+        _create_worker, db,
+        company_id=company_id, name=name, ic_passport=ic_passport, contact=contact,
+        employment_status=employment_status, employment_type=employment_type,
+        position=position, picture=picture_path,
+    )
 
 @router.put("/{worker_id}", response_model=schemas.WorkerOut)
-def update_worker_with_picture(
+async def update_worker_with_picture(
     *,
     db: Session = Depends(get_db),
     worker_id: int,
@@ -79,32 +119,71 @@ def update_worker_with_picture(
     """
     Update a worker's details, with optional picture replacement.
     """
-    db_worker = db.get(models.Worker, worker_id)
-    if not db_worker:
-        raise HTTPException(status_code=404, detail="Worker not found")
-
-    # Update text fields
-    db_worker.company_id = company_id
-    db_worker.name = name
-    db_worker.ic_passport = ic_passport
-    db_worker.contact = contact
-    db_worker.employment_status = employment_status
-    db_worker.employment_type = employment_type
-    db_worker.position = position
-
+    picture_path = None
     if picture:
-        # If a new picture is uploaded, remove the old one first
-        if db_worker.picture:
-            old_picture_path = os.path.join(UPLOADS_DIR, db_worker.picture)
-            if os.path.isfile(old_picture_path):
-                os.remove(old_picture_path)
-
-        db_worker.picture = _save_worker_picture(company_id, picture)
-
-    db.add(db_worker)
-    db.commit()
-    db.refresh(db_worker)
-    return db_worker
+        picture_path = await _save_worker_picture(company_id, picture)
+
+    try:
+        return await run_in_threadpool(
+            _update_worker, db, worker_id, picture_path,
+            company_id=company_id, name=name, ic_passport=ic_passport, contact=contact,
+            employment_status=employment_status, employment_type=employment_type,
+            position=position,
+        )
+    except HTTPException:
+        # Worker not found: drop the picture we just stored
+        if picture_path:
+            os.remove(os.path.join(UPLOADS_DIR, picture_path))
+            images.remove_derivatives(os.path.join(UPLOADS_DIR, picture_path))
+        raise
+
+
+IMPORT_SHEET_TYPES = {
+    "text/csv": "csv",
+    "application/vnd.ms-excel": "csv",  # what some browsers send for .csv
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
+}
+
+def _run_import(db: Session, company_id: int, sheet_path: str, kind: str, pictures_path: Optional[str]):
+    missing = worker_import.missing_columns(sheet_path, kind)
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing required columns: {', '.join(missing)}")
+    rows = worker_import.iter_xlsx_rows(sheet_path) if kind == "xlsx" else worker_import.iter_csv_rows(sheet_path)
+    return worker_import.import_workers(db, company_id, rows, pictures_path)
+
+@router.post("/import", response_model=schemas.WorkerImportResult)
+async def import_workers(
+    *,
+    db: Session = Depends(get_db),
+    company_id: int = Form(...),
+    file: UploadFile = File(..., description="CSV or XLSX with a header row: name, ic_passport, contact, employment_status, employment_type, position"),
+    pictures: Optional[UploadFile] = File(None, description="Optional zip of pictures named <ic_passport>.jpg/.png"),
+):
+    """
+    Bulk-create workers for a company. Invalid rows are reported per row and
+    skipped; rows whose ic_passport already exists in the company are counted
+    as duplicates. Valid rows are inserted in batches within one transaction.
+    """
+    _, ext = os.path.splitext(file.filename or "")
+    kind = {".csv": "csv", ".xlsx": "xlsx"}.get(ext.lower()) or IMPORT_SHEET_TYPES.get(file.content_type)
+    if not kind:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {file.content_type}")
+
+    work_dir = await run_in_threadpool(tempfile.mkdtemp, prefix="worker-import-")
+    try:
+        sheet = await stream_upload(file, work_dir, f"workers.{kind}", max_bytes_for(file.content_type))
+        pictures_path = None
+        if pictures:
+            pictures_path = (await stream_upload(pictures, work_dir, "pictures.zip", max_bytes_for(pictures.content_type))).path
+
+        try:
+            return await run_in_threadpool(_run_import, db, company_id, sheet.path, kind, pictures_path)
+        except (UnicodeDecodeError, csv.Error):
+            raise HTTPException(status_code=400, detail="The CSV file must be UTF-8 encoded text")
+        except (zipfile.BadZipFile, InvalidFileException):
+            raise HTTPException(status_code=400, detail="The uploaded XLSX or pictures zip is not a valid archive")
+    finally:
+        await run_in_threadpool(shutil.rmtree, work_dir, True)
 
 
 # Custom filter endpoint
@@ -120,11 +199,18 @@ def get_workers_by_company(
     return query.all()
 
 @router.get("/{worker_id}/picture")
-def view_worker_picture(worker_id: int, db: Session = Depends(get_db)):
+def view_worker_picture(
+    worker_id: int,
+    request: Request,
+    size: Optional[Literal["thumb", "medium"]] = Query(None, description="Serve a resized derivative instead of the original"),
+    db: Session = Depends(get_db),
+):
     """
     Serves a worker's picture file for viewing.
+    With `size`, a cached thumbnail is served (WebP when the client accepts it).
+    Pictures can be replaced under the same URL, so clients revalidate (ETag / 304).
     """
-    worker = db.get(models.Worker, worker_id)
+    worker = db.query(models.Worker.picture).filter(models.Worker.id == worker_id).first()
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
 
@@ -134,12 +220,21 @@ def view_worker_picture(worker_id: int, db: Session = Depends(get_db)):
     # Construct the full path to the image
     full_path = os.path.join(UPLOADS_DIR, worker.picture)
 
-    if not os.path.isfile(full_path):
+    try:
+        if size:
+            fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+            derived = images.ensure_derivative(full_path, size, fmt)
+            if derived:
+                return conditional_file_response(
+                    request, derived, media_type=f"image/{fmt}", inline=True, extra_headers={"Vary": "Accept"}
+                )
+            # Not a decodable image: fall back to the original
+
+        media_type, _ = mimetypes.guess_type(full_path)
+        return conditional_file_response(request, full_path, media_type=media_type or "image/jpeg", inline=True)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Picture file not found on server")
 
-    media_type, _ = mimetypes.guess_type(full_path)
-    return FileResponse(path=full_path, media_type=media_type or "image/jpeg", headers={"Content-Disposition": "inline"})
-
 # The generic CRUD router is still useful for GET (one), GET (all), DELETE.
 crud_router = make_crud_router(
     Model=models.Worker,
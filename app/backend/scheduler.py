@@ -1,36 +1,142 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select, text
+from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
+from typing import Optional
 import logging
+import threading
+import time
 
-from . import models
-from .database import SessionLocal
+from . import metrics
+from .config import settings
+from .database import engine
+from .services import events, stats
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cluster-wide advisory lock key so only one replica runs the sweep at a time
+EXPIRY_SWEEP_LOCK_KEY = 7_307_001
 
-def check_and_complete_expired_permits():
+# One chunk of the sweep: complete expired ACTIVE permits in a single statement.
+# SKIP LOCKED leaves rows that a request is currently updating for the next run.
+# Completed permits leave the approver inbox and record their status counter
+# deltas (see services.stats) in the same statement.
+_EXPIRE_CHUNK_SQL = text("""
+    WITH done AS (
+        UPDATE application AS a
+           SET status = 'COMPLETED', updated_time = :now
+         WHERE a.id IN (
+             SELECT a2.id
+               FROM application a2
+               JOIN workflow_data wd ON wd.id = a2.workflow_data_id
+              WHERE a2.status = 'ACTIVE'
+                AND wd.end_time < :now
+              LIMIT :chunk_size
+                FOR UPDATE OF a2 SKIP LOCKED
+         )
+        RETURNING a.id, a.location_id, a.applicant_id
+    ), inbox AS (
+        DELETE FROM approver_inbox i USING done WHERE i.application_id = done.id
+    ), counters AS (
+        INSERT INTO application_status_delta (company_id, location_id, applicant_id, status, delta)
+        SELECT l.company_id, done.location_id, done.applicant_id, s.status, s.delta
+          FROM done
+          JOIN location l ON l.id = done.location_id
+         CROSS JOIN (VALUES ('ACTIVE', -1), ('COMPLETED', 1)) AS s(status, delta)
+    )
+    SELECT id, location_id, applicant_id FROM done
+""")
+
+# Stats of the most recent run, read by /healthz
+last_run: dict = {}
+_stats_lock = threading.Lock()
+
+
+def _record_run(**stats) -> None:
+    with _stats_lock:
+        last_run.clear()
+        last_run.update(stats)
+
+
+def check_and_complete_expired_permits(chunk_size: Optional[int] = None) -> dict:
     """
     Scheduled job to find active permits where the work end time has passed
-    and update their status to COMPLETED.
+    and update their status to COMPLETED, in set-based chunks.
+    """
+    chunk_size = chunk_size or settings.EXPIRY_SWEEP_CHUNK_SIZE
+    started_at = datetime.utcnow()
+    started = time.perf_counter()
+    rows_affected = 0
+
+    with engine.connect() as conn:
+        # Session-level lock: held across the per-chunk commits below
+        locked = conn.execute(select(func.pg_try_advisory_lock(EXPIRY_SWEEP_LOCK_KEY))).scalar()
+        conn.commit()
+        if not locked:
+            logger.info("Expiry sweep skipped: another instance holds the lock.")
+            _record_run(started_at=started_at.isoformat(), duration_seconds=0.0, rows_affected=0, skipped=True)
+            return dict(last_run)
+
+        try:
+            now = datetime.utcnow()
+            while True:
+                rows = conn.execute(_EXPIRE_CHUNK_SQL, {"now": now, "chunk_size": chunk_size}).all()
+                conn.commit()
+                rows_affected += len(rows)
+                metrics.EXPIRED_PERMITS.inc(len(rows))
+                if rows:
+                    logger.info(f"Permits {[r.id for r in rows]} automatically set to COMPLETED.")
+                    events.publish([
+                        events.make_event("application.status", [r.applicant_id], application_id=r.id, status="COMPLETED")
+                        for r in rows
+                    ])
+                if len(rows) < chunk_size:
+                    break
+        finally:
+            # A failed chunk leaves the transaction aborted; the unlock needs a fresh one
+            conn.rollback()
+            try:
+                conn.execute(select(func.pg_advisory_unlock(EXPIRY_SWEEP_LOCK_KEY)))
+                conn.commit()
+            except Exception:
+                # Don't return a lock-holding connection to the pool: closing
+                # the backend session releases the lock
+                logger.exception("Expiry sweep could not release its lock; discarding the connection.")
+                conn.invalidate()
+
+    duration = time.perf_counter() - started
+    _record_run(
+        started_at=started_at.isoformat(),
+        duration_seconds=round(duration, 3),
+        rows_affected=rows_affected,
+        skipped=False,
+    )
+    logger.info(f"Expiry sweep completed {rows_affected} permits in {duration:.3f}s.")
+    return dict(last_run)
+
+
+def start_scheduler() -> Optional[BackgroundScheduler]:
+    """
+    Start the background jobs; returns None when SCHEDULER_ENABLED is off.
     """
-    db: Session = SessionLocal()
-    try:
-        now = datetime.utcnow()
-        
-        # Query for active applications and eager-load workflow_data
-        expired_permits = db.query(models.Application).options(
-            joinedload(models.Application.workflow_data)
-        ).filter(
-            models.Application.status == "ACTIVE",
-            models.Application.workflow_data.has(models.WorkflowData.end_time < now)
-        ).all()
-
-        for permit in expired_permits:
-            permit.status = "COMPLETED"
-            permit.updated_time = now
-            logger.info(f"Permit ID {permit.id} automatically set to COMPLETED.")
-
-        db.commit()
-    finally:
-        db.close()
+    if not settings.SCHEDULER_ENABLED:
+        return None
+    scheduler = BackgroundScheduler()
+    scheduler.add_job(
+        metrics.track_job("complete_expired_permits", check_and_complete_expired_permits),
+        "interval",
+        seconds=settings.EXPIRY_SWEEP_INTERVAL_SECONDS,
+        id="complete_expired_permits",
+        max_instances=1,   # never overlap runs in this process
+        coalesce=True,     # collapse missed runs into one
+    )
+    scheduler.add_job(
+        metrics.track_job("fold_status_counters", stats.fold_deltas),
+        "interval",
+        seconds=settings.STATS_FOLD_INTERVAL_SECONDS,
+        id="fold_status_counters",
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.start()
+    return scheduler
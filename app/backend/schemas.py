@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
+from typing import Dict, Optional, List
 from datetime import datetime
 
 # ---------- Auth ----------
@@ -78,12 +78,18 @@ class DocumentOut(BaseModel):
     name: str
     path: str
     time: Optional[datetime] = None
+    sha256: Optional[str] = None
     model_config = ConfigDict(from_attributes=True)
 
 class DocumentUpdate(BaseModel):
     company_id: Optional[int] = None
     name: Optional[str] = None
 
+class DocumentFromHashIn(BaseModel):
+    company_id: int
+    name: str
+    sha256: str = Field(..., pattern=r"^[0-9a-f]{64}$")
+
 # ---------- Workflow ----------
 class WorkflowIn(BaseModel):
     company_id: int
@@ -241,6 +247,27 @@ class WorkerOut(WorkerBase):
     class Config:
         from_attributes = True
 
+class WorkerImportRow(BaseModel):
+    """One data row of a bulk worker import (CSV/XLSX)."""
+    name: str = Field(..., min_length=1, max_length=255)
+    ic_passport: str = Field(..., min_length=1, max_length=64)
+    contact: Optional[str] = None
+    employment_status: Optional[str] = None
+    employment_type: Optional[str] = None
+    position: Optional[str] = None
+    model_config = ConfigDict(str_strip_whitespace=True, coerce_numbers_to_str=True, extra="ignore")
+
+class WorkerImportError(BaseModel):
+    row: int                      # row number in the sheet, header is row 1
+    ic_passport: Optional[str] = None
+    errors: List[str]
+
+class WorkerImportResult(BaseModel):
+    created: int
+    duplicates: int               # rows skipped because the ic_passport already exists
+    pictures_attached: int
+    errors: List[WorkerImportError] = []
+
 # ---------- SafetyEquipment ----------
 class SafetyEquipmentBase(BaseModel):
     company_id: int
@@ -372,6 +399,26 @@ class NotificationUpdate(BaseModel):
     message: Optional[str] = None
     is_read: Optional[bool] = None
 
+class NotificationSyncOut(BaseModel):
+    items: List[NotificationOut]
+    next_since_id: int            # pass back as since_id on the next sync
+    has_more: bool
+    unread_count: int
+
+class NotificationUnreadCountOut(BaseModel):
+    user_id: int
+    unread_count: int
+
+class NotificationMarkReadIn(BaseModel):
+    user_id: int
+    ids: Optional[List[int]] = None   # these notifications
+    up_to_id: Optional[int] = None    # or everything up to and including this id
+                                      # or, with neither, all of the user's notifications
+
+class NotificationMarkReadOut(BaseModel):
+    updated: int
+    unread_count: int
+
 # ---------- Feedback ----------
 class FeedbackBase(BaseModel):
     user_id: int
@@ -454,4 +501,42 @@ class ReportUpdate(BaseModel):
     concern: Optional[str] = None
     description: Optional[str] = None
     immediate_action: Optional[str] = None
-    document_id: Optional[int] = None
\ No newline at end of file
+    document_id: Optional[int] = None
+
+# ---------- Bootstrap ----------
+class BootstrapOut(BaseModel):
+    """Reference data the mobile app loads at startup, for one company."""
+    company_id: int
+    permit_types: List[PermitTypeOut] = []
+    groups: List[GroupOut] = []
+    locations: List[LocationOut] = []
+    safety_equipments: List[SafetyEquipmentOut] = []
+    departments: List[DepartmentOut] = []
+
+# ---------- Approver Inbox ----------
+class ApproverInboxItem(BaseModel):
+    approval_data_id: int
+    application_id: int
+    application_name: str
+    application_status: Optional[str] = None
+    location_id: Optional[int] = None
+    level: Optional[int] = None
+    stage: str                    # APPROVAL | SECURITY_ENTRY | JOB_DONE | SECURITY_EXIT
+    pending_since: datetime
+
+class ApproverInboxOut(BaseModel):
+    total: int
+    counts: Dict[str, int]        # stage -> number of actionable items
+    items: List[ApproverInboxItem]
+
+# ---------- Stats ----------
+class StatusCountGroup(BaseModel):
+    key: int                      # location_id or applicant_id
+    total: int
+    by_status: Dict[str, int]
+
+class ApplicationStatsOut(BaseModel):
+    company_id: int
+    total: int
+    by_status: Dict[str, int]
+    groups: List[StatusCountGroup] = []
@@ -1,5 +1,12 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 
+from ..config import settings
+
 _pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class Hash:
@@ -9,4 +16,106 @@ class Hash:
 
     @staticmethod
     def verify(hashed_password: str, plain_password: str) -> bool:
-        return _pwd_ctx.verify(plain_password, hashed_password)
\ No newline at end of file
+        return _pwd_ctx.verify(plain_password, hashed_password)
+
+
+class HashingPoolBusy(Exception):
+    """Raised when the hashing pool queue is full; mapped to 503 in main.py."""
+
+
+class HashingPool:
+    """
+    Size-limited executor for bcrypt work so login bursts cannot occupy
+    every request thread. At most `workers + max_pending` hashes are accepted
+    at once; anything beyond that is rejected immediately with HashingPoolBusy.
+    The auth endpoints await the *_async methods and hold no thread while
+    waiting; make()/verify() block the calling thread (sync routes only).
+    """
+
+    def __init__(self, workers: int, max_pending: int, use_processes: bool = False):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing this module never forks worker processes
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="hashing")
+            return self._executor
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._completed += 1
+        self._slots.release()
+
+    def _submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HashingPoolBusy()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the hash finishes, even if the caller gave up
+        future.add_done_callback(self._release)
+        return future
+
+    def _run(self, fn, *args):
+        return self._submit(fn, *args).result()
+
+    async def _run_async(self, fn, *args):
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def make(self, plain_password: str) -> str:
+        return self._run(Hash.make, plain_password)
+
+    def verify(self, hashed_password: str, plain_password: str) -> bool:
+        return self._run(Hash.verify, hashed_password, plain_password)
+
+    async def make_async(self, plain_password: str) -> str:
+        """make() for `async def` endpoints: no request thread waits on bcrypt."""
+        return await self._run_async(Hash.make, plain_password)
+
+    async def verify_async(self, hashed_password: str, plain_password: str) -> bool:
+        """verify() for `async def` endpoints: no request thread waits on bcrypt."""
+        return await self._run_async(Hash.verify, hashed_password, plain_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                # requests accepted but waiting for a free worker
+                "queued": max(self._in_flight - self.workers, 0),
+                "max_pending": self.max_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+hash_pool = HashingPool(
+    workers=settings.HASH_POOL_WORKERS,
+    max_pending=settings.HASH_POOL_MAX_PENDING,
+    use_processes=settings.HASH_POOL_USE_PROCESSES,
+)
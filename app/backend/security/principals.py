@@ -0,0 +1,113 @@
+# app/security/principals.py
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from .. import models
+from ..config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Detached, read-only snapshot of the authenticated user.
+    Exposes the User attributes the routers read, plus the user's group ids.
+    """
+    id: int
+    company_id: int
+    name: str
+    email: Optional[str]
+    user_type: Optional[int]
+    company_name: Optional[str]
+    group_ids: tuple[int, ...] = ()
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "Principal":
+        return cls(
+            id=user.id,
+            company_id=user.company_id,
+            name=user.name,
+            email=user.email,
+            user_type=user.user_type,
+            company_name=user.company.name if user.company else None,
+            group_ids=tuple(ug.group_id for ug in user.user_groups),
+        )
+
+
+class PrincipalCache:
+    """
+    Bounded LRU cache of Principal snapshots keyed by user id, with a TTL
+    so changes made by other replicas are picked up eventually.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[int, tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._items.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                del self._items[user_id]
+                return None
+            self._items.move_to_end(user_id)
+            return principal
+
+    def put(self, principal: Principal) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._items.move_to_end(principal.id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._items.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def load_principal(db: Session, user_id: int) -> Optional[Principal]:
+    """
+    Return the cached Principal for user_id, loading it from the DB on a miss.
+    """
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    user = (
+        db.query(models.User)
+        .options(joinedload(models.User.company), selectinload(models.User.user_groups))
+        .filter(models.User.id == user_id)
+        .first()
+    )
+    if not user:
+        return None
+
+    principal = Principal.from_user(user)
+    principal_cache.put(principal)
+    return principal
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a user's snapshot after their row or group membership changed."""
+    principal_cache.invalidate(user_id)
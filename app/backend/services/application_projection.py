@@ -0,0 +1,150 @@
+from collections import defaultdict
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+
+# Relationships of schemas.ApplicationOut that can be requested through `fields=`
+RELATIONS = (
+    "workflow_data", "document", "location", "permit_type", "applicant",
+    "workers", "safety_equipment", "approval_data", "approvals",
+)
+
+# Shape used by the mobile list screens (`fields=summary`)
+SUMMARY_RELATIONS = ("location", "permit_type")
+
+# to-one relationship -> (Model, OutSchema, foreign key column on application)
+_TO_ONE = {
+    "workflow_data": (models.WorkflowData, schemas.WorkflowDataOut, "workflow_data_id"),
+    "document": (models.Document, schemas.DocumentOut, "document_id"),
+    "location": (models.Location, schemas.LocationOut, "location_id"),
+    "permit_type": (models.PermitType, schemas.PermitTypeOut, "permit_type_id"),
+    "applicant": (models.User, schemas.UserOut, "applicant_id"),
+}
+
+
+def parse_fields(fields: Optional[str]) -> tuple:
+    """
+    Turn the `fields=` query value into the relationships to include.
+    None -> full ApplicationOut graph, "summary" -> list-screen shape,
+    otherwise a comma-separated list of relationship names.
+    """
+    if not fields:
+        return RELATIONS
+    if fields.strip() == "summary":
+        return SUMMARY_RELATIONS
+    requested = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = set(requested) - set(RELATIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return requested
+
+
+def _columns(Model, Schema) -> list:
+    """Only the table columns the output schema actually exposes."""
+    names = Schema.model_fields.keys()
+    return [c for c in Model.__table__.columns if c.key in names]
+
+
+def _fetch_by_id(db: Session, Model, Schema, ids) -> dict:
+    ids = {i for i in ids if i is not None}
+    if not ids:
+        return {}
+    rows = db.execute(select(*_columns(Model, Schema)).where(Model.id.in_(ids))).mappings()
+    return {r["id"]: dict(r) for r in rows}
+
+
+def _fetch_grouped(db: Session, Model, Schema, key_col, keys) -> dict:
+    """Rows of Model grouped by key_col, one query for all keys."""
+    keys = {k for k in keys if k is not None}
+    if not keys:
+        return {}
+    stmt = (
+        select(key_col.label("_key"), *_columns(Model, Schema))
+        .where(key_col.in_(keys))
+        .order_by(Model.id)
+    )
+    grouped = defaultdict(list)
+    for r in db.execute(stmt).mappings():
+        row = dict(r)
+        grouped[row.pop("_key")].append(row)
+    return grouped
+
+
+def _fetch_linked(db: Session, Model, Schema, LinkModel, link_fk, app_ids) -> dict:
+    """Many-to-many children of the given applications through LinkModel."""
+    stmt = (
+        select(LinkModel.application_id.label("_key"), *_columns(Model, Schema))
+        .join_from(LinkModel, Model, link_fk == Model.id)
+        .where(LinkModel.application_id.in_(app_ids))
+        .order_by(Model.id)
+    )
+    grouped = defaultdict(list)
+    for r in db.execute(stmt).mappings():
+        row = dict(r)
+        grouped[row.pop("_key")].append(row)
+    return grouped
+
+
+def project_applications(db: Session, app_ids: list, relations: tuple = RELATIONS) -> list:
+    """
+    Build ApplicationOut-compatible dicts for the given application ids, keeping their order.
+    Uses one column-level query for the applications plus one batched query per
+    requested relationship, instead of a joinedload graph.
+    """
+    if not app_ids:
+        return []
+
+    apps = _fetch_by_id(db, models.Application, schemas.ApplicationOut, app_ids)
+
+    to_one = {}
+    for name, (Model, Schema, fk) in _TO_ONE.items():
+        # approvals hang off workflow_data.workflow_id, so fetch it when either is requested
+        if name in relations or (name == "workflow_data" and "approvals" in relations):
+            to_one[name] = _fetch_by_id(db, Model, Schema, (a[fk] for a in apps.values()))
+
+    workers = safety_equipment = approval_data = approvals = {}
+    if "workers" in relations:
+        workers = _fetch_linked(
+            db, models.Worker, schemas.WorkerOut,
+            models.ApplicationWorker, models.ApplicationWorker.worker_id, list(apps),
+        )
+    if "safety_equipment" in relations:
+        safety_equipment = _fetch_linked(
+            db, models.SafetyEquipment, schemas.SafetyEquipmentOut,
+            models.ApplicationSafetyEquipment, models.ApplicationSafetyEquipment.safety_equipment_id, list(apps),
+        )
+    if "approval_data" in relations:
+        approval_data = _fetch_grouped(
+            db, models.ApprovalData, schemas.ApprovalDataOut,
+            models.ApprovalData.workflow_data_id, (a["workflow_data_id"] for a in apps.values()),
+        )
+    if "approvals" in relations:
+        approvals = _fetch_grouped(
+            db, models.Approval, schemas.ApprovalOut,
+            models.Approval.workflow_id, (wd["workflow_id"] for wd in to_one["workflow_data"].values()),
+        )
+
+    result = []
+    for app_id in app_ids:
+        app = apps.get(app_id)
+        if app is None:
+            continue
+        payload = dict(app)
+        for name, (_, _, fk) in _TO_ONE.items():
+            if name in relations:
+                payload[name] = to_one[name].get(app[fk])
+        if "workers" in relations:
+            payload["workers"] = workers.get(app_id, [])
+        if "safety_equipment" in relations:
+            payload["safety_equipment"] = safety_equipment.get(app_id, [])
+        if "approval_data" in relations:
+            payload["approval_data"] = approval_data.get(app["workflow_data_id"], [])
+        if "approvals" in relations:
+            wd = to_one["workflow_data"].get(app["workflow_data_id"])
+            payload["approvals"] = approvals.get(wd["workflow_id"], []) if wd else []
+        result.append(payload)
+    return result
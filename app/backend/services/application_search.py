@@ -0,0 +1,154 @@
+"""
+Full-text search over applications. application.search_vector is derived
+from the application's name, location, permit type, applicant and workers.
+
+A session hook refreshes the vectors of every application a flush touches,
+in the same transaction: application inserts and updates, worker links added,
+moved or removed, and renames of the workers, locations, permit types and
+users an application refers to.
+"""
+import re
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, event, func, inspect, literal_column, text
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+
+# 'simple' keeps names as typed (no stemming or stop words), which suits
+# permit, location and people names better than a language dictionary.
+SEARCH_CONFIG = "simple"
+
+# Weighted search document: application name (A), location and permit type (B),
+# applicant and worker names (C). Used to refresh rows after writes.
+_REFRESH_SQL = text(f"""
+    UPDATE application AS a SET search_vector =
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(a.name, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(
+            (SELECT l.name FROM location l WHERE l.id = a.location_id), '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(
+            (SELECT pt.name FROM permit_type pt WHERE pt.id = a.permit_type_id), '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(
+            (SELECT u.name FROM "user" u WHERE u.id = a.applicant_id), '')), 'C') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(
+            (SELECT string_agg(w.name, ' ') FROM application_worker aw
+               JOIN worker w ON w.id = aw.worker_id
+              WHERE aw.application_id = a.id), '')), 'C')
+    WHERE a.id IN :ids
+""").bindparams(bindparam("ids", expanding=True))
+
+
+def refresh_search_vectors(db: Session, app_ids: Iterable[int]) -> None:
+    """
+    Recompute the search document of the given applications.
+    Call after the application and its workers are flushed; does not commit.
+    Writes through the ORM session do this on their own (see the hook below);
+    this is for bulk loads that bypass it.
+    """
+    ids = sorted({i for i in app_ids if i is not None})
+    if ids:
+        db.execute(_REFRESH_SQL, {"ids": ids})
+
+
+# Applications whose search document includes a row of the given table
+_APPLICATIONS_OF_SQL = {
+    model: text(sql).bindparams(bindparam("ids", expanding=True))
+    for model, sql in (
+        (models.Worker, "SELECT DISTINCT application_id FROM application_worker WHERE worker_id IN :ids"),
+        (models.Location, "SELECT id FROM application WHERE location_id IN :ids"),
+        (models.PermitType, "SELECT id FROM application WHERE permit_type_id IN :ids"),
+        (models.User, "SELECT id FROM application WHERE applicant_id IN :ids"),
+    )
+}
+
+# Attributes of an application that are part of its search document
+_APPLICATION_ATTRS = ("name", "location_id", "permit_type_id", "applicant_id", "workers")
+
+_DELETED_KEY = "application_search_deleted"  # session.info: app ids found in before_flush
+
+
+def _changed(obj, *attrs) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+def _old_and_new(obj, attr) -> set:
+    history = inspect(obj).attrs[attr].history
+    return {v for v in (*history.added, *history.deleted, *history.unchanged) if v is not None}
+
+
+def _applications_of(connection, refs: dict) -> set:
+    """Ids of the applications referring to the given {model: ids}."""
+    app_ids: set = set()
+    for model, ids in refs.items():
+        if ids:
+            app_ids |= set(connection.execute(_APPLICATIONS_OF_SQL[model], {"ids": sorted(ids)}).scalars())
+    return app_ids
+
+
+@event.listens_for(SessionLocal, "before_flush")
+def _collect_before_flush(session: Session, flush_context, instances) -> None:
+    # Deleting a worker also deletes its application_worker rows, so find the
+    # applications it was on while the links still exist
+    refs: dict = {}
+    for obj in session.deleted:
+        model = type(obj)
+        if model in _APPLICATIONS_OF_SQL and obj.id is not None:
+            refs.setdefault(model, set()).add(obj.id)
+    if refs:
+        session.info.setdefault(_DELETED_KEY, set()).update(_applications_of(session.connection(), refs))
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _refresh_after_flush(session: Session, flush_context) -> None:
+    # new/dirty/deleted still describe what this flush wrote
+    app_ids: set = session.info.pop(_DELETED_KEY, set())
+    renamed: dict = {}
+
+    for obj in session.new:
+        if isinstance(obj, models.Application):
+            app_ids.add(obj.id)
+        elif isinstance(obj, models.ApplicationWorker):
+            app_ids.add(obj.application_id)
+
+    for obj in session.dirty:
+        if isinstance(obj, models.Application) and _changed(obj, *_APPLICATION_ATTRS):
+            app_ids.add(obj.id)
+        elif isinstance(obj, models.ApplicationWorker) and _changed(obj, "application_id", "worker_id"):
+            # A link moved to another application changes both documents
+            app_ids |= _old_and_new(obj, "application_id")
+        elif type(obj) in _APPLICATIONS_OF_SQL:
+            if _changed(obj, "name"):
+                renamed.setdefault(type(obj), set()).add(obj.id)
+            if isinstance(obj, models.Worker) and _changed(obj, "applications"):
+                # Links dropped from this side are gone from application_worker by now
+                app_ids |= {a.id for a in inspect(obj).attrs["applications"].history.sum()}
+
+    for obj in session.deleted:
+        if isinstance(obj, models.ApplicationWorker):
+            app_ids.add(inspect(obj).dict.get("application_id"))
+
+    if renamed:
+        app_ids |= _applications_of(session.connection(), renamed)
+    refresh_search_vectors(session.connection(), app_ids)
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _discard_collected(session: Session, previous_transaction) -> None:
+    session.info.pop(_DELETED_KEY, None)
+
+
+def build_tsquery(q: str) -> Optional[str]:
+    """
+    Turn free text into a prefix-matching tsquery: "hot wor" -> "hot:* & wor:*".
+    Only word characters are kept, so the result is always valid tsquery syntax.
+    """
+    terms = re.findall(r"\w+", q.lower())
+    return " & ".join(f"{t}:*" for t in terms) or None
+
+
+def tsquery(q: str):
+    """SQL expression for the query built by build_tsquery (None when q has no terms)."""
+    built = build_tsquery(q)
+    return func.to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), built) if built else None
@@ -0,0 +1,177 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session, lazyload
+
+from .. import models
+from ..config import settings
+from .email_outbox import enqueue_email
+
+
+class ApprovalStateMachine:
+    """
+    Approval workflow for one workflow_data.
+
+    `load()` locks the application and every approval_data row of the workflow
+    (two queries), `decide()` computes all transitions in memory, and
+    `stage_notifications()` adds the notification/outbox rows. Nothing is
+    committed: the caller persists everything with a single commit.
+    """
+
+    def __init__(self, db: Session, workflow_data_id: int):
+        self.db = db
+        self.workflow_data_id = workflow_data_id
+        self.application: Optional[models.Application] = None
+        self.steps: list[models.ApprovalData] = []
+        self.approver_ids: dict[int, Optional[int]] = {}  # approval_data.id -> approver user id
+        self.notifications: list[tuple[int, str, str]] = []  # (user_id, title, message)
+
+    def load(self) -> "ApprovalStateMachine":
+        db = self.db
+        # Lock the application first, then its steps, so concurrent decisions serialize
+        self.application = (
+            db.query(models.Application)
+            .options(lazyload("*"))
+            .filter(models.Application.workflow_data_id == self.workflow_data_id)
+            .populate_existing()
+            .with_for_update(of=models.Application)
+            .first()
+        )
+        rows = (
+            db.query(models.ApprovalData, models.Approval.user_id)
+            .outerjoin(models.Approval, models.Approval.id == models.ApprovalData.approval_id)
+            .filter(models.ApprovalData.workflow_data_id == self.workflow_data_id)
+            .order_by(models.ApprovalData.level, models.ApprovalData.id)
+            .populate_existing()
+            .with_for_update(of=models.ApprovalData)
+            .all()
+        )
+        self.steps = [step for step, _ in rows]
+        self.approver_ids = {step.id: user_id for step, user_id in rows}
+        return self
+
+    def _step_at(self, level: int) -> Optional[models.ApprovalData]:
+        return next((s for s in self.steps if s.level == level), None)
+
+    def _set_application_status(self, status: str, now: datetime) -> bool:
+        app = self.application
+        if not app or app.status == status:
+            return False
+        app.status = status
+        app.updated_time = now
+        return True
+
+    def _promote(self, step: Optional[models.ApprovalData], notify: bool = False) -> None:
+        """WAITING -> PENDING, optionally telling the step's approver."""
+        if not step or step.status != "WAITING":
+            return
+        step.status = "PENDING"
+        approver_id = self.approver_ids.get(step.id)
+        if notify and approver_id and self.application:
+            self.notifications.append((
+                approver_id,
+                f"Permit Pending Approval: {self.application.name}",
+                f"""
+                    <p>DO NOT REPLY TO THIS EMAIL.</p>
+                    <p>A permit application, <strong>{self.application.name}</strong>, requires your approval.</p>
+                    <p>Please log in to the application to review and take action.</p>
+                """,
+            ))
+
+    def decide(self, step: models.ApprovalData, new_status: Optional[str],
+               remarks: Optional[str] = None, approver_name: str = "System") -> None:
+        """
+        Apply an approver's decision on `step` (one of self.steps):
+        - a rejection anywhere rejects the application
+        - an approval promotes the next level
+        - once every permit level (< SECURITY_ENTER_LEVEL) is approved the
+          application is APPROVED and security entry becomes PENDING
+        - security entry / job done / security exit levels move the
+          application to ACTIVE / EXIT_PENDING / COMPLETED
+        """
+        now = datetime.utcnow()
+        app = self.application
+
+        if new_status in {"APPROVED", "REJECTED"} and step.status != new_status:
+            step.status = new_status
+            step.time = now
+            if remarks is not None:
+                step.remarks = remarks
+
+        if any(s.status == "REJECTED" for s in self.steps):
+            if self._set_application_status("REJECTED", now) and app.applicant_id:
+                self.notifications.append((
+                    app.applicant_id,
+                    f"Permit Application Rejected: {app.name}",
+                    f"""
+                    <p>DO NOT REPLY TO THIS EMAIL.</p>
+                    <p>Your permit application <strong>{app.name}</strong> has been <strong>REJECTED</strong>.</p>
+                    <p>
+                        <strong>Approver:</strong> {approver_name}<br/>
+                        <strong>Remarks:</strong> {remarks or "N/A"}
+                    </p>
+                    <p>Please check the app for more details.</p>
+                """,
+                ))
+            return
+
+        if new_status != "APPROVED" or step.level is None:
+            return
+
+        self._promote(self._step_at(step.level + 1), notify=True)
+
+        if step.level < settings.SECURITY_ENTER_LEVEL:
+            permit_steps = [s for s in self.steps if s.level is not None and s.level < settings.SECURITY_ENTER_LEVEL]
+            if all(s.status == "APPROVED" for s in permit_steps):
+                if self._set_application_status("APPROVED", now) and app.applicant_id:
+                    self.notifications.append((
+                        app.applicant_id,
+                        f"Permit Application Approved: {app.name}",
+                        f"""
+                        <p>DO NOT REPLY TO THIS EMAIL.</p>
+                        <p>Congratulations! Your permit application <strong>{app.name}</strong> has been fully <strong>APPROVED</strong>.</p>
+                        <p>Please check the app for more details.</p>
+                    """,
+                    ))
+                self._promote(self._step_at(settings.SECURITY_ENTER_LEVEL))
+
+        elif step.level == settings.SECURITY_ENTER_LEVEL:
+            self._set_application_status("ACTIVE", now)
+
+        elif step.level == settings.CLOSING_FLOW_LEVEL:
+            self._set_application_status("EXIT_PENDING", now)
+            self._promote(self._step_at(settings.SECURITY_EXIT_LEVEL))
+
+        elif step.level == settings.SECURITY_EXIT_LEVEL:
+            self._set_application_status("COMPLETED", now)
+
+    def stage_notifications(self) -> None:
+        """Add Notification rows and outbox emails for everything decided so far."""
+        if not self.notifications:
+            return
+        user_ids = {user_id for user_id, _, _ in self.notifications}
+        emails = dict(
+            self.db.query(models.User.id, models.User.email)
+            .filter(models.User.id.in_(user_ids))
+            .all()
+        )
+        for user_id, title, message in self.notifications:
+            self.db.add(models.Notification(user_id=user_id, title=title, message=message))
+            if emails.get(user_id):
+                enqueue_email(self.db, subject=title, recipients=[emails[user_id]], body=message)
+        self.notifications = []
+
+
+def apply_approval_decision(db: Session, approval_data: models.ApprovalData, data: dict) -> None:
+    """
+    Run an approval_data status change through the state machine.
+    All resulting writes are left in the session for the caller's commit.
+    """
+    flow = ApprovalStateMachine(db, approval_data.workflow_data_id).load()
+    flow.decide(
+        approval_data,
+        new_status=data.get("status"),
+        remarks=data.get("remarks"),
+        approver_name=data.get("approver_name", "System"),
+    )
+    flow.stage_notifications()
@@ -0,0 +1,201 @@
+"""
+Approver inbox: one approver_inbox row per (approver, PENDING approval_data
+step) of an application that is still open, so "what do I need to act on"
+is an index lookup on user_id instead of a join over the workflow graph.
+
+Rows are derived, never edited directly. A session hook re-derives the rows
+of every workflow_data touched by a flush (approval_data inserts, updates and
+deletes, approver reassignment on approval, application status changes), in
+the same transaction. The expiry sweep removes rows of the permits it closes.
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, desc, event, func, inspect, or_, text
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..config import settings
+from ..database import SessionLocal
+from . import events
+
+# Applications in these states have nothing left to act on
+CLOSED_STATUSES = ("DRAFT", "REJECTED", "COMPLETED")
+
+# Bring the inbox rows of the given workflow_data in line with approval_data:
+# drop rows that are no longer actionable, add new ones (keeping pending_since
+# of rows that stay).
+_SYNC_SQL = text("""
+    WITH wanted AS (
+        SELECT ap.user_id, ad.id AS approval_data_id, a.id AS application_id,
+               ad.workflow_data_id, ad.level
+          FROM approval_data ad
+          JOIN approval ap ON ap.id = ad.approval_id
+          JOIN application a ON a.workflow_data_id = ad.workflow_data_id
+         WHERE ad.workflow_data_id IN :wd_ids
+           AND ad.status = 'PENDING'
+           AND ap.user_id IS NOT NULL
+           AND coalesce(a.status, '') NOT IN :closed
+    ), removed AS (
+        DELETE FROM approver_inbox i
+         WHERE i.workflow_data_id IN :wd_ids
+           AND NOT EXISTS (
+               SELECT 1 FROM wanted w
+                WHERE w.user_id = i.user_id AND w.approval_data_id = i.approval_data_id
+           )
+    )
+    INSERT INTO approver_inbox (user_id, approval_data_id, application_id, workflow_data_id, level, pending_since)
+    SELECT user_id, approval_data_id, application_id, workflow_data_id, level, timezone('utc', now())
+      FROM wanted
+    ON CONFLICT (user_id, approval_data_id) DO UPDATE SET level = EXCLUDED.level
+    RETURNING user_id, approval_data_id, application_id, (xmax = 0) AS inserted
+""").bindparams(bindparam("wd_ids", expanding=True), bindparam("closed", expanding=True))
+
+_WORKFLOW_DATA_OF_APPROVALS_SQL = text(
+    "SELECT DISTINCT workflow_data_id FROM approval_data WHERE approval_id IN :approval_ids"
+).bindparams(bindparam("approval_ids", expanding=True))
+
+# Backfill / repair of the whole table
+_REBUILD_SQL = text("SELECT DISTINCT workflow_data_id FROM approval_data")
+
+
+def stage_for_level(level) -> str:
+    """Inbox section of a step, from its approval level."""
+    if level is None or level < settings.SECURITY_ENTER_LEVEL:
+        return "APPROVAL"
+    if level == settings.SECURITY_ENTER_LEVEL:
+        return "SECURITY_ENTRY"
+    if level == settings.CLOSING_FLOW_LEVEL:
+        return "JOB_DONE"
+    if level == settings.SECURITY_EXIT_LEVEL:
+        return "SECURITY_EXIT"
+    return "OTHER"
+
+
+def sync_workflow_data(connection, workflow_data_ids: Iterable[int]) -> list:
+    """Re-derive the inbox rows of the given workflow_data; returns the rows that are new."""
+    ids = sorted({i for i in workflow_data_ids if i is not None})
+    if not ids:
+        return []
+    rows = connection.execute(_SYNC_SQL, {"wd_ids": ids, "closed": list(CLOSED_STATUSES)}).all()
+    return [r for r in rows if r.inserted]
+
+
+def _changed(obj, *attrs) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[a].history.has_changes() for a in attrs)
+
+
+def _old_and_new(obj, attr) -> set:
+    history = inspect(obj).attrs[attr].history
+    return {v for v in (*history.added, *history.deleted, *history.unchanged) if v is not None}
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _sync_after_flush(session: Session, flush_context) -> None:
+    # new/dirty/deleted still describe what this flush wrote
+    wd_ids: set = set()
+    approval_ids: set = set()
+
+    for obj in session.new:
+        if isinstance(obj, models.ApprovalData):
+            wd_ids.add(obj.workflow_data_id)
+        elif isinstance(obj, models.Application):
+            wd_ids.add(obj.workflow_data_id)
+
+    for obj in session.dirty:
+        if isinstance(obj, models.ApprovalData) and _changed(obj, "status", "approval_id", "workflow_data_id", "level"):
+            wd_ids |= _old_and_new(obj, "workflow_data_id")
+        elif isinstance(obj, models.Application) and _changed(obj, "status", "workflow_data_id"):
+            wd_ids |= _old_and_new(obj, "workflow_data_id")
+        elif isinstance(obj, models.Approval) and _changed(obj, "user_id"):
+            approval_ids.add(obj.id)
+
+    for obj in session.deleted:
+        if isinstance(obj, (models.ApprovalData, models.Application)):
+            wd_ids.add(inspect(obj).dict.get("workflow_data_id"))
+
+    if not wd_ids and not approval_ids:
+        return
+    connection = session.connection()
+    if approval_ids:
+        wd_ids |= set(connection.execute(
+            _WORKFLOW_DATA_OF_APPROVALS_SQL, {"approval_ids": sorted(approval_ids)}
+        ).scalars())
+    added = sync_workflow_data(connection, wd_ids)
+
+    # Tell approvers about work that just landed in their inbox
+    events.stage(session, [
+        events.make_event("approval.pending", [r.user_id], approval_data_id=r.approval_data_id, application_id=r.application_id)
+        for r in added
+    ])
+
+
+def inbox_for_user(db: Session, user_id: int, stage: Optional[str] = None, limit: int = 50) -> schemas.ApproverInboxOut:
+    """
+    Newest inbox items of an approver plus counts per stage. Both queries
+    read the approver_inbox rows of one user by index.
+    """
+    Inbox = models.ApproverInbox
+
+    counts: dict = {}
+    stage_levels: dict = {}
+    for level, n in (
+        db.query(Inbox.level, func.count())
+        .filter(Inbox.user_id == user_id)
+        .group_by(Inbox.level)
+        .all()
+    ):
+        key = stage_for_level(level)
+        counts[key] = counts.get(key, 0) + n
+        stage_levels.setdefault(key, []).append(level)
+
+    query = (
+        db.query(
+            Inbox.approval_data_id,
+            Inbox.application_id,
+            Inbox.level,
+            Inbox.pending_since,
+            models.Application.name.label("application_name"),
+            models.Application.status.label("application_status"),
+            models.Application.location_id,
+        )
+        .join(models.Application, models.Application.id == Inbox.application_id)
+        .filter(Inbox.user_id == user_id)
+    )
+    if stage:
+        # Stages are ranges of levels; reuse the levels seen while counting
+        levels = stage_levels.get(stage, [])
+        if not levels:
+            return schemas.ApproverInboxOut(total=sum(counts.values()), counts=counts, items=[])
+        condition = Inbox.level.in_([lvl for lvl in levels if lvl is not None])
+        if None in levels:
+            condition = or_(condition, Inbox.level.is_(None))
+        query = query.filter(condition)
+
+    rows = query.order_by(desc(Inbox.pending_since), desc(Inbox.approval_data_id)).limit(limit).all()
+    return schemas.ApproverInboxOut(
+        total=sum(counts.values()),
+        counts=counts,
+        items=[
+            schemas.ApproverInboxItem(**row._asdict(), stage=stage_for_level(row.level))
+            for row in rows
+        ],
+    )
+
+
+def rebuild(batch_size: int = 1000) -> None:
+    """Re-derive the whole inbox, e.g. after data was changed outside the API."""
+    db: Session = SessionLocal()
+    try:
+        connection = db.connection()
+        wd_ids = list(connection.execute(_REBUILD_SQL).scalars())
+        for start in range(0, len(wd_ids), batch_size):
+            sync_workflow_data(connection, wd_ids[start:start + batch_size])
+            db.commit()
+            connection = db.connection()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,155 @@
+"""
+Content-addressed document storage.
+
+Each distinct file content is stored once under UPLOAD_DIR/blobs/<aa>/<sha256><ext>
+and tracked by a document_blob row whose ref_count is the number of Document
+rows pointing at it. Uploads of known content reuse the existing file; the file
+is only removed when the last referencing document is deleted.
+
+Blob rows are locked (upsert / SELECT ... FOR UPDATE) for the rest of the
+caller's transaction, so a concurrent upload and delete of the same content
+cannot lose the file. A new blob's file is moved into place before the
+commit; if the transaction rolls back instead, a session hook removes it.
+"""
+import os
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal
+
+UPLOAD_DIR = "/app/ptw-uploads"
+BLOB_DIR = os.path.join(UPLOAD_DIR, "blobs")
+INCOMING_DIR = os.path.join(BLOB_DIR, "incoming")  # uploads being streamed in
+
+# Take a reference on a blob, creating it if needed. xmax = 0 only for a freshly inserted row.
+_ACQUIRE_SQL = text("""
+    INSERT INTO document_blob (sha256, path, size, ref_count, created_at)
+    VALUES (:sha256, :path, :size, 1, now())
+    ON CONFLICT (sha256) DO UPDATE SET ref_count = document_blob.ref_count + 1
+    RETURNING path, (xmax = 0) AS inserted
+""")
+
+_PLACED_KEY = "placed_blob_files"  # session.info: (path, inode) of files moved in by this transaction
+
+
+def blob_path(sha256: str, ext: str) -> str:
+    return os.path.join(BLOB_DIR, sha256[:2], f"{sha256}{ext.lower()}")
+
+
+def acquire_blob(db: Session, sha256: str, size: int, incoming_path: str, ext: str) -> str:
+    """
+    Reference the blob for `sha256`, moving the freshly streamed file at
+    `incoming_path` into place if this content is new, or discarding it if the
+    content is already stored. Returns the blob's path. Does not commit;
+    the file is removed again if the transaction rolls back.
+    """
+    row = db.execute(_ACQUIRE_SQL, {"sha256": sha256, "path": blob_path(sha256, ext), "size": size}).one()
+    if row.inserted:
+        os.makedirs(os.path.dirname(row.path), exist_ok=True)
+        os.replace(incoming_path, row.path)
+        db.info.setdefault(_PLACED_KEY, []).append((row.path, os.stat(row.path).st_ino))
+    else:
+        os.remove(incoming_path)
+    return row.path
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _keep_placed_files(session: Session) -> None:
+    session.info.pop(_PLACED_KEY, None)
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _remove_placed_files(session: Session, previous_transaction) -> None:
+    for path, inode in session.info.pop(_PLACED_KEY, []):
+        # The rollback released the row lock: an upload of the same content
+        # may already have moved its own file here, so only remove ours
+        try:
+            if os.stat(path).st_ino == inode:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def reference_existing_blob(db: Session, sha256: str, company_id: int) -> Optional[models.DocumentBlob]:
+    """
+    Take another reference on a blob already used by one of the company's
+    documents (the upload short-circuit). Returns None when the company has
+    no such content, in which case the client must upload the file.
+    """
+    blob = (
+        db.query(models.DocumentBlob)
+        .join(models.Document, models.Document.sha256 == models.DocumentBlob.sha256)
+        .filter(models.DocumentBlob.sha256 == sha256, models.Document.company_id == company_id)
+        .with_for_update(of=models.DocumentBlob)
+        .first()
+    )
+    if blob:
+        blob.ref_count += 1
+    return blob
+
+
+def create_document(db: Session, company_id: int, name: str, blob_path_: str, sha256: str) -> models.Document:
+    doc = models.Document(
+        company_id=company_id,
+        name=name,
+        path=blob_path_,
+        sha256=sha256,
+        time=datetime.utcnow(),
+    )
+    db.add(doc)
+    db.commit()
+    db.refresh(doc)
+    return doc
+
+
+def delete_document(db: Session, doc: models.Document) -> None:
+    """
+    Delete a document and release its blob, removing the file when this was
+    the last reference. Commits.
+    """
+    if not doc.sha256:
+        # Stored before deduplication: the file belongs to this document alone
+        path = doc.path
+        db.delete(doc)
+        db.commit()
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass
+        return
+
+    blob = db.get(models.DocumentBlob, doc.sha256, with_for_update=True)
+    db.delete(doc)
+    # No relationship between the two, so the unit of work wouldn't order the
+    # deletes by the FK: remove the referencing document row first
+    db.flush()
+    if blob is None:
+        db.commit()
+        return
+
+    blob.ref_count -= 1
+    if blob.ref_count > 0:
+        db.commit()
+        return
+
+    # Last reference: move the file aside while the row is still locked, so an
+    # upload of the same content waiting on the lock re-creates it afterwards.
+    path = blob.path
+    db.delete(blob)
+    tombstone = f"{path}.deleting"
+    moved = os.path.exists(path)
+    if moved:
+        os.replace(path, tombstone)
+    try:
+        db.commit()
+    except Exception:
+        if moved:
+            os.replace(tombstone, path)
+        raise
+    if moved:
+        os.remove(tombstone)
@@ -0,0 +1,218 @@
+"""
+Transactional email outbox.
+
+Request handlers call `enqueue_email` inside their own transaction; the
+dispatcher later claims pending rows, sends them in batches over one SMTP
+connection and retries failures with exponential backoff. A claim carries a
+token and is refreshed as each message starts sending; a dispatcher that
+stalls past the lease loses its rows and can no longer record them.
+
+Runs inside the API lifespan (OUTBOX_DISPATCHER_ENABLED) or standalone:
+    python -m app.backend.services.email_outbox
+"""
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from .. import metrics, models
+from ..config import settings
+from ..database import SessionLocal
+from ..utils.email import send_email_batch
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(db: Session, subject: str, recipients: List[str], body: str) -> models.EmailOutbox:
+    """
+    Add an email to the outbox. Does not commit: the row is written
+    together with the caller's transaction.
+    """
+    row = models.EmailOutbox(
+        subject=subject,
+        recipients=",".join(recipients),
+        body=body,
+        status="PENDING",
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(row)
+    return row
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    seconds = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def _claim_lease() -> timedelta:
+    """
+    How long a SENDING row may go without a heartbeat before another
+    dispatcher takes it over. The claim is refreshed as each message starts
+    sending, so the longest gap is connect + login before the first message,
+    or the last send + quit: two SMTP steps of up to MAIL_TIMEOUT each.
+    """
+    worst_case = 3 * settings.MAIL_TIMEOUT   # two steps plus headroom
+    return timedelta(seconds=max(settings.OUTBOX_CLAIM_LEASE_SECONDS or 0, worst_case))
+
+
+def _claim_batch(batch_size: int) -> Tuple[str, List[dict]]:
+    """
+    Lock and mark up to batch_size due rows as SENDING under a new claim
+    token. SKIP LOCKED lets several dispatchers (API replicas or CLI workers)
+    run side by side.
+    """
+    db: Session = SessionLocal()
+    token = uuid.uuid4().hex
+    try:
+        now = datetime.utcnow()
+        lease_expired = now - _claim_lease()
+        rows = (
+            db.query(models.EmailOutbox)
+            .filter(or_(
+                and_(models.EmailOutbox.status == "PENDING", models.EmailOutbox.next_attempt_at <= now),
+                # a dispatcher died mid-send; pick its rows up again
+                and_(models.EmailOutbox.status == "SENDING", models.EmailOutbox.claimed_at < lease_expired),
+            ))
+            .order_by(models.EmailOutbox.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        batch = []
+        for row in rows:
+            row.status = "SENDING"
+            row.claimed_at = now
+            row.claim_token = token
+            batch.append({
+                "id": row.id,
+                "subject": row.subject,
+                "recipients": [r for r in row.recipients.split(",") if r],
+                "body": row.body,
+            })
+        db.commit()
+        return token, batch
+    finally:
+        db.close()
+
+
+def _heartbeat(token: str, ids: List[int]) -> List[int]:
+    """
+    Refresh the claim on the batch's rows still held under `token`; returns
+    their ids (rows missing were taken over by another dispatcher).
+    """
+    db: Session = SessionLocal()
+    try:
+        held = db.execute(
+            update(models.EmailOutbox)
+            .where(
+                models.EmailOutbox.id.in_(ids),
+                models.EmailOutbox.status == "SENDING",
+                models.EmailOutbox.claim_token == token,
+            )
+            .values(claimed_at=datetime.utcnow())
+            .returning(models.EmailOutbox.id)
+        ).scalars().all()
+        db.commit()
+        return list(held)
+    finally:
+        db.close()
+
+
+def _record_results(token: str, results: List[tuple]) -> None:
+    """
+    Persist (outbox_id, error) pairs; error is None for delivered emails.
+    Only rows still claimed under `token` are updated.
+    """
+    db: Session = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        errors = dict(results)
+        rows = (
+            db.query(models.EmailOutbox)
+            .filter(
+                models.EmailOutbox.id.in_(list(errors)),
+                models.EmailOutbox.status == "SENDING",
+                models.EmailOutbox.claim_token == token,
+            )
+            .all()
+        )
+        for row in rows:
+            error = errors[row.id]
+            row.attempts += 1
+            if error is None:
+                row.status = "SENT"
+                row.sent_at = now
+                row.last_error = None
+            elif row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                row.status = "FAILED"
+                row.last_error = error
+                logger.error(f"Outbox email {row.id} failed permanently: {error}")
+            else:
+                row.status = "PENDING"
+                row.last_error = error
+                row.next_attempt_at = now + _retry_delay(row.attempts)
+        db.commit()
+    finally:
+        db.close()
+
+
+async def dispatch_once(batch_size: Optional[int] = None) -> int:
+    """
+    Claim one batch, send it and record the outcome. Returns the batch size.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    token, batch = await asyncio.to_thread(_claim_batch, batch_size)
+    if not batch:
+        return 0
+    ids = [m["id"] for m in batch]
+
+    async def heartbeat(message: dict) -> bool:
+        # Keep the whole batch's claim fresh; skip a message we no longer hold
+        held = await asyncio.to_thread(_heartbeat, token, ids)
+        return message["id"] in held
+
+    started = time.perf_counter()
+    try:
+        errors = await send_email_batch(batch, before_send=heartbeat)
+    except Exception as e:
+        # Connection/login failure: the whole batch is retried later
+        logger.warning(f"SMTP batch of {len(batch)} failed: {e}")
+        errors = [str(e)] * len(batch)
+    metrics.EMAIL_BATCH_SECONDS.observe(time.perf_counter() - started)
+    for err in errors:
+        metrics.EMAILS.labels("sent" if err is None else "skipped" if err == "skipped" else "error").inc()
+
+    await asyncio.to_thread(_record_results, token, [(m["id"], err) for m, err in zip(batch, errors)])
+    return len(batch)
+
+
+async def run_dispatcher(stop: Optional[asyncio.Event] = None) -> None:
+    """
+    Drain the outbox until `stop` is set, sleeping between polls when idle.
+    """
+    stop = stop or asyncio.Event()
+    logger.info("Email outbox dispatcher started")
+    while not stop.is_set():
+        try:
+            sent = await dispatch_once()
+        except Exception:
+            logger.exception("Email outbox dispatch failed")
+            sent = 0
+
+        if sent < settings.OUTBOX_BATCH_SIZE:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.OUTBOX_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    logger.info("Email outbox dispatcher stopped")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_dispatcher())
@@ -0,0 +1,193 @@
+"""
+Server-push events for connected clients (WebSocket / SSE).
+
+Events are small JSON dicts addressed to user ids:
+    {"type": "approval.pending",    "data": {"approval_data_id", "application_id"}}
+    {"type": "application.status",  "data": {"application_id", "status"}}
+    {"type": "notification.created", "data": {"notification_id", "title"}}
+
+Writes stage events on their session (`stage`); they are delivered only if
+the transaction commits. Delivery goes through a backend:
+
+- "local": an in-process pub/sub; events reach clients connected to this process.
+- "postgres": events are sent with pg_notify inside the writing transaction
+  (so Postgres delivers them on commit) and every replica LISTENs and fans
+  them out to its own clients.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+from ..database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "ptw_events"
+_PENDING_KEY = "pending_events"
+
+
+def make_event(event_type: str, user_ids: Iterable[int], **data) -> dict:
+    return {"type": event_type, "users": sorted({u for u in user_ids if u is not None}), "data": data, "ts": time.time()}
+
+
+class EventBus:
+    """
+    Per-user subscriber queues living on the API event loop. `dispatch` may
+    be called from any thread (request threadpool, scheduler).
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    # --- subscribers (event loop side) ---
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return sum(len(q) for q in self._subscribers.values())
+
+    def _deliver(self, evt: dict) -> None:
+        with self._lock:
+            queues = [q for u in evt["users"] for q in self._subscribers.get(u, ())]
+        message = {k: v for k, v in evt.items() if k != "users"}
+        for queue in queues:
+            if queue.full():
+                # Slow client: drop its oldest event rather than block everyone
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    def dispatch(self, evt: dict) -> None:
+        """Hand an event to this process's subscribers, from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(evt)
+        else:
+            loop.call_soon_threadsafe(self._deliver, evt)
+
+    # --- lifecycle ---
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        if settings.EVENTS_BACKEND == "postgres":
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._loop = None
+
+    async def _listen(self) -> None:
+        """LISTEN on the events channel and deliver to local subscribers; reconnects on errors."""
+        import psycopg
+
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        delay = 1
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    delay = 1
+                    async for notify in conn.notifies():
+                        try:
+                            self._deliver(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning("Ignoring malformed event payload")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event listener disconnected ({e}); retrying in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+
+
+bus = EventBus(queue_size=settings.EVENTS_QUEUE_SIZE)
+
+
+def _notify(connection, events: list) -> None:
+    for evt in events:
+        connection.execute(select(func.pg_notify(CHANNEL, json.dumps(evt, separators=(",", ":")))))
+
+
+def stage(session: Session, events: list) -> None:
+    """Queue events to be delivered when the session's transaction commits."""
+    events = [e for e in events if e["users"]]
+    if not events:
+        return
+    if settings.EVENTS_BACKEND == "postgres":
+        # NOTIFY is transactional: Postgres delivers it on commit, drops it on rollback
+        _notify(session.connection(), events)
+    else:
+        session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+
+def publish(events: list) -> None:
+    """Deliver events right away, for work done outside an ORM session (e.g. the scheduler)."""
+    events = [e for e in events if e["users"]]
+    if not events:
+        return
+    if settings.EVENTS_BACKEND == "postgres":
+        with engine.begin() as conn:
+            _notify(conn, events)
+    else:
+        for evt in events:
+            bus.dispatch(evt)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_events(session: Session, flush_context) -> None:
+    events = []
+    for obj in session.new:
+        if isinstance(obj, models.Notification):
+            events.append(make_event("notification.created", [obj.user_id], notification_id=obj.id, title=obj.title))
+        elif isinstance(obj, models.Application) and obj.status:
+            events.append(make_event("application.status", [obj.applicant_id], application_id=obj.id, status=obj.status))
+    for obj in session.dirty:
+        if isinstance(obj, models.Application) and inspect(obj).attrs.status.history.has_changes():
+            events.append(make_event("application.status", [obj.applicant_id], application_id=obj.id, status=obj.status))
+    stage(session, events)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_committed(session: Session) -> None:
+    for evt in session.info.pop(_PENDING_KEY, []):
+        bus.dispatch(evt)
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _drop_rolled_back(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
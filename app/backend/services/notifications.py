@@ -1,28 +1,213 @@
-import json, time, requests, jwt
+"""
+Push notifications through FCM (HTTP v1).
+
+One FcmClient per process keeps the OAuth access token until shortly before
+it expires and sends over a pooled requests.Session. `push_to_user` fans a
+message out to all of a user's PushToken rows in parallel and deletes tokens
+FCM reports as no longer registered. Notification rows trigger a push after
+their transaction commits.
+
+FCM_TOKEN_URL / FCM_API_BASE can point at a local stand-in
+(benchmarks/fake_fcm_server.py) for testing.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import jwt
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .. import metrics, models
 from ..config import settings
+from ..database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+FCM_SCOPE = "https://www.googleapis.com/auth/firebase.messaging"
+_PENDING_KEY = "pending_pushes"
+
+
+@dataclass
+class PushResult:
+    token: str
+    ok: bool
+    invalid_token: bool = False   # FCM says the token is gone: delete it
+    error: Optional[str] = None
+
+
+class FcmClient:
+    def __init__(self):
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=settings.FCM_MAX_CONCURRENCY)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self.token_fetches = 0
+
+    @property
+    def configured(self) -> bool:
+        return bool(settings.FCM_PROJECT_ID and settings.FCM_SA_EMAIL and settings.FCM_SA_PRIVATE_KEY)
+
+    def _fetch_token(self) -> None:
+        iat = int(time.time())
+        assertion = jwt.encode(
+            {
+                "iss": settings.FCM_SA_EMAIL,
+                "scope": FCM_SCOPE,
+                "aud": "https://oauth2.googleapis.com/token",
+                "iat": iat, "exp": iat + 3600,
+            },
+            # Keys from env files often carry escaped newlines
+            settings.FCM_SA_PRIVATE_KEY.replace("\\n", "\n"),
+            algorithm="RS256",
+        )
+        resp = self._session.post(
+            settings.FCM_TOKEN_URL,
+            data={"grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer", "assertion": assertion},
+            timeout=settings.FCM_TIMEOUT_SECONDS,
+        )
+        resp.raise_for_status()
+        body = resp.json()
+        self._token = body["access_token"]
+        self._token_expires_at = time.time() + int(body.get("expires_in", 3600))
+        self.token_fetches += 1
+        metrics.FCM_TOKEN_FETCHES.inc()
+
+    def access_token(self, force_refresh: bool = False) -> str:
+        """Cached OAuth token, renewed FCM_TOKEN_REFRESH_MARGIN_SECONDS before expiry."""
+        with self._token_lock:
+            if force_refresh or not self._token or time.time() >= self._token_expires_at - settings.FCM_TOKEN_REFRESH_MARGIN_SECONDS:
+                self._fetch_token()
+            return self._token
+
+    def send(self, device_token: str, title: str, body: str, data: Optional[dict] = None) -> PushResult:
+        url = f"{settings.FCM_API_BASE}/v1/projects/{settings.FCM_PROJECT_ID}/messages:send"
+        payload = {
+            "message": {
+                "token": device_token,
+                "notification": {"title": title, "body": body},
+                # FCM data values must be strings
+                "data": {k: str(v) for k, v in (data or {}).items()},
+            }
+        }
+        started = time.perf_counter()
+        try:
+            for attempt in range(2):
+                resp = self._session.post(
+                    url,
+                    headers={"Authorization": f"Bearer {self.access_token(force_refresh=attempt > 0)}"},
+                    json=payload,
+                    timeout=settings.FCM_TIMEOUT_SECONDS,
+                )
+                if resp.status_code != 401:
+                    break  # 401: token revoked early, refresh once and retry
+        except requests.RequestException as e:
+            return PushResult(token=device_token, ok=False, error=str(e))
+        finally:
+            metrics.PUSH_SEND_SECONDS.observe(time.perf_counter() - started)
+
+        if resp.ok:
+            return PushResult(token=device_token, ok=True)
+        return PushResult(
+            token=device_token,
+            ok=False,
+            invalid_token=_is_invalid_token(resp),
+            error=f"{resp.status_code} {resp.text[:200]}",
+        )
+
+
+def _is_invalid_token(resp: requests.Response) -> bool:
+    try:
+        error = resp.json().get("error", {})
+    except ValueError:
+        return False
+    codes = {d.get("errorCode") for d in error.get("details", []) if isinstance(d, dict)}
+    if "UNREGISTERED" in codes:
+        return True
+    # INVALID_ARGUMENT is also used for bad payloads; only prune when it's about the token
+    return resp.status_code == 400 and "registration token" in error.get("message", "").lower()
+
+
+fcm = FcmClient()
+# Two pools: per-user tasks block on their device sends, so sharing one pool
+# would deadlock once every worker is a user task waiting on queued sends.
+_send_executor = ThreadPoolExecutor(max_workers=settings.FCM_MAX_CONCURRENCY, thread_name_prefix="fcm-send")
+_user_executor = ThreadPoolExecutor(max_workers=settings.FCM_MAX_CONCURRENCY, thread_name_prefix="fcm-user")
 
-def _jwt_for_fcm():
-    iat = int(time.time())
-    payload = {
-        "iss": settings.FCM_SA_EMAIL,
-        "scope": "https://www.googleapis.com/auth/firebase.messaging",
-        "aud": "https://oauth2.googleapis.com/token",
-        "iat": iat, "exp": iat + 3600,
-    }
-    token = jwt.encode(payload, settings.FCM_SA_PRIVATE_KEY, algorithm="RS256")
-    resp = requests.post("https://oauth2.googleapis.com/token", data={
-        "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
-        "assertion": token
-    })
-    resp.raise_for_status()
-    return resp.json()["access_token"]
 
 def send_push(device_token: str, title: str, body: str, data: dict | None = None):
-    if not settings.FCM_PROJECT_ID:
+    if not fcm.configured:
+        return {"skipped": True, "reason": "FCM not configured"}
+    result = fcm.send(device_token, title, body, data)
+    return {"ok": result.ok, "invalid_token": result.invalid_token, "error": result.error}
+
+
+def push_to_user(db: Session, user_id: int, title: str, body: str, data: Optional[dict] = None) -> dict:
+    """
+    Send to every device of a user in parallel and delete tokens FCM rejected
+    as unregistered. Commits the deletions.
+    """
+    if not fcm.configured:
         return {"skipped": True, "reason": "FCM not configured"}
-    access_token = _jwt_for_fcm()
-    url = f"https://fcm.googleapis.com/v1/projects/{settings.FCM_PROJECT_ID}/messages:send"
-    payload = {"message": {"token": device_token, "notification": {"title": title, "body": body}, "data": data or {}}}
-    r = requests.post(url, headers={"Authorization": f"Bearer {access_token}"}, json=payload)
-    r.raise_for_status()
-    return r.json()
+    tokens = [t for (t,) in db.query(models.PushToken.token).filter(models.PushToken.user_id == user_id).all()]
+    if not tokens:
+        return {"sent": 0, "failed": 0, "pruned": 0}
+
+    results = list(_send_executor.map(lambda t: fcm.send(t, title, body, data), tokens))
+
+    for r in results:
+        metrics.PUSHES.labels("sent" if r.ok else "invalid_token" if r.invalid_token else "failed").inc()
+
+    invalid = [r.token for r in results if r.invalid_token]
+    if invalid:
+        db.query(models.PushToken).filter(models.PushToken.token.in_(invalid)).delete(synchronize_session=False)
+        db.commit()
+    for r in results:
+        if not r.ok and not r.invalid_token:
+            logger.warning(f"Push to user {user_id} failed: {r.error}")
+    return {
+        "sent": sum(r.ok for r in results),
+        "failed": sum(not r.ok for r in results),
+        "pruned": len(invalid),
+    }
+
+
+def _push_in_background(user_id: int, title: str, body: str, data: dict) -> None:
+    db = SessionLocal()
+    try:
+        push_to_user(db, user_id, title, body, data)
+    except Exception:
+        logger.exception(f"Push to user {user_id} failed")
+    finally:
+        db.close()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_pushes(session: Session, flush_context) -> None:
+    if not fcm.configured:
+        return
+    for obj in session.new:
+        if isinstance(obj, models.Notification):
+            session.info.setdefault(_PENDING_KEY, []).append(
+                (obj.user_id, obj.title, obj.message, {"notification_id": obj.id})
+            )
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _send_committed_pushes(session: Session) -> None:
+    # Off the request thread: one task per user, each fanning out to its devices
+    for user_id, title, body, data in session.info.pop(_PENDING_KEY, []):
+        _user_executor.submit(_push_in_background, user_id, title, body, data)
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _drop_rolled_back_pushes(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
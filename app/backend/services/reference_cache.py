@@ -0,0 +1,146 @@
+"""
+In-process cache of a company's reference data (permit types, groups,
+locations, safety equipment, departments), which changes a few times a month
+but is read on every app launch.
+
+Each company's snapshot carries a version and a content hash. Writes through
+the CRUD factory (`reference_key=`) invalidate the company; the TTL bounds
+staleness for changes made by other replicas or outside the API.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..config import settings
+
+# Section name -> model. Every model here has (id, company_id, name).
+SECTIONS = {
+    "permit_types": models.PermitType,
+    "groups": models.Group,
+    "locations": models.Location,
+    "safety_equipments": models.SafetyEquipment,
+    "departments": models.Department,
+}
+
+
+@dataclass(frozen=True)
+class ReferenceSnapshot:
+    company_id: int
+    version: int
+    etag: str                           # hash of the content, identical across replicas
+    sections: dict = field(repr=False)  # section -> list of {"id", "company_id", "name"} ordered by id
+    body: bytes = field(repr=False)     # serialized /bootstrap payload
+
+    def options(self, section: str) -> list:
+        """`{"value", "label"}` pairs sorted by name, for select inputs."""
+        rows = sorted(self.sections[section], key=lambda r: r["name"])
+        return [{"value": r["id"], "label": r["name"]} for r in rows]
+
+
+class ReferenceCache:
+    """
+    Bounded LRU of ReferenceSnapshot per company, with a TTL.
+    Versions come from one counter: a snapshot loaded at version v is only
+    stored if its company wasn't invalidated after v started loading.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[int, tuple[float, ReferenceSnapshot]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = count(1)
+        self._invalidated_at: dict[int, int] = {}  # company_id -> version of its last invalidation
+        self._cleared_at = 0
+
+    def get(self, company_id: int) -> Optional[ReferenceSnapshot]:
+        with self._lock:
+            entry = self._items.get(company_id)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at < time.monotonic():
+                del self._items[company_id]
+                return None
+            self._items.move_to_end(company_id)
+            return snapshot
+
+    def next_version(self) -> int:
+        with self._lock:
+            return next(self._versions)
+
+    def put(self, snapshot: ReferenceSnapshot) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            # A write committed while we were loading wins: drop the stale result
+            last_invalidated = max(self._invalidated_at.get(snapshot.company_id, 0), self._cleared_at)
+            if last_invalidated > snapshot.version:
+                return
+            self._items[snapshot.company_id] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._items.move_to_end(snapshot.company_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, company_id: Optional[int] = None) -> None:
+        """Drop one company's snapshot, or every snapshot when company_id is None."""
+        with self._lock:
+            version = next(self._versions)
+            if company_id is None:
+                self._items.clear()
+                self._invalidated_at.clear()
+                self._cleared_at = version
+            else:
+                self._items.pop(company_id, None)
+                self._invalidated_at[company_id] = version
+
+
+reference_cache = ReferenceCache(
+    max_size=settings.REFERENCE_CACHE_MAX_COMPANIES,
+    ttl_seconds=settings.REFERENCE_CACHE_TTL_SECONDS,
+)
+
+
+def _load(db: Session, company_id: int, version: int) -> ReferenceSnapshot:
+    sections = {}
+    for section, Model in SECTIONS.items():
+        rows = (
+            db.query(Model.id, Model.company_id, Model.name)
+            .filter(Model.company_id == company_id)
+            .order_by(Model.id)
+            .all()
+        )
+        sections[section] = [{"id": r.id, "company_id": r.company_id, "name": r.name} for r in rows]
+    body = json.dumps({"company_id": company_id, **sections}, separators=(",", ":")).encode()
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return ReferenceSnapshot(
+        company_id=company_id, version=version, etag=f'"ref-{digest}"', sections=sections, body=body
+    )
+
+
+def get_reference_data(db: Session, company_id: int) -> ReferenceSnapshot:
+    """The company's snapshot, loading it (five small queries) on a miss."""
+    snapshot = reference_cache.get(company_id)
+    if snapshot is not None:
+        return snapshot
+    snapshot = _load(db, company_id, reference_cache.next_version())
+    reference_cache.put(snapshot)
+    return snapshot
+
+
+def invalidate_for(obj) -> None:
+    """
+    CRUD after_commit hook: invalidate the company of a written row. Reads the
+    already-loaded company_id so it also works for deleted (detached) rows.
+    """
+    company_id = inspect(obj).dict.get("company_id")
+    reference_cache.invalidate(company_id)
@@ -0,0 +1,163 @@
+"""
+Application status counters for dashboards.
+
+application_status_count holds the number of applications per
+(location, applicant, status), with the location's company denormalized.
+Writers never update it directly: a session hook appends +1/-1 rows to
+application_status_delta whenever an application is created, deleted or
+changes status/location/applicant (the expiry sweep does the same in SQL),
+and `fold_deltas` periodically moves them into the counters in one
+statement. Appending avoids row-lock contention on hot counters; readers add
+the few not-yet-folded deltas, so counts are always exact.
+"""
+import logging
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import event, func, inspect, literal_column, select, text, union_all
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..database import SessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+NO_STATUS = "NONE"  # application.status is nullable; counters need a key
+
+# Cluster-wide lock so only one replica folds at a time
+STATS_FOLD_LOCK_KEY = 7_307_003
+
+_APPEND_DELTA_SQL = text("""
+    INSERT INTO application_status_delta (company_id, location_id, applicant_id, status, delta)
+    SELECT l.company_id, CAST(:location_id AS integer), CAST(:applicant_id AS integer),
+           CAST(:status AS varchar), CAST(:delta AS smallint)
+      FROM location l WHERE l.id = :location_id
+""")
+
+# Move every delta into the counters atomically
+_FOLD_SQL = text("""
+    WITH moved AS (
+        DELETE FROM application_status_delta RETURNING company_id, location_id, applicant_id, status, delta
+    )
+    INSERT INTO application_status_count AS c (location_id, applicant_id, status, company_id, count)
+    SELECT location_id, applicant_id, status, company_id, sum(delta)
+      FROM moved
+     GROUP BY location_id, applicant_id, status, company_id
+    ON CONFLICT (location_id, applicant_id, status)
+    DO UPDATE SET count = c.count + EXCLUDED.count
+""")
+
+_REBUILD_SQL = [
+    text("LOCK TABLE application_status_delta IN EXCLUSIVE MODE"),
+    text("DELETE FROM application_status_delta"),
+    text("DELETE FROM application_status_count"),
+    text(f"""
+        INSERT INTO application_status_count (location_id, applicant_id, status, company_id, count)
+        SELECT a.location_id, a.applicant_id, coalesce(a.status, '{NO_STATUS}'), l.company_id, count(*)
+          FROM application a
+          JOIN location l ON l.id = a.location_id
+         GROUP BY a.location_id, a.applicant_id, coalesce(a.status, '{NO_STATUS}'), l.company_id
+    """),
+]
+
+
+def _key(location_id, applicant_id, status) -> tuple:
+    return (location_id, applicant_id, status or NO_STATUS)
+
+
+def _old_value(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else state.dict.get(attr)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _record_status_changes(session: Session, flush_context) -> None:
+    deltas: Counter = Counter()
+    for obj in session.new:
+        if isinstance(obj, models.Application):
+            deltas[_key(obj.location_id, obj.applicant_id, obj.status)] += 1
+
+    for obj in session.dirty:
+        if not isinstance(obj, models.Application):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[a].history.has_changes() for a in ("status", "location_id", "applicant_id")):
+            continue
+        old = _key(*(_old_value(state, a) for a in ("location_id", "applicant_id", "status")))
+        new = _key(obj.location_id, obj.applicant_id, obj.status)
+        if old != new:
+            deltas[old] -= 1
+            deltas[new] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, models.Application):
+            d = inspect(obj).dict
+            deltas[_key(d.get("location_id"), d.get("applicant_id"), d.get("status"))] -= 1
+
+    rows = [
+        {"location_id": loc, "applicant_id": applicant, "status": status, "delta": delta}
+        for (loc, applicant, status), delta in sorted(deltas.items(), key=lambda kv: tuple(map(str, kv[0])))
+        if delta and loc is not None and applicant is not None
+    ]
+    if rows:
+        session.connection().execute(_APPEND_DELTA_SQL, rows)
+
+
+def fold_deltas() -> int:
+    """Fold pending deltas into the counters. Returns the number of counters touched."""
+    with engine.connect() as conn:
+        locked = conn.execute(select(func.pg_try_advisory_xact_lock(STATS_FOLD_LOCK_KEY))).scalar()
+        if not locked:
+            return 0
+        touched = conn.execute(_FOLD_SQL).rowcount
+        conn.commit()
+    return touched
+
+
+def rebuild() -> None:
+    """Recount everything from the application table (repair / first fill)."""
+    with engine.begin() as conn:
+        conn.execute(select(func.pg_advisory_xact_lock(STATS_FOLD_LOCK_KEY)))
+        for statement in _REBUILD_SQL:
+            conn.execute(statement)
+
+
+def application_counts(
+    db: Session,
+    company_id: int,
+    location_id: Optional[int] = None,
+    applicant_id: Optional[int] = None,
+    group_by: Optional[str] = None,
+) -> list:
+    """
+    [(group key or None, status, count)] for one company, from the counters
+    plus not-yet-folded deltas. `group_by` is "location" or "applicant".
+    """
+    def filtered(table, value_column):
+        columns = [table.c.status, value_column.label("n")]
+        if group_by:
+            columns.insert(0, table.c[f"{group_by}_id"].label("group_key"))
+        else:
+            columns.insert(0, literal_column("NULL").label("group_key"))
+        stmt = select(*columns).where(table.c.company_id == company_id)
+        if location_id is not None:
+            stmt = stmt.where(table.c.location_id == location_id)
+        if applicant_id is not None:
+            stmt = stmt.where(table.c.applicant_id == applicant_id)
+        return stmt
+
+    counts = models.ApplicationStatusCount.__table__
+    deltas = models.ApplicationStatusDelta.__table__
+    combined = union_all(filtered(counts, counts.c.count), filtered(deltas, deltas.c.delta)).subquery()
+    stmt = (
+        select(combined.c.group_key, combined.c.status, func.sum(combined.c.n).label("n"))
+        .group_by(combined.c.group_key, combined.c.status)
+        .having(func.sum(combined.c.n) != 0)
+    )
+    return [(r.group_key, r.status, int(r.n)) for r in db.execute(stmt)]
+
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,190 @@
+"""
+Bulk worker import from CSV/XLSX, with an optional zip of pictures.
+
+Rows are read and validated one at a time and inserted in batches with a
+single multi-row INSERT per batch. Rows whose ic_passport already exists in
+the company (or earlier in the same file) are skipped. Pictures are matched
+by file name: `<ic_passport>.jpg` / `.png` / ... anywhere in the zip.
+"""
+import csv
+import os
+import re
+import shutil
+import uuid
+import zipfile
+from typing import Iterator, Optional
+
+from openpyxl import load_workbook
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from ..config import settings
+from ..utils import images
+from ..utils.uploads import MB
+
+UPLOADS_DIR = "/app/ptw-uploads"
+
+BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+PICTURE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+# Serializes imports per company so two concurrent imports can't both insert the same ic_passport
+WORKER_IMPORT_LOCK_KEY = 7_307_002
+
+COLUMNS = ("name", "ic_passport", "contact", "employment_status", "employment_type", "position")
+
+
+def _normalize_header(value) -> str:
+    return re.sub(r"[\s/-]+", "_", str(value or "").strip().lower())
+
+
+def _row_dict(headers: list, values) -> dict:
+    row = {}
+    for header, value in zip(headers, values):
+        if header in COLUMNS and value is not None and str(value).strip() != "":
+            row[header] = value
+    return row
+
+
+def iter_csv_rows(path: str) -> Iterator[tuple[int, dict]]:
+    # utf-8-sig drops the BOM Excel puts in front of exported CSVs
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        headers = [_normalize_header(h) for h in next(reader, [])]
+        for line_no, values in enumerate(reader, start=2):
+            if any(v.strip() for v in values):
+                yield line_no, _row_dict(headers, values)
+
+
+def iter_xlsx_rows(path: str) -> Iterator[tuple[int, dict]]:
+    # read_only streams the sheet instead of loading it into memory
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [_normalize_header(h) for h in next(rows, ())]
+        for row_no, values in enumerate(rows, start=2):
+            if any(v is not None and str(v).strip() != "" for v in values):
+                yield row_no, _row_dict(headers, values)
+    finally:
+        workbook.close()
+
+
+def missing_columns(path: str, kind: str) -> list:
+    """Required columns absent from the header row."""
+    if kind == "xlsx":
+        workbook = load_workbook(path, read_only=True)
+        try:
+            headers = {_normalize_header(h) for h in next(workbook.active.iter_rows(values_only=True), ())}
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            headers = {_normalize_header(h) for h in next(csv.reader(f), [])}
+    return [c for c in ("name", "ic_passport") if c not in headers]
+
+
+class _PictureArchive:
+    """Pictures in the zip, keyed by file name stem (the worker's ic_passport)."""
+
+    def __init__(self, path: Optional[str], company_id: int):
+        self.zip = zipfile.ZipFile(path) if path else None
+        self.company_id = company_id
+        self.entries = {}
+        self.written = []  # absolute paths, removed again if the import fails
+        if self.zip:
+            for info in self.zip.infolist():
+                stem, ext = os.path.splitext(os.path.basename(info.filename))
+                if not info.is_dir() and ext.lower() in PICTURE_EXTENSIONS and not stem.startswith("."):
+                    self.entries[stem.strip().lower()] = info
+
+    def extract(self, ic_passport: str) -> Optional[str]:
+        """Copy the worker's picture into place; returns its relative path."""
+        info = self.entries.get(ic_passport.lower())
+        if not info or info.file_size > settings.UPLOAD_MAX_IMAGE_MB * MB:
+            return None
+        safe_filename = re.sub(r'[^a-zA-Z0-9_.-]', '', os.path.basename(info.filename))
+        relative = os.path.join("workers", str(self.company_id), "picture", f"{uuid.uuid4()}_{safe_filename}")
+        full_path = os.path.join(UPLOADS_DIR, relative)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with self.zip.open(info) as src, open(full_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        self.written.append(full_path)
+        images.generate_derivatives(full_path)
+        return relative
+
+    def discard_written(self) -> None:
+        for path in self.written:
+            if os.path.isfile(path):
+                os.remove(path)
+            images.remove_derivatives(path)
+
+    def close(self) -> None:
+        if self.zip:
+            self.zip.close()
+
+
+def import_workers(
+    db: Session,
+    company_id: int,
+    rows: Iterator[tuple[int, dict]],
+    pictures_zip: Optional[str] = None,
+    batch_size: int = BATCH_SIZE,
+) -> schemas.WorkerImportResult:
+    """
+    Validate and insert workers for one company. All batches are committed
+    together at the end, so a failed import leaves nothing behind.
+    """
+    db.execute(select(func.pg_advisory_xact_lock(WORKER_IMPORT_LOCK_KEY, company_id)))
+    seen = {
+        ic.lower()
+        for ic in db.execute(
+            select(models.Worker.ic_passport).where(models.Worker.company_id == company_id)
+        ).scalars()
+    }
+
+    result = schemas.WorkerImportResult(created=0, duplicates=0, pictures_attached=0)
+    archive = _PictureArchive(pictures_zip, company_id)
+    batch = []
+
+    def flush():
+        if batch:
+            db.execute(insert(models.Worker), batch)
+            result.created += len(batch)
+            batch.clear()
+
+    try:
+        for row_no, raw in rows:
+            try:
+                row = schemas.WorkerImportRow.model_validate(raw)
+            except ValidationError as e:
+                if len(result.errors) < MAX_REPORTED_ERRORS:
+                    result.errors.append(schemas.WorkerImportError(
+                        row=row_no,
+                        ic_passport=str(raw.get("ic_passport") or "") or None,
+                        errors=[f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()],
+                    ))
+                continue
+
+            key = row.ic_passport.lower()
+            if key in seen:
+                result.duplicates += 1
+                continue
+            seen.add(key)
+
+            picture = archive.extract(row.ic_passport) if archive.zip else None
+            if picture:
+                result.pictures_attached += 1
+            batch.append({"company_id": company_id, **row.model_dump(), "picture": picture})
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        db.commit()
+    except BaseException:
+        db.rollback()
+        archive.discard_written()
+        raise
+    finally:
+        archive.close()
+    return result
@@ -0,0 +1,192 @@
+"""
+Development / test SQL inspection: statements per request, N+1 detection
+and per-route query budgets. Off unless SQL_INSPECTION_ENABLED is set.
+
+- Every statement run while handling a request is counted and grouped by
+  shape (the SQL text with IN-lists collapsed). A shape repeated
+  SQL_REPEAT_THRESHOLD times in one request is logged as a suspected N+1,
+  with the route and, for ORM relationship loads, the relationship
+  ("ApprovalData.approval").
+- Routes declare a budget with @query_budget(n) (or get SQL_DEFAULT_BUDGET).
+  Going over it logs a warning; with SQL_BUDGET_STRICT the offending
+  statement raises QueryBudgetExceeded, so the request fails with a 500 and
+  so does any test calling it.
+- Responses carry the statement count in X-Query-Count.
+
+Outside HTTP (service-level tests), `count_queries(max_statements=n)` does
+the same for a block of code.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A route or block ran more statements than its declared budget."""
+
+
+def query_budget(max_statements: int) -> Callable:
+    """Declare the most statements an endpoint may run; put it below @router.get(...)."""
+    def decorate(endpoint):
+        endpoint.__query_budget__ = max_statements
+        return endpoint
+    return decorate
+
+
+def statement_shape(statement: str) -> str:
+    return _WHITESPACE.sub(" ", _IN_LIST.sub("IN (...)", statement)).strip()
+
+
+class QueryTracker:
+    def __init__(self, label: str, budget: Optional[int] = None, scope: Optional[dict] = None):
+        self.label = label
+        self._budget = budget
+        self._scope = scope              # HTTP scope: the matched route is known only after routing
+        self.statements = 0
+        self.shapes: Counter = Counter()
+        self.relationships: Counter = Counter()
+        self._next_relationship: Optional[str] = None
+        self._shape_relationship: dict = {}
+        self.over_budget = False
+
+    @property
+    def route(self) -> str:
+        route = self._scope.get("route") if self._scope else None
+        return f"{self._scope['method']} {route.path}" if route is not None else self.label
+
+    @property
+    def budget(self) -> Optional[int]:
+        if self._budget is not None:
+            return self._budget
+        route = self._scope.get("route") if self._scope else None
+        budget = getattr(getattr(route, "endpoint", None), "__query_budget__", None)
+        return budget if budget is not None else (settings.SQL_DEFAULT_BUDGET or None)
+
+    def record(self, statement: str) -> None:
+        shape = statement_shape(statement)
+        self.statements += 1
+        self.shapes[shape] += 1
+        if self._next_relationship:
+            self._shape_relationship.setdefault(shape, self._next_relationship)
+            self._next_relationship = None
+
+        budget = self.budget
+        if budget is not None and self.statements > budget and not self.over_budget:
+            self.over_budget = True
+            message = f"{self.route} exceeded its query budget of {budget}"
+            if settings.SQL_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    def suspects(self) -> list:
+        """[(count, shape, relationship or None)] for shapes repeated past the threshold."""
+        return [
+            (n, shape, self._shape_relationship.get(shape))
+            for shape, n in self.shapes.most_common()
+            if n >= settings.SQL_REPEAT_THRESHOLD
+        ]
+
+    def report(self) -> None:
+        for n, shape, relationship in self.suspects():
+            via = f" via {relationship}" if relationship else ""
+            logger.warning(f"Possible N+1 in {self.route}: {n}x{via}: {shape[:300]}")
+        budget = self.budget
+        if budget is not None and self.statements > budget:
+            logger.warning(f"{self.route} ran {self.statements} statements (budget {budget})")
+
+
+_current: ContextVar[Optional[QueryTracker]] = ContextVar("sql_inspection_tracker", default=None)
+
+
+def _relationship_name(orm_execute_state) -> Optional[str]:
+    path = orm_execute_state.loader_strategy_path
+    prop = getattr(path, "prop", None) if path is not None else None
+    if prop is not None:
+        return f"{prop.parent.class_.__name__}.{prop.key}"
+    state = orm_execute_state.lazy_loaded_from
+    return f"{state.class_.__name__}.<relationship>" if state is not None else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tracker = _current.get()
+    if tracker is not None:
+        tracker.record(statement)
+
+
+def _do_orm_execute(orm_execute_state):
+    tracker = _current.get()
+    if tracker is not None and orm_execute_state.is_relationship_load:
+        name = _relationship_name(orm_execute_state)
+        if name:
+            tracker.relationships[name] += 1
+            tracker._next_relationship = name
+
+
+def install(engines: dict) -> None:
+    """Hook the given engines (name -> sync Engine) and every ORM Session."""
+    for engine in engines.values():
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    if not event.contains(Session, "do_orm_execute", _do_orm_execute):
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
+
+
+@contextmanager
+def count_queries(max_statements: Optional[int] = None, label: str = "block"):
+    """
+    Track the statements run inside the block (install() must have run):
+
+        with count_queries(max_statements=3) as q:
+            project_applications(db, ids)
+        assert not q.suspects()
+    """
+    tracker = QueryTracker(label, budget=max_statements)
+    token = _current.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current.reset(token)
+    if max_statements is not None and tracker.statements > max_statements:
+        raise QueryBudgetExceeded(f"{label} ran {tracker.statements} statements (budget {max_statements})")
+
+
+class SqlInspectionMiddleware:
+    """Pure ASGI middleware giving each HTTP request its own QueryTracker."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tracker = QueryTracker(f"{scope['method']} {scope['path']}", scope=scope)
+        token = _current.set(tracker)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                header = (QUERY_COUNT_HEADER.lower().encode(), str(tracker.statements).encode())
+                message["headers"] = [*message.get("headers", []), header]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            tracker.report()
@@ -0,0 +1,91 @@
+"""
+Connection pool classes that record how long checkouts wait.
+
+Stats are kept per pool logging name ("primary", "replica", ...) in
+POOL_STATS rather than on the pool, so they survive engine.dispose(), which
+replaces the pool object.
+"""
+import bisect
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (seconds) of the checkout wait histogram; the last bucket is +Inf
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0                 # checkouts that gave up after pool_timeout
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self.bucket_counts[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                # "+Inf" rather than float("inf"): this goes out as JSON on /healthz
+                "wait_buckets": list(zip((*WAIT_BUCKETS, "+Inf"), self.bucket_counts)),
+            }
+
+
+POOL_STATS: dict[str, PoolStats] = {}
+
+
+class _InstrumentedPoolMixin:
+    def __init__(self, *args, **kw):
+        super().__init__(*args, **kw)
+        self.stats = POOL_STATS.setdefault(kw.get("logging_name") or "default", PoolStats())
+
+    def _do_get(self):
+        # Covers waiting for a free connection and opening an overflow one
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timed_out()
+            raise
+        self.stats.observe(time.perf_counter() - started)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool) -> dict:
+    """Current occupancy of a (Queue)pool plus its checkout wait stats."""
+    status = {
+        "size": pool.size(),
+        "in_use": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # overflow() starts at -pool_size and counts up as connections are opened
+        "overflow": max(pool.overflow(), 0),
+    }
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(stats.snapshot())
+    return status
@@ -1,5 +1,7 @@
+from email.message import EmailMessage
+import aiosmtplib
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from typing import List
+from typing import Awaitable, Callable, List, Optional
 from ..config import settings
 
 conf = ConnectionConfig(
@@ -24,4 +26,50 @@ async def send_notification_email(subject: str, recipients: List[str], body: str
     )
     
     fm = FastMail(conf)
-    await fm.send_message(message)
\ No newline at end of file
+    await fm.send_message(message)
+
+async def send_email_batch(
+    messages: List[dict],
+    before_send: Optional[Callable[[dict], Awaitable[bool]]] = None,
+) -> List[Optional[str]]:
+    """
+    Send several emails over a single SMTP connection.
+    Each message is a dict with subject, recipients and body (HTML).
+    `before_send(message)` runs as each send starts; when it returns False
+    the message is skipped with the error "skipped".
+    Returns one error string per message (None when sent), in order.
+    Connection or login failures raise.
+    """
+    smtp = aiosmtplib.SMTP(
+        hostname=settings.MAIL_SERVER,
+        port=settings.MAIL_PORT,
+        use_tls=settings.MAIL_SSL_TLS,
+        start_tls=settings.MAIL_STARTTLS,
+        timeout=settings.MAIL_TIMEOUT,
+        validate_certs=False,  # same as the FastMail config above
+    )
+    await smtp.connect()
+    try:
+        await smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+
+        results: List[Optional[str]] = []
+        for m in messages:
+            if before_send and not await before_send(m):
+                results.append("skipped")
+                continue
+            msg = EmailMessage()
+            msg["From"] = settings.MAIL_FROM
+            msg["To"] = ", ".join(m["recipients"])
+            msg["Subject"] = m["subject"]
+            msg.set_content(m["body"], subtype="html")
+            try:
+                await smtp.send_message(msg)
+                results.append(None)
+            except aiosmtplib.SMTPException as e:
+                results.append(str(e))
+        return results
+    finally:
+        try:
+            await smtp.quit()
+        except aiosmtplib.SMTPException:
+            pass
@@ -0,0 +1,143 @@
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from .uploads import CHUNK_SIZE
+
+# Cache-Control policies
+CACHE_IMMUTABLE = "private, max-age=86400"  # content never changes for the URL (hashed documents)
+CACHE_REVALIDATE = "private, no-cache"      # may change: always revalidate, usually answered with 304
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etag_for(st: os.stat_result, content_hash: Optional[str]) -> str:
+    if content_hash:
+        return f'"{content_hash}"'
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: ignore W/ prefixes
+    candidates = [c.strip().removeprefix("W/") for c in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _not_modified_since(header: str, st: os.stat_result) -> bool:
+    try:
+        since = parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(st.st_mtime) <= since
+
+
+def _parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    (start, end) of a single "bytes=" range, inclusive. Returns None for
+    ranges we don't handle (multiple ranges, other units) or that are invalid
+    (last < first), which are served as a full 200 response. Raises
+    ValueError when unsatisfiable (first byte past the end).
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if first == "" and last == "":
+        return None
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        # Invalid (e.g. bytes=500-100): ignore the header, as RFC 9110 allows
+        return None
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def _iter_file(path: str, start: int, end: int):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def content_disposition(filename: str, inline: bool = False) -> str:
+    kind = "inline" if inline else "attachment"
+    if filename.isascii():
+        return f'{kind}; filename="{filename}"'
+    return f"{kind}; filename*=utf-8''{quote(filename)}"
+
+
+def conditional_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    filename: Optional[str] = None,
+    inline: bool = False,
+    content_hash: Optional[str] = None,
+    cache_control: str = CACHE_REVALIDATE,
+    extra_headers: Optional[dict] = None,
+) -> Response:
+    """
+    Serve a file with validators: strong ETag (content hash, else mtime+size),
+    Last-Modified, 304 for If-None-Match / If-Modified-Since, and single
+    byte ranges (206 / 416) for resumable downloads.
+    Raises FileNotFoundError when the file is missing, so callers map it to
+    their own status code.
+    """
+    st = os.stat(path)
+    etag = _etag_for(st, content_hash)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        **(extra_headers or {}),
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif request.headers.get("if-modified-since") and _not_modified_since(request.headers["if-modified-since"], st):
+        return Response(status_code=304, headers=headers)
+
+    if filename:
+        headers["Content-Disposition"] = content_disposition(filename, inline)
+    elif inline:
+        headers["Content-Disposition"] = "inline"
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # A stale If-Range means the client's partial copy is outdated: send everything
+    if range_header and (if_range is None or if_range.strip() in (etag, headers["Last-Modified"])):
+        try:
+            byte_range = _parse_range(range_header, st.st_size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{st.st_size}"})
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{st.st_size}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                _iter_file(path, start, end), status_code=206, media_type=media_type, headers=headers
+            )
+
+    # stat_result avoids a second stat inside FileResponse
+    return FileResponse(path=path, media_type=media_type, headers=headers, stat_result=st)
@@ -0,0 +1,106 @@
+"""
+Derivatives of uploaded pictures: fixed-size thumbnails in JPEG and WebP,
+cached next to the original under a thumbs/ directory:
+
+    workers/{company_id}/picture/{name}.jpg
+    workers/{company_id}/picture/thumbs/{name}.thumb.jpg
+    workers/{company_id}/picture/thumbs/{name}.thumb.webp
+"""
+import logging
+import os
+import tempfile
+from typing import Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+THUMBS_DIR = "thumbs"
+FORMATS = {"jpeg": ".jpg", "webp": ".webp"}
+
+
+def derivative_sizes() -> dict:
+    return {"thumb": settings.PICTURE_THUMB_PX, "medium": settings.PICTURE_MEDIUM_PX}
+
+
+def derivative_path(original_path: str, size: str, fmt: str) -> str:
+    directory, filename = os.path.split(original_path)
+    base, _ = os.path.splitext(filename)
+    return os.path.join(directory, THUMBS_DIR, f"{base}.{size}{FORMATS[fmt]}")
+
+
+def _write_derivative(image: Image.Image, path: str, px: int, fmt: str) -> None:
+    derived = image.copy()
+    derived.thumbnail((px, px), Image.Resampling.LANCZOS)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Temp file + rename, so a concurrent request never serves a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            if fmt == "jpeg":
+                derived.convert("RGB").save(out, "JPEG", quality=82, optimize=True, progressive=True)
+            else:
+                derived.save(out, "WEBP", quality=80, method=4)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _open_normalized(original_path: str) -> Image.Image:
+    with Image.open(original_path) as img:
+        # Phone photos carry their orientation in EXIF; bake it in
+        image = ImageOps.exif_transpose(img)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "P") else "RGB")
+    return image
+
+
+def generate_derivatives(original_path: str) -> bool:
+    """
+    Write every size/format derivative of a picture. Returns False (and logs)
+    when the file is not a readable image; the original is still served.
+    """
+    try:
+        image = _open_normalized(original_path)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        logger.warning(f"Cannot create derivatives of {original_path}: {e}")
+        return False
+    for size, px in derivative_sizes().items():
+        for fmt in FORMATS:
+            _write_derivative(image, derivative_path(original_path, size, fmt), px, fmt)
+    return True
+
+
+def ensure_derivative(original_path: str, size: str, fmt: str) -> Optional[str]:
+    """
+    Path of the requested derivative, regenerating it when it is missing or
+    older than the original. None when the original can't be decoded;
+    FileNotFoundError when the original is missing.
+    """
+    path = derivative_path(original_path, size, fmt)
+    original_mtime = os.stat(original_path).st_mtime
+    try:
+        if os.stat(path).st_mtime >= original_mtime:
+            return path
+    except FileNotFoundError:
+        pass
+    try:
+        image = _open_normalized(original_path)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        logger.warning(f"Cannot create derivative of {original_path}: {e}")
+        return None
+    _write_derivative(image, path, derivative_sizes()[size], fmt)
+    return path
+
+
+def remove_derivatives(original_path: str) -> None:
+    for size in derivative_sizes():
+        for fmt in FORMATS:
+            path = derivative_path(original_path, size, fmt)
+            if os.path.isfile(path):
+                os.remove(path)
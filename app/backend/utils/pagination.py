@@ -1,5 +1,14 @@
+import base64
+import json
+from datetime import datetime
 from typing import Optional, Type
 
+from fastapi import HTTPException
+from sqlalchemy import literal, tuple_
+
+# Response header carrying the opaque token for the next keyset page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 def paginate(query, page: int = 1, page_size: int = 20, schema: Optional[Type] = None):
     total = query.count()
     items = query.offset((page - 1) * page_size).limit(page_size).all()
@@ -7,3 +16,62 @@ def paginate(query, page: int = 1, page_size: int = 20, schema: Optional[Type] =
         # SQLAlchemy ORM -> Pydantic model objects
         items = [schema.model_validate(i, from_attributes=True) for i in items]
     return {"total": total, "page": page, "page_size": page_size, "items": items}
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Encode the sort key values of the last row of a page into an opaque token.
+    """
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, columns: list) -> list:
+    """
+    Decode a token produced by encode_cursor back into typed values for the given columns.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match sort key")
+        return [
+            datetime.fromisoformat(v) if v is not None and col.type.python_type is datetime else v
+            for col, v in zip(columns, values)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_query(query, columns: list, cursor: Optional[str], limit: int, descending: bool = False):
+    """
+    Apply keyset filtering, ordering and limit (one row over, to detect a next
+    page) to a Query or a select(); pair with keyset_page on the fetched rows.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        bound = tuple_(*[literal(v, c.type) for c, v in zip(columns, values)])
+        query = query.filter(key < bound if descending else key > bound)
+
+    order = [c.desc() if descending else c.asc() for c in columns]
+    return query.order_by(None).order_by(*order).limit(limit + 1)
+
+
+def keyset_page(items: list, columns: list, limit: int):
+    """Trim rows fetched with keyset_query to the page; returns (items, next_cursor)."""
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([getattr(items[-1], c.key) for c in columns])
+    return items, next_cursor
+
+
+def keyset_paginate(query, columns: list, cursor: Optional[str], limit: int, descending: bool = False):
+    """
+    Keyset (cursor) pagination over `columns`, whose last entry must be a unique key.
+    An empty cursor starts from the first page. Returns (items, next_cursor);
+    next_cursor is None on the last page.
+    """
+    items = keyset_query(query, columns, cursor, limit, descending).all()
+    return keyset_page(items, columns, limit)
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from ..config import settings
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+MB = 1024 * 1024
+
+
+def max_bytes_for(content_type: str | None) -> int:
+    """Size limit for one uploaded file of the given content type."""
+    if content_type and content_type.startswith("image/"):
+        return settings.UPLOAD_MAX_IMAGE_MB * MB
+    return settings.UPLOAD_MAX_DOCUMENT_MB * MB
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    path: str      # final absolute path
+    size: int      # bytes written
+    sha256: str    # hex digest of the content
+
+
+async def stream_upload(upload: UploadFile, target_dir: str, filename: str, max_bytes: int) -> StoredUpload:
+    """
+    Copy an upload to target_dir/filename in CHUNK_SIZE pieces, hashing as it goes.
+    Data lands in a temp file in the same directory and is renamed into place
+    only when complete, so readers never see a partial file. Raises 413 as soon
+    as max_bytes is exceeded.
+    """
+    await run_in_threadpool(os.makedirs, target_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix=".upload-", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await upload.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(413, detail=f"File exceeds the {max_bytes // MB} MB limit")
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+        final_path = os.path.join(target_dir, filename)
+        await run_in_threadpool(os.replace, tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return StoredUpload(path=final_path, size=size, sha256=digest.hexdigest())
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class MaxBodySizeMiddleware:
+    """
+    Reject oversized request bodies on upload routes before they are parsed:
+    immediately when Content-Length is too big, otherwise as soon as the
+    streamed body crosses the limit.
+    """
+
+    def __init__(self, app, max_bytes: int, path_prefixes: tuple):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_prefixes = path_prefixes
+
+    def _too_large(self):
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body exceeds the {self.max_bytes // MB} MB limit"},
+        )
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("POST", "PUT")
+            or not scope["path"].startswith(self.path_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._too_large()(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Answer 413 here: the form parser would turn any error into a 400
+                    if not rejected and not response_started:
+                        rejected = True
+                        await self._too_large()(scope, receive, send)
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if rejected:
+                return  # the 413 has already been sent
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except Exception:
+            if not rejected:
+                raise
@@ -0,0 +1,75 @@
+"""
+Count database round trips for a single approval decision.
+
+Runs the same path as PUT /api/approval-data/{id} (load, update mutator,
+commit, refresh) inside an outer transaction that is rolled back, so the
+database is left untouched.
+
+    python -m benchmarks.approval_roundtrips --approval-data-id 123 [--status APPROVED]
+
+For reference, the previous mutator issued, for a mid-chain approval that
+promotes the next level: 6 SELECTs, 2 UPDATE flushes, a lazy load of the
+next approval, an INSERT + COMMIT + refresh + user SELECT per notification,
+then the factory COMMIT and refresh (about 13 statements and 3 commits,
+plus an inline SMTP send). A final approval added 2 more commits and a
+second notification.
+"""
+import argparse
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.backend import models
+from app.backend.database import engine
+from app.backend.routers.approval_data import approval_data_update_mutator
+
+
+def measure(approval_data_id: int, status: str) -> dict:
+    counts = {"statements": 0, "commits": 0}
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        counts["statements"] += 1
+
+    with engine.connect() as conn:
+        outer = conn.begin()
+        # Session commits release a savepoint; the outer transaction is rolled back
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+
+        @event.listens_for(db, "after_commit")
+        def _on_commit(session):
+            counts["commits"] += 1
+
+        event.listen(conn, "before_cursor_execute", _on_execute)
+        started = time.perf_counter()
+        try:
+            obj = db.get(models.ApprovalData, approval_data_id)
+            if not obj:
+                raise SystemExit(f"ApprovalData {approval_data_id} not found")
+            data = approval_data_update_mutator(obj, {"status": status, "approver_name": "benchmark"}, db)
+            for k, v in data.items():
+                setattr(obj, k, v)
+            db.commit()
+            db.refresh(obj)
+        finally:
+            elapsed = time.perf_counter() - started
+            event.remove(conn, "before_cursor_execute", _on_execute)
+            db.close()
+            outer.rollback()
+
+    counts["elapsed_ms"] = round(elapsed * 1000, 2)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--approval-data-id", type=int, required=True)
+    parser.add_argument("--status", default="APPROVED", choices=["APPROVED", "REJECTED"])
+    args = parser.parse_args()
+
+    result = measure(args.approval_data_id, args.status)
+    print(f"statements={result['statements']} commits={result['commits']} elapsed_ms={result['elapsed_ms']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Throughput of the sync /api endpoints against their async /api/v2 twins.
+
+Each endpoint pair is hit by N concurrent clients (default 50, 200 and 500)
+for a fixed duration against a running server; the script prints requests/s,
+latency percentiles and errors per variant.
+
+    python -m benchmarks.async_vs_sync --base-url http://localhost:8000 \
+        --token <jwt> --user-id 12 [--concurrency 50 200 500] [--duration 20]
+
+Run a single uvicorn worker so both variants share one process: sync
+endpoints queue behind the 40-thread request pool, async ones behind the
+database connection pool.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+# name -> path template; {prefix} is /api or /api/v2
+ENDPOINTS = {
+    "notifications unread-count": "{prefix}/notifications/unread-count?user_id={user_id}",
+    "notifications sync": "{prefix}/notifications/sync?user_id={user_id}&since_id=0&limit=50",
+    "applications filter": "{prefix}/applications/filter?applicant_id={user_id}&fields=summary&limit=20",
+    "approver inbox": "{prefix}/approver-inbox?user_id={user_id}&limit=50",
+}
+
+
+def percentile(values: list, p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def run_level(client: httpx.AsyncClient, url: str, concurrency: int, duration: float) -> dict:
+    latencies: list = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                resp = await client.get(url)
+                if resp.status_code >= 400:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": (statistics.fmean(latencies) * 1000) if latencies else 0.0,
+        "errors": errors,
+    }
+
+
+async def main_async(args) -> None:
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    endpoints = {k: v for k, v in ENDPOINTS.items() if not args.only or k in args.only}
+    print(f"{'endpoint':<28} {'variant':<6} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for concurrency in args.concurrency:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limits, timeout=60) as client:
+            for name, template in endpoints.items():
+                for variant, prefix in (("sync", "/api"), ("async", "/api/v2")):
+                    url = template.format(prefix=prefix, user_id=args.user_id)
+                    await run_level(client, url, min(concurrency, 10), 2)  # warm up pools
+                    r = await run_level(client, url, concurrency, args.duration)
+                    print(
+                        f"{name:<28} {variant:<6} {concurrency:>7} {r['rps']:>9.1f} "
+                        f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>7}"
+                    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", help="bearer token (needed for the approver inbox)")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--duration", type=float, default=20, help="seconds per endpoint and level")
+    parser.add_argument("--only", nargs="+", choices=sorted(ENDPOINTS), help="restrict to these endpoints")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
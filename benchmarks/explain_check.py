@@ -0,0 +1,125 @@
+"""
+EXPLAIN regression check for the hot query paths.
+
+Runs EXPLAIN (FORMAT JSON) for each query below against a seeded database
+and exits non-zero when the plan falls back to a sequential scan on one of
+the guarded tables. Tables with fewer than --min-rows live rows are skipped,
+because the planner rightly prefers seq scans on tiny tables.
+
+    python -m benchmarks.explain_check [--min-rows 10000]
+"""
+import argparse
+import sys
+
+from sqlalchemy import text
+
+from app.backend.database import engine
+
+# name -> (SQL, tables that must not be seq scanned, query that picks sample parameters)
+CHECKS = {
+    "applications by applicant": (
+        "SELECT id, created_time FROM application WHERE applicant_id = :user_id "
+        "ORDER BY created_time DESC, id DESC LIMIT 20",
+        ["application"],
+        "SELECT applicant_id AS user_id FROM application LIMIT 1",
+    ),
+    "applications by workflow_data": (
+        "SELECT id FROM application WHERE workflow_data_id = :workflow_data_id",
+        ["application"],
+        "SELECT workflow_data_id FROM application WHERE workflow_data_id IS NOT NULL LIMIT 1",
+    ),
+    "approval_data by workflow_data and level": (
+        "SELECT id, status FROM approval_data WHERE workflow_data_id = :workflow_data_id AND level = :level",
+        ["approval_data"],
+        "SELECT workflow_data_id, level FROM approval_data WHERE level IS NOT NULL LIMIT 1",
+    ),
+    "notifications by user": (
+        "SELECT id FROM notification WHERE user_id = :user_id ORDER BY created_at DESC, id DESC LIMIT 50",
+        ["notification"],
+        "SELECT user_id FROM notification LIMIT 1",
+    ),
+    "unread notification count": (
+        "SELECT count(*) FROM notification WHERE user_id = :user_id AND is_read = false",
+        ["notification"],
+        "SELECT user_id FROM notification LIMIT 1",
+    ),
+    "notification sync": (
+        "SELECT id FROM notification WHERE user_id = :user_id AND id > 0 ORDER BY id LIMIT 100",
+        ["notification"],
+        "SELECT user_id FROM notification LIMIT 1",
+    ),
+    "approvals by user": (
+        "SELECT workflow_id FROM approval WHERE user_id = :user_id",
+        ["approval"],
+        "SELECT user_id FROM approval WHERE user_id IS NOT NULL LIMIT 1",
+    ),
+    "approver inbox": (
+        "SELECT approval_data_id FROM approver_inbox WHERE user_id = :user_id "
+        "ORDER BY pending_since DESC LIMIT 50",
+        ["approver_inbox"],
+        "SELECT user_id FROM approver_inbox LIMIT 1",
+    ),
+    "expired active permits": (
+        "SELECT a.id FROM application a JOIN workflow_data wd ON wd.id = a.workflow_data_id "
+        "WHERE a.status = 'ACTIVE' AND wd.end_time < now()",
+        ["application"],
+        None,
+    ),
+    "application name search": (
+        "SELECT id FROM application WHERE name ILIKE :pattern LIMIT 20",
+        ["application"],
+        "SELECT '%' || substr(name, 1, 4) || '%' AS pattern FROM application WHERE length(name) >= 4 LIMIT 1",
+    ),
+}
+
+
+def _seq_scans(plan: dict) -> list:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+def run(min_rows: int) -> int:
+    failures = 0
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        row_counts = dict(conn.execute(text(
+            "SELECT relname, n_live_tup FROM pg_stat_user_tables"
+        )).all())
+
+        for name, (sql, guarded, sample_sql) in CHECKS.items():
+            small = [t for t in guarded if row_counts.get(t, 0) < min_rows]
+            if small:
+                print(f"SKIP  {name}: {', '.join(small)} below {min_rows} rows")
+                continue
+
+            params = {}
+            if sample_sql:
+                sample = conn.execute(text(sample_sql)).mappings().first()
+                if sample is None:
+                    print(f"SKIP  {name}: no sample parameters")
+                    continue
+                params = dict(sample)
+
+            plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()[0]["Plan"]
+            bad = [t for t in _seq_scans(plan) if t in guarded]
+            if bad:
+                failures += 1
+                print(f"FAIL  {name}: sequential scan on {', '.join(bad)}")
+            else:
+                print(f"OK    {name}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rows", type=int, default=10000)
+    args = parser.parse_args()
+    sys.exit(1 if run(args.min_rows) else 0)
+
+
+if __name__ == "__main__":
+    main()
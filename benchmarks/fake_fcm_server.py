@@ -0,0 +1,127 @@
+"""
+Local stand-in for the FCM HTTP v1 API, for exercising services.notifications
+without Google credentials.
+
+    python -m benchmarks.fake_fcm_server [--port 8089] [--latency-ms 50]
+
+Point the backend at it:
+
+    FCM_PROJECT_ID=test FCM_SA_EMAIL=test@example.com FCM_SA_PRIVATE_KEY="<any RSA key>"
+    FCM_TOKEN_URL=http://127.0.0.1:8089/token FCM_API_BASE=http://127.0.0.1:8089
+
+Endpoints:
+    POST /token                           -> {"access_token", "expires_in": 3600}
+    POST /v1/projects/<p>/messages:send   -> 200, or 404 UNREGISTERED for device
+                                             tokens starting with "invalid",
+                                             401 for unknown access tokens
+    GET  /stats                           -> token fetches, sends, rejects, peak concurrency
+"""
+import argparse
+import json
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeFcmState:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.access_tokens: set = set()
+        self.stats = {"token_fetches": 0, "sent": 0, "unregistered": 0, "unauthorized": 0,
+                      "in_flight": 0, "peak_in_flight": 0}
+
+    def bump(self, key: str, n: int = 1) -> None:
+        with self.lock:
+            self.stats[key] += n
+            if key == "in_flight":
+                self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.stats["in_flight"])
+
+
+def make_handler(state: FakeFcmState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _reply(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with state.lock:
+                    self._reply(200, dict(state.stats))
+            else:
+                self._reply(404, {"error": {"code": 404, "message": "not found"}})
+
+        def do_POST(self):
+            body = self._read_body()
+            if self.path == "/token":
+                token = secrets.token_urlsafe(24)
+                with state.lock:
+                    state.access_tokens.add(token)
+                state.bump("token_fetches")
+                self._reply(200, {"access_token": token, "expires_in": 3600, "token_type": "Bearer"})
+                return
+            if not self.path.endswith("/messages:send"):
+                self._reply(404, {"error": {"code": 404, "message": "not found"}})
+                return
+
+            bearer = self.headers.get("Authorization", "").removeprefix("Bearer ")
+            with state.lock:
+                authorized = bearer in state.access_tokens
+            if not authorized:
+                state.bump("unauthorized")
+                self._reply(401, {"error": {"code": 401, "status": "UNAUTHENTICATED",
+                                            "message": "Request had invalid authentication credentials."}})
+                return
+
+            state.bump("in_flight")
+            try:
+                time.sleep(state.latency)
+                device_token = json.loads(body or b"{}").get("message", {}).get("token", "")
+            finally:
+                state.bump("in_flight", -1)
+
+            if device_token.startswith("invalid"):
+                state.bump("unregistered")
+                self._reply(404, {"error": {
+                    "code": 404, "status": "NOT_FOUND", "message": "Requested entity was not found.",
+                    "details": [{"@type": "type.googleapis.com/google.firebase.fcm.v1.FcmError",
+                                 "errorCode": "UNREGISTERED"}],
+                }})
+                return
+            state.bump("sent")
+            self._reply(200, {"name": f"projects/test/messages/{secrets.token_hex(8)}"})
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=50, help="simulated latency per send")
+    args = parser.parse_args()
+
+    state = FakeFcmState(latency=args.latency_ms / 1000)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"Fake FCM listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
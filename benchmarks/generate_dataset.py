@@ -0,0 +1,345 @@
+"""
+Synthetic dataset for load tests, loaded into Postgres with COPY.
+
+Per company: departments, locations, permit types with workflows whose
+approval levels (supervisor, safety officer, security) are assigned to users
+of the matching group, safety equipment, workers and users. On top of that,
+applications spread over --days with a realistic status mix and their
+workflow_data / approval_data chains, workers, safety equipment and
+documents, plus notifications per user.
+
+    python -m benchmarks.generate_dataset [--companies 5] [--users-per-company 200] \
+        [--applications 50000] [--notifications-per-user 20] [--seed 1] \
+        [--manifest benchmarks/dataset.json]
+
+Rows are added next to existing data (ids continue after the current
+maximum), so point it at a disposable database: there is no cleanup, and the
+API should not be writing while it runs. COPY skips the session hooks, so the
+derived tables (approver inbox, status counters, search vectors) are rebuilt
+afterwards. Every generated user's password is --password; the manifest lists
+the users with their role for benchmarks.loadtest.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.backend.config import settings
+from app.backend.database import SessionLocal, engine
+from app.backend.security.hashing import Hash
+from app.backend.services import approver_inbox, stats
+from app.backend.services.application_search import refresh_search_vectors
+
+# Approval levels of every generated workflow: (level, role_name, group)
+PERMIT_LEVELS = [
+    (settings.SUPERVISOR_LEVEL, "supervisor", "Supervisor"),
+    (settings.SAFETY_OFFICER_LEVEL, "safety officer", "Safety Officer"),
+]
+SECURITY_LEVEL = (settings.SECURITY_ENTER_LEVEL, "security", "Security")
+APPLICANT_GROUP = "Contractor"
+ROLE_NAMES = {level: role_name for level, role_name, _ in [*PERMIT_LEVELS, SECURITY_LEVEL]}
+# Completion flow steps reuse a workflow approval: job done -> supervisor, exit -> security
+CLOSING_STEPS = {settings.CLOSING_FLOW_LEVEL: settings.SUPERVISOR_LEVEL,
+                 settings.SECURITY_EXIT_LEVEL: settings.SECURITY_ENTER_LEVEL}
+
+# Share of each role among a company's users
+ROLE_MIX = {"Contractor": 80, "Supervisor": 8, "Safety Officer": 6, "Security": 6}
+
+# Application status -> relative frequency
+STATUS_MIX = {"DRAFT": 5, "SUBMITTED": 25, "APPROVED": 10, "ACTIVE": 15, "COMPLETED": 35, "REJECTED": 10}
+
+PERMIT_TYPES = ["Hot Work", "Confined Space", "Work at Height", "Electrical Isolation",
+                "Excavation", "Lifting Operation", "Cold Work", "Radiography"]
+SAFETY_EQUIPMENT = ["Safety Helmet", "Safety Harness", "Gas Detector", "Fire Extinguisher",
+                    "Face Shield", "Ear Protection", "Respirator", "Safety Gloves"]
+DEPARTMENTS = ["Operations", "Maintenance", "HSE", "Engineering", "Logistics"]
+AREAS = ["Plant", "Tank Farm", "Warehouse", "Jetty", "Workshop", "Substation", "Control Room", "Pipe Rack"]
+FIRST_NAMES = ["Adam", "Aisyah", "Chen", "Daniel", "Farah", "Hafiz", "Ivy", "Kumar", "Lina", "Mei",
+               "Nadia", "Omar", "Priya", "Rahman", "Sara", "Tan", "Wei", "Yusof", "Zara", "Arjun"]
+LAST_NAMES = ["Abdullah", "Lim", "Wong", "Ismail", "Raj", "Tan", "Lee", "Ahmad", "Ng", "Hassan",
+              "Chong", "Kaur", "Othman", "Goh", "Yap", "Ramli"]
+NOTIFICATION_TITLES = ["Permit Pending Approval", "Permit Application Approved",
+                       "Permit Application Rejected", "Permit Expired"]
+
+TABLES = [
+    "company", "department", "location", "permit_type", "safety_equipment", "group", "user",
+    "user_group", "workflow", "approval", "worker", "document", "workflow_data", "application",
+    "approval_data", "application_worker", "application_safety_equipment", "notification",
+]
+
+
+class Ids:
+    """Hands out ids after the current maximum of each table."""
+
+    def __init__(self, cursor):
+        self._next = {}
+        for table in TABLES:
+            cursor.execute(f'SELECT coalesce(max(id), 0) FROM "{table}"')
+            self._next[table] = cursor.fetchone()[0] + 1
+
+    def take(self, table: str) -> int:
+        value = self._next[table]
+        self._next[table] += 1
+        return value
+
+
+def weighted(rng: random.Random, mix: dict) -> str:
+    return rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def person_name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def generate(cursor, args) -> dict:
+    """Build every row in memory: {"rows": table -> row tuples, "manifest": generated users}."""
+    rng = random.Random(args.seed)
+    ids = Ids(cursor)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    password_hash = Hash.make(args.password)
+    rows = {table: [] for table in TABLES}
+    manifest = []
+    companies = []
+
+    for _ in range(args.companies):
+        company_id = ids.take("company")
+        rows["company"].append((company_id, f"Bench Company {company_id}"))
+        for name in DEPARTMENTS:
+            rows["department"].append((ids.take("department"), company_id, name))
+        locations = []
+        for n in range(args.locations_per_company):
+            location_id = ids.take("location")
+            locations.append(location_id)
+            rows["location"].append((location_id, company_id, f"{rng.choice(AREAS)} {n + 1}"))
+        equipment = []
+        for name in SAFETY_EQUIPMENT:
+            equipment_id = ids.take("safety_equipment")
+            equipment.append(equipment_id)
+            rows["safety_equipment"].append((equipment_id, company_id, name))
+
+        groups = {}
+        for name in ROLE_MIX:
+            groups[name] = ids.take("group")
+            rows["group"].append((groups[name], company_id, name))
+
+        # user_group ids per role, so approvals can point at both the user and the link
+        members = {name: [] for name in ROLE_MIX}
+        for n in range(args.users_per_company):
+            role = weighted(rng, ROLE_MIX)
+            user_id = ids.take("user")
+            email = f"c{company_id}.u{n + 1}@{args.email_domain}"
+            rows["user"].append((user_id, company_id, person_name(rng), email, 1, password_hash))
+            user_group_id = ids.take("user_group")
+            rows["user_group"].append((user_group_id, user_id, groups[role]))
+            members[role].append((user_id, user_group_id))
+            manifest.append({"id": user_id, "company_id": company_id, "email": email, "role": role})
+        for role, users in members.items():
+            if not users:
+                # Tiny companies: make sure every role has someone
+                user_id = ids.take("user")
+                email = f"c{company_id}.{role.lower().replace(' ', '-')}@{args.email_domain}"
+                rows["user"].append((user_id, company_id, person_name(rng), email, 1, password_hash))
+                user_group_id = ids.take("user_group")
+                rows["user_group"].append((user_group_id, user_id, groups[role]))
+                users.append((user_id, user_group_id))
+                manifest.append({"id": user_id, "company_id": company_id, "email": email, "role": role})
+
+        workflows = []   # (permit_type_id, workflow_id, {level: (approval_id, approver user_id)})
+        for name in PERMIT_TYPES[:args.permit_types_per_company]:
+            permit_type_id = ids.take("permit_type")
+            rows["permit_type"].append((permit_type_id, company_id, name))
+            for w in range(args.workflows_per_permit_type):
+                workflow_id = ids.take("workflow")
+                rows["workflow"].append((workflow_id, company_id, permit_type_id, f"{name} Flow {w + 1}"))
+                approvals = {}
+                for level, role_name, group in [*PERMIT_LEVELS, SECURITY_LEVEL]:
+                    approval_id = ids.take("approval")
+                    user_id, user_group_id = rng.choice(members[group])
+                    rows["approval"].append((approval_id, company_id, workflow_id, user_group_id, user_id,
+                                             f"{group} Approval", role_name, level))
+                    approvals[level] = (approval_id, user_id)
+                workflows.append((permit_type_id, workflow_id, approvals))
+
+        workers = []
+        for n in range(args.workers_per_company):
+            worker_id = ids.take("worker")
+            workers.append(worker_id)
+            rows["worker"].append((worker_id, company_id, person_name(rng), f"IC{company_id:03d}{n:06d}",
+                                   f"01{rng.randint(10000000, 99999999)}", "ACTIVE", "CONTRACTOR", "Technician"))
+
+        companies.append({
+            "id": company_id, "locations": locations, "equipment": equipment, "workers": workers,
+            "workflows": workflows, "applicants": [u for u, _ in members[APPLICANT_GROUP]],
+        })
+
+    names = {row[0]: row[2] for row in rows["user"]}
+    permit_names = {row[0]: row[2] for row in rows["permit_type"]}
+    span = timedelta(days=args.days).total_seconds()
+
+    for n in range(args.applications):
+        company = companies[n % len(companies)]
+        permit_type_id, workflow_id, approvals = rng.choice(company["workflows"])
+        applicant_id = rng.choice(company["applicants"])
+        status = weighted(rng, STATUS_MIX)
+        created = now - timedelta(seconds=rng.uniform(0, span))
+        application_id = ids.take("application")
+        name = f"{permit_names[permit_type_id]} #{application_id}"
+
+        document_id = None
+        if rng.random() < args.document_ratio:
+            document_id = ids.take("document")
+            rows["document"].append((document_id, company["id"], f"{name}.pdf",
+                                     f"uploads/bench/{document_id}.pdf", created.replace(tzinfo=None)))
+
+        workflow_data_id = None
+        if status != "DRAFT":
+            workflow_data_id = ids.take("workflow_data")
+            start = created + timedelta(hours=rng.randint(1, 72))
+            end = start + timedelta(hours=rng.randint(4, 240))
+            if status in {"SUBMITTED", "APPROVED", "ACTIVE"} and end < now:
+                # Still open: keep it clear of the expiry sweep
+                end = now + timedelta(hours=rng.randint(4, 240))
+            rows["workflow_data"].append((workflow_data_id, company["id"], workflow_id, name,
+                                          start.replace(tzinfo=None), end.replace(tzinfo=None)))
+
+            for level, step_status in approval_chain(rng, status):
+                approval_level = CLOSING_STEPS.get(level, level)
+                approval_id, approver_id = approvals[approval_level]
+                decided = step_status in {"APPROVED", "REJECTED"}
+                role_name = ROLE_NAMES[approval_level]
+                rows["approval_data"].append((
+                    ids.take("approval_data"), company["id"], approval_id, workflow_data_id, step_status,
+                    names[approver_id] if decided else None,
+                    (created + timedelta(hours=level % 10 + 1)).replace(tzinfo=None) if decided else None,
+                    role_name, level,
+                ))
+
+        updated = created + timedelta(hours=rng.randint(1, 48)) if status != "DRAFT" else None
+        rows["application"].append((application_id, permit_type_id, workflow_data_id, rng.choice(company["locations"]),
+                                    applicant_id, name, document_id, status, applicant_id, applicant_id,
+                                    created, updated))
+        for worker_id in rng.sample(company["workers"], min(len(company["workers"]), rng.randint(1, 4))):
+            rows["application_worker"].append((ids.take("application_worker"), application_id, worker_id))
+        for equipment_id in rng.sample(company["equipment"], rng.randint(1, 3)):
+            rows["application_safety_equipment"].append((ids.take("application_safety_equipment"), application_id, equipment_id))
+
+    for user_id in names:
+        for _ in range(args.notifications_per_user):
+            created = now - timedelta(seconds=rng.uniform(0, span))
+            title = rng.choice(NOTIFICATION_TITLES)
+            rows["notification"].append((ids.take("notification"), user_id, title,
+                                         f"<p>{title}.</p>", rng.random() < 0.7, created.replace(tzinfo=None)))
+
+    return {"rows": rows, "manifest": manifest}
+
+
+def approval_chain(rng: random.Random, status: str) -> list:
+    """[(level, approval_data status)] of an application in the given status."""
+    permit = [level for level, _, _ in PERMIT_LEVELS]
+    security = settings.SECURITY_ENTER_LEVEL
+    if status in {"SUBMITTED", "REJECTED"}:
+        k = rng.randrange(len(permit))
+        current = "PENDING" if status == "SUBMITTED" else "REJECTED"
+        return ([(lv, "APPROVED") for lv in permit[:k]] + [(permit[k], current)]
+                + [(lv, "WAITING") for lv in permit[k + 1:]] + [(security, "WAITING")])
+    if status == "APPROVED":
+        return [(lv, "APPROVED") for lv in permit] + [(security, "PENDING")]
+    chain = [(lv, "APPROVED") for lv in permit] + [(security, "APPROVED")]
+    if status == "ACTIVE" and rng.random() < 0.5:
+        chain.append((settings.CLOSING_FLOW_LEVEL, "PENDING"))   # job done awaiting the supervisor
+    if status == "COMPLETED":
+        chain += [(settings.CLOSING_FLOW_LEVEL, "APPROVED"), (settings.SECURITY_EXIT_LEVEL, "APPROVED")]
+    return chain
+
+
+COLUMNS = {
+    "company": "id, name",
+    "department": "id, company_id, name",
+    "location": "id, company_id, name",
+    "permit_type": "id, company_id, name",
+    "safety_equipment": "id, company_id, name",
+    "group": "id, company_id, name",
+    "user": "id, company_id, name, email, user_type, password_hash",
+    "user_group": "id, user_id, group_id",
+    "workflow": "id, company_id, permit_type_id, name",
+    "approval": "id, company_id, workflow_id, user_group_id, user_id, name, role_name, level",
+    "worker": "id, company_id, name, ic_passport, contact, employment_status, employment_type, position",
+    "document": "id, company_id, name, path, time",
+    "workflow_data": "id, company_id, workflow_id, name, start_time, end_time",
+    "application": "id, permit_type_id, workflow_data_id, location_id, applicant_id, name, document_id, "
+                   "status, created_by, updated_by, created_time, updated_time",
+    "approval_data": "id, company_id, approval_id, workflow_data_id, status, approver_name, time, role_name, level",
+    "application_worker": "id, application_id, worker_id",
+    "application_safety_equipment": "id, application_id, safety_equipment_id",
+    "notification": "id, user_id, title, message, is_read, created_at",
+}
+
+
+def copy_rows(cursor, rows: dict) -> None:
+    for table in TABLES:   # parents before children
+        started = time.perf_counter()
+        with cursor.copy(f'COPY "{table}" ({COLUMNS[table]}) FROM STDIN') as copy:
+            for row in rows[table]:
+                copy.write_row(row)
+        # Explicit ids leave the sequences behind
+        cursor.execute(f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), (SELECT max(id) FROM \"{table}\"))")
+        print(f"  {table:<30} {len(rows[table]):>9} rows  {time.perf_counter() - started:6.2f}s")
+
+
+def rebuild_derived(application_ids: list, batch_size: int = 5000) -> None:
+    started = time.perf_counter()
+    approver_inbox.rebuild()
+    stats.rebuild()
+    db = SessionLocal()
+    try:
+        for start in range(0, len(application_ids), batch_size):
+            refresh_search_vectors(db, application_ids[start:start + batch_size])
+            db.commit()
+    finally:
+        db.close()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    print(f"  derived tables + ANALYZE {time.perf_counter() - started:6.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--companies", type=int, default=5)
+    parser.add_argument("--users-per-company", type=int, default=200)
+    parser.add_argument("--locations-per-company", type=int, default=20)
+    parser.add_argument("--permit-types-per-company", type=int, default=6, choices=range(1, len(PERMIT_TYPES) + 1))
+    parser.add_argument("--workflows-per-permit-type", type=int, default=2)
+    parser.add_argument("--workers-per-company", type=int, default=150)
+    parser.add_argument("--applications", type=int, default=50_000)
+    parser.add_argument("--document-ratio", type=float, default=0.3, help="Share of applications with a document")
+    parser.add_argument("--notifications-per-user", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365, help="Spread creation times over this many days")
+    parser.add_argument("--password", default="loadtest123")
+    parser.add_argument("--email-domain", default="loadtest.local")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--manifest", default="benchmarks/dataset.json", help="Where to write the generated users")
+    args = parser.parse_args()
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.driver_connection.cursor()   # psycopg connection: COPY support
+        started = time.perf_counter()
+        generated = generate(cursor, args)
+        print(f"generated in {time.perf_counter() - started:.2f}s, loading:")
+        copy_rows(cursor, generated["rows"])
+        raw.commit()
+    finally:
+        raw.close()
+
+    rebuild_derived([row[0] for row in generated["rows"]["application"]])
+
+    with open(args.manifest, "w") as f:
+        json.dump({"password": args.password, "users": generated["manifest"]}, f, indent=1)
+    print(f"{len(generated['manifest'])} users written to {args.manifest} (password {args.password!r})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Load test of the hot paths against a running server, using the users of a
+dataset made by benchmarks.generate_dataset. Each scenario runs --clients
+virtual users for --duration seconds; latency percentiles are reported per
+endpoint (route template, not concrete path).
+
+Scenarios:
+- login: every client logs in again and again, as at a shift change
+- inbox: approvers polling their approver inbox
+- listing: applicants paging through their applications with the keyset cursor
+- approval: supervisors and safety officers approving an item of their inbox
+  (read the step, PUT it back as APPROVED), which moves the application along
+  its approval chain
+
+    python -m benchmarks.loadtest --base-url http://localhost:8000 \
+        [--manifest benchmarks/dataset.json] [--scenario all] [--clients 50] \
+        [--duration 60] [--prefix /api/v2] [--json-out results.json]
+
+The approval scenario changes data; regenerate the dataset to repeat a run
+exactly. Login bursts past the hashing pool's queue get 503s, which show up as
+errors of POST /auth/login. The run exits non-zero when an endpoint never
+succeeded, since its latencies would only describe error responses.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from typing import Optional
+
+import httpx
+
+from benchmarks.async_vs_sync import percentile
+
+SCENARIOS = ("login", "inbox", "listing", "approval")
+APPROVER_ROLES = ("Supervisor", "Safety Officer", "Security")
+PERMIT_APPROVER_ROLES = ("Supervisor", "Safety Officer")
+APPLICANT_ROLE = "Contractor"
+LOGIN = "POST /auth/login"
+
+
+class Recorder:
+    """Latencies and errors per endpoint label."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.ok = Counter()
+        self.errors = defaultdict(Counter)   # label -> status code / exception name -> count
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            self.errors[label][type(exc).__name__] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[label][response.status_code] += 1
+            return None
+        self.ok[label] += 1
+        return response
+
+    def report(self, duration: float) -> dict:
+        results = {}
+        for label in sorted(set(self.latencies) | set(self.errors)):
+            values = self.latencies[label]
+            results[label] = {
+                "requests": len(values),
+                "ok": self.ok[label],
+                "errors": dict(self.errors[label]),
+                "rps": len(values) / duration,
+                **{f"p{p}_ms": percentile(values, p) * 1000 for p in (50, 95, 99)},
+                "max_ms": max(values, default=0.0) * 1000,
+            }
+        return results
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str, recorder: Optional[Recorder] = None) -> Optional[str]:
+    data = {"username": email, "password": password}
+    if recorder:
+        response = await recorder.call(client, LOGIN, "POST", "/auth/login", data=data)
+    else:
+        response = await client.post("/auth/login", data=data)
+        response = response if response.status_code == 200 else None
+    return response.json()["access_token"] if response is not None else None
+
+
+# ---------- scenarios ----------
+
+async def login_client(client, recorder, user, args, deadline, password):
+    while time.perf_counter() < deadline:
+        await login(client, user["email"], password, recorder)
+        await asyncio.sleep(args.think)
+
+
+async def inbox_client(client, recorder, user, args, deadline, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        await recorder.call(client, f"GET {args.prefix}/approver-inbox", "GET",
+                            f"{args.prefix}/approver-inbox", params={"limit": 50}, headers=headers)
+        await asyncio.sleep(args.think)
+
+
+async def listing_client(client, recorder, user, args, deadline, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    label = f"GET {args.prefix}/applications/filter"
+    while time.perf_counter() < deadline:
+        cursor = ""
+        for _ in range(args.pages):
+            params = {"applicant_id": user["id"], "fields": "summary", "limit": 20, "cursor": cursor}
+            response = await recorder.call(client, label, "GET", f"{args.prefix}/applications/filter",
+                                           params=params, headers=headers)
+            cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+            if not cursor:
+                break
+        await asyncio.sleep(args.think)
+
+
+async def approval_client(client, recorder, user, args, deadline, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        response = await recorder.call(client, f"GET {args.prefix}/approver-inbox", "GET",
+                                       f"{args.prefix}/approver-inbox",
+                                       params={"stage": "APPROVAL", "limit": 20}, headers=headers)
+        items = response.json()["items"] if response is not None else []
+        if not items:
+            await asyncio.sleep(1)   # nothing to approve yet
+            continue
+        item = random.choice(items)
+        url = f"{args.prefix}/approval-data/{item['approval_data_id']}"
+        # PUT takes a full ApprovalDataIn: send the step back with the decision applied
+        response = await recorder.call(client, f"GET {args.prefix}/approval-data/{{id}}", "GET", url, headers=headers)
+        if response is not None:
+            step = response.json()
+            step.pop("id", None)
+            step.update(status="APPROVED", approver_name=user["email"])
+            await recorder.call(client, f"PUT {args.prefix}/approval-data/{{id}}", "PUT", url, json=step, headers=headers)
+        await asyncio.sleep(args.think)
+
+
+# scenario -> (client coroutine, roles it plays, needs a token)
+SCENARIO_CLIENTS = {
+    "login": (login_client, None, False),
+    "inbox": (inbox_client, APPROVER_ROLES, True),
+    "listing": (listing_client, (APPLICANT_ROLE,), True),
+    "approval": (approval_client, PERMIT_APPROVER_ROLES, True),
+}
+
+
+async def run(args, dataset: dict) -> dict:
+    users = dataset["users"]
+    password = dataset["password"]
+
+    scenarios = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    clients = len(scenarios) * args.clients
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        plan = []   # (client coroutine, user, needs a token) per virtual user
+        for scenario in scenarios:
+            fn, roles, needs_token = SCENARIO_CLIENTS[scenario]
+            pool = [u for u in users if roles is None or u["role"] in roles]
+            random.shuffle(pool)
+            if not pool:
+                raise SystemExit(f"No users for scenario {scenario!r} in the manifest")
+            for n in range(args.clients):
+                plan.append((fn, pool[n % len(pool)], needs_token))
+
+        # Log the virtual users in first; these logins are not measured
+        gate = asyncio.Semaphore(8)
+
+        async def credential(fn, user, needs_token):
+            if not needs_token:
+                return password
+            async with gate:
+                token = await login(client, user["email"], password)
+            if token is None:
+                raise SystemExit(f"Login failed for {user['email']}")
+            return token
+
+        credentials = await asyncio.gather(*(credential(*p) for p in plan))
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            fn(client, recorder, user, args, deadline, cred)
+            for (fn, user, _), cred in zip(plan, credentials)
+        ))
+        return recorder.report(time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--manifest", default="benchmarks/dataset.json", help="Written by benchmarks.generate_dataset")
+    parser.add_argument("--scenario", choices=("all", *SCENARIOS), default="all")
+    parser.add_argument("--clients", type=int, default=50, help="Virtual users per scenario")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--think", type=float, default=0.0, help="Pause between iterations of a virtual user, seconds")
+    parser.add_argument("--pages", type=int, default=3, help="Listing: pages followed per iteration")
+    parser.add_argument("--prefix", default="/api", help="/api or /api/v2 (login is always /auth/login)")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json-out", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    with open(args.manifest) as f:
+        dataset = json.load(f)
+    results = asyncio.run(run(args, dataset))
+
+    print(f"{'endpoint':<42} {'req':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for label, r in results.items():
+        errors = sum(r["errors"].values())
+        print(f"{label:<42} {r['requests']:>7} {errors:>5} {r['rps']:>8.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}")
+        if errors:
+            print(f"{'':<42} errors: {', '.join(f'{k}x{v}' for k, v in r['errors'].items())}")
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=1)
+
+    failed = [label for label, r in results.items() if r["ok"] == 0]
+    if args.scenario in ("all", "approval") and not any(label.startswith("PUT ") for label in results):
+        failed.append("approval (no PENDING items in any approver's inbox)")
+    if failed:
+        raise SystemExit(f"No successful requests for: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+#!/bin/bash
+# Runs once, when the primary's data directory is initialised: lets replicas
+# (db-replica in docker-compose.yml) connect for streaming replication.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
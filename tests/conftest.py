@@ -0,0 +1,63 @@
+"""
+Shared test setup.
+
+Settings are read when app.backend.config is imported, so the required mail
+settings get placeholder values here, before any test imports the app.
+
+Tests that need Postgres take the `pg_session` fixture. It is skipped unless
+TEST_DATABASE_URL points at a scratch database (the schema is created from
+the models); each test runs in a transaction that is rolled back.
+"""
+import os
+
+import pytest
+
+for key, value in {
+    "MAIL_USERNAME": "test",
+    "MAIL_PASSWORD": "test",
+    "MAIL_FROM": "noreply@example.com",
+    "MAIL_PORT": "25",
+    "MAIL_SERVER": "localhost",
+    "MAIL_ADMIN": "admin@example.com",
+}.items():
+    os.environ.setdefault(key, value)
+
+
+@pytest.fixture(scope="session")
+def pg_engine():
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.exc import OperationalError
+
+    from app.backend import models
+    from app.backend.database import Base
+
+    engine = create_engine(url)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            Base.metadata.create_all(conn)
+    except OperationalError as e:
+        pytest.skip(f"Postgres is not reachable: {e}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_session(pg_engine):
+    from app.backend.database import SessionLocal
+
+    connection = pg_engine.connect()
+    outer = connection.begin()
+    # The app's session class, so its flush/commit hooks run; commits inside
+    # the test only release a savepoint
+    session = SessionLocal(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        outer.rollback()
+        connection.close()
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import select
+
+from app.backend import models
+from app.backend.services.application_search import build_tsquery, tsquery
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("hot wor", "hot:* & wor:*"),
+    ("  Hot-Work: Zone 3 ", "hot:* & work:* & zone:* & 3:*"),
+    ("O'Brien & (x | !y)", "o:* & brien:* & x:* & y:*"),
+    ("", None),
+    ("!!! ---", None),
+])
+def test_build_tsquery(q, expected):
+    assert build_tsquery(q) == expected
+
+
+def test_tsquery_without_terms_is_none():
+    assert tsquery("  ") is None
+
+
+# ---------- session hook (Postgres) ----------
+
+def _matches(db, q) -> list:
+    return db.scalars(
+        select(models.Application.id).where(models.Application.search_vector.op("@@")(tsquery(q)))
+    ).all()
+
+
+@pytest.fixture
+def application(pg_session):
+    db = pg_session
+    company = models.Company(name="Acme")
+    db.add(company)
+    db.flush()
+    applicant = models.User(company_id=company.id, name="Alice Applicant", password_hash="x")
+    location = models.Location(company_id=company.id, name="Boiler room")
+    permit_type = models.PermitType(company_id=company.id, name="Hot work")
+    worker = models.Worker(company_id=company.id, name="Walter", ic_passport="W1")
+    db.add_all([applicant, location, permit_type, worker])
+    db.flush()
+    app = models.Application(
+        name="Weld pipe", permit_type_id=permit_type.id, location_id=location.id,
+        applicant_id=applicant.id, workers=[worker],
+    )
+    db.add(app)
+    db.flush()
+    return app
+
+
+def test_new_application_is_searchable(pg_session, application):
+    for q in ("weld", "boiler", "hot", "alice", "walter"):
+        assert _matches(pg_session, q) == [application.id]
+
+
+def test_renames_reindex_referring_applications(pg_session, application):
+    db = pg_session
+    application.location.name = "Turbine hall"
+    application.workers[0].name = "Wendy"
+    db.flush()
+    assert _matches(db, "turbine") == [application.id]
+    assert _matches(db, "wendy") == [application.id]
+    assert _matches(db, "boiler") == []
+    assert _matches(db, "walter") == []
+
+
+def test_moving_a_worker_link_reindexes_both_applications(pg_session, application):
+    db = pg_session
+    other = models.Application(
+        name="Paint tank", permit_type_id=application.permit_type_id,
+        location_id=application.location_id, applicant_id=application.applicant_id,
+    )
+    db.add(other)
+    db.flush()
+    link = db.scalars(select(models.ApplicationWorker).where(
+        models.ApplicationWorker.application_id == application.id)).one()
+    link.application_id = other.id
+    db.flush()
+    assert _matches(db, "walter") == [other.id]
+
+
+def test_deleting_a_worker_reindexes_its_applications(pg_session, application):
+    db = pg_session
+    db.delete(application.workers[0])
+    db.flush()
+    assert _matches(db, "walter") == []
+    assert _matches(db, "weld") == [application.id]
@@ -0,0 +1,98 @@
+import pytest
+
+from app.backend import models
+from app.backend.config import settings
+from app.backend.services.approval_flow import ApprovalStateMachine
+
+SUPERVISOR = settings.SUPERVISOR_LEVEL
+SAFETY = settings.SAFETY_OFFICER_LEVEL
+ENTRY = settings.SECURITY_ENTER_LEVEL
+JOB_DONE = settings.CLOSING_FLOW_LEVEL
+EXIT = settings.SECURITY_EXIT_LEVEL
+
+
+def make_flow(**statuses) -> ApprovalStateMachine:
+    """A loaded state machine over in-memory rows; steps default to WAITING."""
+    levels = {"supervisor": SUPERVISOR, "safety": SAFETY, "entry": ENTRY, "job_done": JOB_DONE, "exit": EXIT}
+    flow = ApprovalStateMachine(db=None, workflow_data_id=1)
+    flow.application = models.Application(id=1, name="Hot work", status="PENDING", applicant_id=100)
+    flow.steps = [
+        models.ApprovalData(id=n, level=level, status=statuses.get(name, "WAITING"))
+        for n, (name, level) in enumerate(levels.items(), start=1)
+    ]
+    flow.approver_ids = {step.id: 10 + step.id for step in flow.steps}
+    return flow
+
+
+def step(flow, level) -> models.ApprovalData:
+    return flow._step_at(level)
+
+
+def test_approval_promotes_the_next_level_and_notifies_its_approver():
+    flow = make_flow(supervisor="PENDING")
+    flow.decide(step(flow, SUPERVISOR), "APPROVED")
+
+    assert step(flow, SUPERVISOR).status == "APPROVED"
+    assert step(flow, SUPERVISOR).time is not None
+    assert step(flow, SAFETY).status == "PENDING"
+    assert flow.application.status == "PENDING"
+    assert [n[0] for n in flow.notifications] == [flow.approver_ids[step(flow, SAFETY).id]]
+
+
+def test_last_permit_level_approves_the_application_and_opens_security_entry():
+    flow = make_flow(supervisor="APPROVED", safety="PENDING")
+    flow.decide(step(flow, SAFETY), "APPROVED")
+
+    assert flow.application.status == "APPROVED"
+    assert step(flow, ENTRY).status == "PENDING"
+    assert step(flow, JOB_DONE).status == "WAITING"
+    # the applicant hears about it; security entry is not told by email
+    assert [n[0] for n in flow.notifications] == [100]
+    assert "Approved" in flow.notifications[0][1]
+
+
+def test_rejection_rejects_the_application_and_stops():
+    flow = make_flow(supervisor="APPROVED", safety="PENDING")
+    flow.decide(step(flow, SAFETY), "REJECTED", remarks="No fire watch", approver_name="Sam")
+
+    assert flow.application.status == "REJECTED"
+    assert step(flow, SAFETY).remarks == "No fire watch"
+    assert step(flow, ENTRY).status == "WAITING"
+    assert [n[0] for n in flow.notifications] == [100]
+    assert "No fire watch" in flow.notifications[0][2]
+
+
+def test_repeated_rejection_notifies_once():
+    flow = make_flow(supervisor="REJECTED")
+    flow.application.status = "REJECTED"
+    flow.decide(step(flow, SUPERVISOR), "REJECTED")
+    assert flow.notifications == []
+
+
+@pytest.mark.parametrize("level, app_status, promoted", [
+    (ENTRY, "ACTIVE", None),       # job done is opened by the closing flow, not by entry
+    (JOB_DONE, "EXIT_PENDING", EXIT),
+    (EXIT, "COMPLETED", None),
+])
+def test_closing_levels_move_the_application_along(level, app_status, promoted):
+    flow = make_flow(supervisor="APPROVED", safety="APPROVED", entry="APPROVED", job_done="APPROVED")
+    flow.application.status = "APPROVED"
+    step(flow, level).status = "PENDING"
+    flow.decide(step(flow, level), "APPROVED")
+
+    assert flow.application.status == app_status
+    if promoted is not None:
+        assert step(flow, promoted).status == "PENDING"
+        assert [n[0] for n in flow.notifications] == [flow.approver_ids[step(flow, promoted).id]]
+    else:
+        assert flow.notifications == []
+
+
+def test_other_statuses_only_leave_the_step_alone():
+    flow = make_flow(supervisor="PENDING")
+    flow.decide(step(flow, SUPERVISOR), "PENDING", remarks="looking")
+
+    assert step(flow, SUPERVISOR).status == "PENDING"
+    assert step(flow, SUPERVISOR).remarks is None
+    assert step(flow, SAFETY).status == "WAITING"
+    assert flow.notifications == []
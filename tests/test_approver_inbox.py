@@ -0,0 +1,96 @@
+import pytest
+
+from app.backend import models
+from app.backend.config import settings
+from app.backend.services.approver_inbox import inbox_for_user, stage_for_level
+
+
+@pytest.mark.parametrize("level, stage", [
+    (None, "APPROVAL"),
+    (settings.SUPERVISOR_LEVEL, "APPROVAL"),
+    (settings.SECURITY_ENTER_LEVEL - 1, "APPROVAL"),
+    (settings.SECURITY_ENTER_LEVEL, "SECURITY_ENTRY"),
+    (settings.CLOSING_FLOW_LEVEL, "JOB_DONE"),
+    (settings.SECURITY_EXIT_LEVEL, "SECURITY_EXIT"),
+    (settings.SECURITY_ENTER_LEVEL + 1, "OTHER"),
+])
+def test_stage_for_level(level, stage):
+    assert stage_for_level(level) == stage
+
+
+# ---------- session hook (Postgres) ----------
+
+@pytest.fixture
+def permit(pg_session):
+    """An open application with a two-level approval chain, level 1 pending."""
+    db = pg_session
+    company = models.Company(name="Acme")
+    db.add(company)
+    db.flush()
+    applicant, supervisor, safety = (
+        models.User(company_id=company.id, name=name, password_hash="x")
+        for name in ("Applicant", "Supervisor", "Safety")
+    )
+    location = models.Location(company_id=company.id, name="Yard")
+    permit_type = models.PermitType(company_id=company.id, name="Hot work")
+    db.add_all([applicant, supervisor, safety, location, permit_type])
+    db.flush()
+    workflow = models.Workflow(company_id=company.id, permit_type_id=permit_type.id, name="Hot work")
+    db.add(workflow)
+    db.flush()
+    workflow_data = models.WorkflowData(company_id=company.id, workflow_id=workflow.id, name="Hot work")
+    db.add(workflow_data)
+    db.flush()
+    application = models.Application(
+        name="Weld pipe", permit_type_id=permit_type.id, location_id=location.id,
+        applicant_id=applicant.id, workflow_data_id=workflow_data.id, status="PENDING",
+    )
+    db.add(application)
+    steps = []
+    for level, (user, status) in enumerate([(supervisor, "PENDING"), (safety, "WAITING")], start=1):
+        approval = models.Approval(company_id=company.id, workflow_id=workflow.id, user_id=user.id,
+                                   name=user.name, level=level)
+        db.add(approval)
+        db.flush()
+        steps.append(models.ApprovalData(company_id=company.id, approval_id=approval.id,
+                                         workflow_data_id=workflow_data.id, status=status, level=level))
+    db.add_all(steps)
+    db.flush()
+    return application, steps, (supervisor, safety)
+
+
+def _inbox(db, user) -> list:
+    return [item.approval_data_id for item in inbox_for_user(db, user.id).items]
+
+
+def test_pending_step_lands_in_its_approvers_inbox(pg_session, permit):
+    application, (first, second), (supervisor, safety) = permit
+    out = inbox_for_user(pg_session, supervisor.id)
+    assert [i.approval_data_id for i in out.items] == [first.id]
+    assert out.counts == {"APPROVAL": 1}
+    assert out.items[0].application_name == "Weld pipe"
+    assert _inbox(pg_session, safety) == []
+
+
+def test_approval_moves_the_item_to_the_next_approver(pg_session, permit):
+    application, (first, second), (supervisor, safety) = permit
+    first.status = "APPROVED"
+    second.status = "PENDING"
+    pg_session.flush()
+    assert _inbox(pg_session, supervisor) == []
+    assert _inbox(pg_session, safety) == [second.id]
+
+
+def test_closed_application_leaves_every_inbox(pg_session, permit):
+    application, steps, approvers = permit
+    application.status = "REJECTED"
+    pg_session.flush()
+    assert all(_inbox(pg_session, user) == [] for user in approvers)
+
+
+def test_reassigning_an_approval_moves_the_item(pg_session, permit):
+    application, (first, second), (supervisor, safety) = permit
+    first.approval.user_id = safety.id
+    pg_session.flush()
+    assert _inbox(pg_session, supervisor) == []
+    assert _inbox(pg_session, safety) == [first.id]
@@ -0,0 +1,70 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from app.backend.config import settings
+from app.backend.services import email_outbox
+
+
+@pytest.fixture
+def retry_settings(monkeypatch):
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 30)
+    monkeypatch.setattr(settings, "OUTBOX_RETRY_MAX_SECONDS", 3600)
+
+
+@pytest.mark.parametrize("attempts, seconds", [(0, 30), (1, 30), (2, 60), (3, 120), (7, 1920), (8, 3600), (30, 3600)])
+def test_retry_delay_doubles_up_to_the_cap(retry_settings, attempts, seconds):
+    assert email_outbox._retry_delay(attempts) == timedelta(seconds=seconds)
+
+
+@pytest.mark.parametrize("configured, expected", [(None, 360), (60, 360), (900, 900)])
+def test_claim_lease_never_below_the_smtp_worst_case(monkeypatch, configured, expected):
+    monkeypatch.setattr(settings, "MAIL_TIMEOUT", 120)
+    monkeypatch.setattr(settings, "OUTBOX_CLAIM_LEASE_SECONDS", configured)
+    assert email_outbox._claim_lease() == timedelta(seconds=expected)
+
+
+def test_dispatch_once_skips_messages_taken_over_mid_batch(monkeypatch):
+    batch = [{"id": i, "subject": "s", "recipients": ["a@example.com"], "body": "b"} for i in (1, 2, 3)]
+    heartbeats, recorded = [], []
+
+    def heartbeat(token, ids):
+        heartbeats.append((token, list(ids)))
+        # another dispatcher took message 3 over after the first heartbeat
+        return [1, 2] if len(heartbeats) > 1 else [1, 2, 3]
+
+    async def send_email_batch(messages, before_send=None):
+        results = []
+        for m in messages:
+            results.append(None if await before_send(m) else "skipped")
+        return results
+
+    monkeypatch.setattr(email_outbox, "_claim_batch", lambda size: ("tok", batch))
+    monkeypatch.setattr(email_outbox, "_heartbeat", heartbeat)
+    monkeypatch.setattr(email_outbox, "_record_results", lambda token, results: recorded.append((token, results)))
+    monkeypatch.setattr(email_outbox, "send_email_batch", send_email_batch)
+
+    assert asyncio.run(email_outbox.dispatch_once(batch_size=3)) == 3
+    assert heartbeats == [("tok", [1, 2, 3])] * 3
+    assert recorded == [("tok", [(1, None), (2, None), (3, "skipped")])]
+
+
+def test_dispatch_once_retries_the_batch_when_smtp_fails(monkeypatch):
+    batch = [{"id": 1, "subject": "s", "recipients": ["a@example.com"], "body": "b"}]
+    recorded = []
+
+    async def send_email_batch(messages, before_send=None):
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(email_outbox, "_claim_batch", lambda size: ("tok", batch))
+    monkeypatch.setattr(email_outbox, "_record_results", lambda token, results: recorded.append(results))
+    monkeypatch.setattr(email_outbox, "send_email_batch", send_email_batch)
+
+    asyncio.run(email_outbox.dispatch_once())
+    assert recorded == [[(1, "connection refused")]]
+
+
+def test_dispatch_once_with_an_empty_outbox(monkeypatch):
+    monkeypatch.setattr(email_outbox, "_claim_batch", lambda size: ("tok", []))
+    assert asyncio.run(email_outbox.dispatch_once()) == 0
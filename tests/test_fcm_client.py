@@ -0,0 +1,90 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from app.backend.config import settings
+from app.backend.services.notifications import FcmClient
+from benchmarks.fake_fcm_server import FakeFcmState, make_handler
+
+
+@pytest.fixture(scope="module")
+def private_key() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+
+@pytest.fixture
+def fcm(monkeypatch, private_key):
+    """A fake FCM server on a free port, with the settings pointing at it."""
+    state = FakeFcmState(latency=0)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    for name, value in {
+        "FCM_PROJECT_ID": "test",
+        "FCM_SA_EMAIL": "test@example.com",
+        # as found in env files: newlines escaped
+        "FCM_SA_PRIVATE_KEY": private_key.replace("\n", "\\n"),
+        "FCM_TOKEN_URL": f"{base}/token",
+        "FCM_API_BASE": base,
+        "FCM_TIMEOUT_SECONDS": 5,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_access_token_is_fetched_once_for_many_sends(fcm):
+    client = FcmClient()
+    assert client.configured
+    results = [client.send(f"device-{i}", "Title", "Body", {"application_id": i}) for i in range(5)]
+    assert all(r.ok for r in results)
+    assert client.token_fetches == 1
+    assert fcm.stats["token_fetches"] == 1
+    assert fcm.stats["sent"] == 5
+
+
+def test_token_is_renewed_within_the_refresh_margin(fcm, monkeypatch):
+    client = FcmClient()
+    first = client.access_token()
+    # The fake server's tokens live 3600s: a larger margin means "about to expire"
+    monkeypatch.setattr(settings, "FCM_TOKEN_REFRESH_MARGIN_SECONDS", 3600)
+    assert client.access_token() != first
+    assert client.token_fetches == 2
+
+
+def test_revoked_token_is_refreshed_and_the_send_retried(fcm):
+    client = FcmClient()
+    client.access_token()
+    with fcm.lock:
+        fcm.access_tokens.clear()
+
+    result = client.send("device-1", "Title", "Body")
+    assert result.ok
+    assert client.token_fetches == 2
+    assert fcm.stats["unauthorized"] == 1
+
+
+def test_unregistered_device_token_is_reported_invalid(fcm):
+    result = FcmClient().send("invalid-device", "Title", "Body")
+    assert not result.ok
+    assert result.invalid_token
+    assert result.error.startswith("404")
+
+
+def test_concurrent_sends_share_one_token_fetch(fcm):
+    client = FcmClient()
+    threads = [threading.Thread(target=client.send, args=(f"device-{i}", "T", "B")) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert fcm.stats["sent"] == 8
+    assert fcm.stats["token_fetches"] == 1
@@ -0,0 +1,83 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.backend.utils.file_responses import _parse_range, conditional_file_response, content_disposition
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=900-", (900, 999)),
+    ("bytes=900-5000", (900, 999)),     # end past the file is clamped
+    ("bytes=-100", (900, 999)),          # suffix
+    ("bytes=-5000", (0, 999)),
+    ("bytes=500-100", None),             # invalid: ignored, full response
+    ("bytes=0-1,5-9", None),             # multiple ranges: not handled
+    ("items=0-9", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert _parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-1200", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(ValueError):
+        _parse_range(header, SIZE)
+
+
+def test_content_disposition_encodes_non_ascii_names():
+    assert content_disposition("plan.pdf") == 'attachment; filename="plan.pdf"'
+    assert content_disposition("план.pdf", inline=True) == "inline; filename*=utf-8''%D0%BF%D0%BB%D0%B0%D0%BD.pdf"
+
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "file.bin"
+    path.write_bytes(bytes(range(256)) * 4)   # 1024 bytes
+    app = FastAPI()
+
+    @app.get("/file")
+    def get_file(request: Request):
+        return conditional_file_response(request, str(path), "application/octet-stream", content_hash="abc")
+
+    return TestClient(app)
+
+
+def test_full_response_has_validators(client):
+    r = client.get("/file")
+    assert r.status_code == 200
+    assert len(r.content) == 1024
+    assert r.headers["etag"] == '"abc"'
+    assert r.headers["accept-ranges"] == "bytes"
+
+
+def test_if_none_match_gives_304(client):
+    assert client.get("/file", headers={"If-None-Match": 'W/"abc"'}).status_code == 304
+
+
+def test_range_gives_206(client):
+    r = client.get("/file", headers={"Range": "bytes=256-511"})
+    assert r.status_code == 206
+    assert r.headers["content-range"] == "bytes 256-511/1024"
+    assert r.content == bytes(range(256))
+
+
+def test_reversed_range_is_ignored(client):
+    r = client.get("/file", headers={"Range": "bytes=500-100"})
+    assert r.status_code == 200
+    assert len(r.content) == 1024
+
+
+def test_range_past_the_end_gives_416(client):
+    r = client.get("/file", headers={"Range": "bytes=2000-"})
+    assert r.status_code == 416
+    assert r.headers["content-range"] == "bytes */1024"
+
+
+def test_stale_if_range_sends_everything(client):
+    r = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"old"'})
+    assert r.status_code == 200
+    assert len(r.content) == 1024
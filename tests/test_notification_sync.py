@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+
+from app.backend import models
+from app.backend.routers.notifications import settled_for_sync, sync_notifications
+
+
+def test_settled_rows_are_older_than_the_snapshot_xmin():
+    sql = str(settled_for_sync().compile(dialect=postgresql.dialect()))
+    assert "notification.created_xid IS NULL" in sql
+    assert "notification.created_xid < pg_snapshot_xmin(pg_current_snapshot())" in sql
+
+
+# ---------- sync (Postgres) ----------
+
+@pytest.fixture
+def user(pg_session):
+    db = pg_session
+    company = models.Company(name="Acme")
+    db.add(company)
+    db.flush()
+    user = models.User(company_id=company.id, name="Approver", password_hash="x")
+    db.add(user)
+    db.flush()
+    return user
+
+
+def _notify(db, user, n, settled=True) -> list:
+    rows = [models.Notification(user_id=user.id, title=f"n{i}", message="m") for i in range(n)]
+    db.add_all(rows)
+    db.flush()
+    if settled:
+        # Rows written by this (still open) transaction are not settled yet;
+        # a null xid is how rows committed before the column existed look
+        db.execute(update(models.Notification)
+                   .where(models.Notification.id.in_([r.id for r in rows]))
+                   .values(created_xid=None))
+    return [r.id for r in rows]
+
+
+def test_sync_pages_through_new_notifications(pg_session, user):
+    ids = _notify(pg_session, user, 3)
+
+    first = sync_notifications(user_id=user.id, since_id=0, limit=2, db=pg_session)
+    assert [n.id for n in first.items] == ids[:2]
+    assert first.has_more and first.next_since_id == ids[1]
+    assert first.unread_count == 3
+
+    rest = sync_notifications(user_id=user.id, since_id=first.next_since_id, limit=2, db=pg_session)
+    assert [n.id for n in rest.items] == ids[2:]
+    assert not rest.has_more and rest.next_since_id == ids[2]
+
+
+def test_sync_holds_back_rows_of_open_transactions(pg_session, user):
+    settled = _notify(pg_session, user, 1)
+    _notify(pg_session, user, 1, settled=False)
+
+    out = sync_notifications(user_id=user.id, since_id=0, limit=10, db=pg_session)
+    assert [n.id for n in out.items] == settled
+    assert out.next_since_id == settled[0]
+    assert out.unread_count == 2
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.backend import models
+from app.backend.utils.pagination import decode_cursor, encode_cursor, keyset_page, keyset_query
+
+COLUMNS = [models.Notification.created_at, models.Notification.id]
+
+
+def test_cursor_round_trip_restores_types():
+    values = [datetime(2024, 5, 17, 8, 30, 15, 250000), 42]
+    token = encode_cursor(values)
+    assert "=" not in token
+    assert decode_cursor(token, COLUMNS) == values
+
+
+def test_cursor_keeps_nulls():
+    assert decode_cursor(encode_cursor([None, 7]), COLUMNS) == [None, 7]
+
+
+@pytest.mark.parametrize("token", ["not base64!", encode_cursor([1]), encode_cursor(["yesterday", 1])])
+def test_invalid_cursor_is_a_400(token):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(token, COLUMNS)
+    assert exc.value.status_code == 400
+
+
+class Row:
+    def __init__(self, id, created_at):
+        self.id = id
+        self.created_at = created_at
+
+
+def test_keyset_page_trims_the_extra_row():
+    rows = [Row(i, datetime(2024, 1, i)) for i in (1, 2, 3)]
+    items, cursor = keyset_page(rows, COLUMNS, limit=2)
+    assert items == rows[:2]
+    assert decode_cursor(cursor, COLUMNS) == [datetime(2024, 1, 2), 2]
+
+    items, cursor = keyset_page(rows[2:], COLUMNS, limit=2)
+    assert items == rows[2:] and cursor is None
+
+
+def test_keyset_query_filters_after_the_cursor():
+    cursor = encode_cursor([datetime(2024, 1, 2), 2])
+    query = keyset_query(select(models.Notification), COLUMNS, cursor, limit=20, descending=True)
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    assert "(notification.created_at, notification.id) < (" in sql
+    assert "ORDER BY notification.created_at DESC, notification.id DESC" in sql
+    assert query._limit_clause.value == 21
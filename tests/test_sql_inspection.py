@@ -0,0 +1,90 @@
+import pytest
+from sqlalchemy import ForeignKey, Integer, String, create_engine, select, text
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, relationship, selectinload
+
+from app.backend import sql_inspection
+from app.backend.config import settings
+from app.backend.sql_inspection import QueryBudgetExceeded, count_queries, statement_shape
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Parent(Base):
+    __tablename__ = "parent"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    children: Mapped[list["Child"]] = relationship(back_populates="parent")
+
+
+class Child(Base):
+    __tablename__ = "child"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    parent_id: Mapped[int] = mapped_column(ForeignKey("parent.id"))
+    name: Mapped[str] = mapped_column(String)
+    parent: Mapped[Parent] = relationship(back_populates="children")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_REPEAT_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "SQL_BUDGET_STRICT", False)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    sql_inspection.install({"test": engine})
+    with Session(engine) as session:
+        session.add_all([Parent(id=i, children=[Child(name=f"c{i}")]) for i in range(1, 6)])
+        session.commit()
+        session.expunge_all()
+        yield session
+    engine.dispose()
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT *\n  FROM t WHERE id IN (1, 2, 3) AND x IN ((1, 2), (3, 4))") == \
+        "SELECT * FROM t WHERE id IN (...) AND x IN (...)"
+
+
+def test_counts_statements_in_the_block(db):
+    with count_queries() as q:
+        db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 2"))
+    assert q.statements == 2
+    assert q.suspects() == []
+
+
+def test_lazy_loads_are_reported_with_their_relationship(db):
+    with count_queries() as q:
+        for parent in db.scalars(select(Parent)).all():
+            parent.children
+    assert q.statements == 6
+    [(n, shape, relationship)] = q.suspects()
+    assert n == 5
+    assert relationship == "Parent.children"
+    assert shape.startswith("SELECT child.")
+
+
+def test_eager_loading_stays_within_budget(db):
+    with count_queries(max_statements=2) as q:
+        for parent in db.scalars(select(Parent).options(selectinload(Parent.children))).all():
+            parent.children
+    assert q.statements == 2
+    assert q.suspects() == []
+
+
+def test_going_over_budget_raises_after_the_block(db):
+    with pytest.raises(QueryBudgetExceeded, match="ran 3 statements"):
+        with count_queries(max_statements=2, label="three selects"):
+            for n in range(3):
+                db.execute(text(f"SELECT {n}"))
+
+
+def test_strict_budget_fails_the_offending_statement(db, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_BUDGET_STRICT", True)
+    ran = []
+    with pytest.raises(QueryBudgetExceeded, match="exceeded its query budget of 1"):
+        with count_queries(max_statements=1, label="block"):
+            for n in range(3):
+                db.execute(text(f"SELECT {n}"))
+                ran.append(n)
+    assert ran == [0]
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.backend import models
+from app.backend.services import stats
+
+
+def test_missing_status_gets_a_counter_key():
+    assert stats._key(1, 2, None) == (1, 2, stats.NO_STATUS)
+    assert stats._key(1, 2, "ACTIVE") == (1, 2, "ACTIVE")
+
+
+# ---------- session hook and fold (Postgres) ----------
+
+@pytest.fixture
+def tenant(pg_session):
+    db = pg_session
+    company = models.Company(name="Acme")
+    db.add(company)
+    db.flush()
+    applicant = models.User(company_id=company.id, name="Applicant", password_hash="x")
+    yard, dock = (models.Location(company_id=company.id, name=name) for name in ("Yard", "Dock"))
+    permit_type = models.PermitType(company_id=company.id, name="Hot work")
+    db.add_all([applicant, yard, dock, permit_type])
+    db.flush()
+    return company, applicant, (yard, dock), permit_type
+
+
+def _add(db, applicant, location, permit_type, status) -> models.Application:
+    app = models.Application(name="Permit", permit_type_id=permit_type.id, location_id=location.id,
+                             applicant_id=applicant.id, status=status)
+    db.add(app)
+    return app
+
+
+def _counts(db, company, **kwargs) -> dict:
+    return {(key, status): n for key, status, n in stats.application_counts(db, company.id, **kwargs)}
+
+
+def test_writes_keep_counts_exact(pg_session, tenant):
+    db = pg_session
+    company, applicant, (yard, dock), permit_type = tenant
+    a = _add(db, applicant, yard, permit_type, "PENDING")
+    b = _add(db, applicant, yard, permit_type, "PENDING")
+    _add(db, applicant, dock, permit_type, None)
+    db.flush()
+    assert _counts(db, company) == {(None, "PENDING"): 2, (None, stats.NO_STATUS): 1}
+
+    a.status = "APPROVED"
+    b.location_id = dock.id
+    db.flush()
+    assert _counts(db, company, group_by="location") == {
+        (yard.id, "APPROVED"): 1,
+        (dock.id, "PENDING"): 1,
+        (dock.id, stats.NO_STATUS): 1,
+    }
+
+    db.delete(a)
+    db.flush()
+    assert _counts(db, company, location_id=yard.id) == {}
+
+
+def test_folding_moves_deltas_without_changing_counts(pg_session, tenant):
+    db = pg_session
+    company, applicant, (yard, dock), permit_type = tenant
+    for status in ("PENDING", "PENDING", "ACTIVE"):
+        _add(db, applicant, yard, permit_type, status)
+    db.flush()
+    before = _counts(db, company)
+
+    db.connection().execute(stats._FOLD_SQL)
+    assert db.scalar(select(func.count()).select_from(models.ApplicationStatusDelta)) == 0
+    assert _counts(db, company) == before == {(None, "PENDING"): 2, (None, "ACTIVE"): 1}